@@ -13,12 +13,111 @@ import json
 import threading
 import contextlib
 import shutil
+import subprocess
 
 # PCI state database constants
 PCIE_DETACH_INFO_TABLE = "PCIE_DETACH_INFO"
 PCIE_OPERATION_DETACHING = "detaching"
 PCIE_OPERATION_ATTACHING = "attaching"
 
+
+class SensordRestartBatch(object):
+    """
+    A group of sensord restart requests which is served by a single restart
+    """
+    def __init__(self):
+        self._done = threading.Event()
+        self._timer = None
+        self.requests = 0
+        self.result = None
+
+    def complete(self, result):
+        self.result = result
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the restart serving this batch has finished
+
+        Args:
+            timeout: Maximum time in seconds to wait, None waits forever
+
+        Returns:
+            bool: True if sensord was restarted successfully, False if the
+            restart failed or did not finish within the timeout
+        """
+        if not self._done.wait(timeout):
+            return False
+        return self.result
+
+
+class SensordRestartCoordinator(object):
+    """
+    Coalesces sensord restart requests issued within a short window so that
+    several modules going down or coming up together restart sensord once
+    """
+    RESTART_CMD = ["service", "sensord", "restart"]
+    DEFAULT_DEBOUNCE_SECS = 0.5
+
+    def __init__(self, lock_factory=None, debounce_secs=DEFAULT_DEBOUNCE_SECS):
+        """
+        Args:
+            lock_factory: A callable returning a context manager held while
+            sensord is restarted, None for no locking
+            debounce_secs: Time in seconds to gather requests before restarting
+        """
+        self._lock_factory = lock_factory
+        self._debounce_secs = debounce_secs
+        self._mutex = threading.Lock()
+        self._pending = None
+
+    def request_restart(self):
+        """
+        Requests a sensord restart. The restart is deferred by the debounce
+        window and shared with all other requests made within that window.
+
+        Returns:
+            A SensordRestartBatch object which can be waited on for the result
+        """
+        with self._mutex:
+            batch = self._pending
+            if batch is None:
+                batch = self._pending = SensordRestartBatch()
+                batch._timer = threading.Timer(self._debounce_secs, self._flush, args=(batch,))
+                batch._timer.daemon = True
+                batch._timer.start()
+            batch.requests += 1
+        return batch
+
+    def flush(self):
+        """
+        Restarts sensord immediately if any request is pending
+        """
+        with self._mutex:
+            batch = self._pending
+        if batch is not None:
+            batch._timer.cancel()
+            self._flush(batch)
+
+    def _flush(self, batch):
+        with self._mutex:
+            if self._pending is not batch:
+                return
+            self._pending = None
+        batch.complete(self._restart())
+
+    def _restart(self):
+        try:
+            lock = self._lock_factory() if self._lock_factory else contextlib.nullcontext()
+            with lock:
+                proc = subprocess.run(self.RESTART_CMD, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL)
+            return proc.returncode == 0
+        except Exception as e:
+            sys.stderr.write("Failed to restart sensord: {}\n".format(str(e)))
+            return False
+
+
 class ModuleBase(device_base.DeviceBase):
     """
     Base class for interfacing with a module (supervisor module, line card
@@ -67,6 +166,11 @@ class ModuleBase(device_base.DeviceBase):
     # Module reboot type to reboot SMART SWITCH
     MODULE_REBOOT_SMARTSWITCH = "SMARTSWITCH"
 
+    # Shared by all modules so that concurrent sensor removal/addition
+    # results in a single sensord restart
+    _sensord_restart_coordinator = None
+    _sensord_restart_coordinator_lock = threading.Lock()
+
     def __init__(self):
         # List of ComponentBase-derived objects representing all components
         # available on the module
@@ -120,6 +224,23 @@ class ModuleBase(device_base.DeviceBase):
         with self._file_operation_lock(lock_file_path):
             yield
 
+    def _get_sensord_restart_coordinator(self):
+        with ModuleBase._sensord_restart_coordinator_lock:
+            if ModuleBase._sensord_restart_coordinator is None:
+                ModuleBase._sensord_restart_coordinator = SensordRestartCoordinator(
+                    self._sensord_operation_lock)
+            return ModuleBase._sensord_restart_coordinator
+
+    def request_sensord_restart(self):
+        """
+        Requests a sensord restart which is coalesced with the requests of
+        other modules made within the debounce window
+
+        Returns:
+            A SensordRestartBatch object which can be waited on for the result
+        """
+        return self._get_sensord_restart_coordinator().request_restart()
+
     def get_base_mac(self):
         """
         Retrieves the base MAC address for the module
@@ -323,8 +444,7 @@ class ModuleBase(device_base.DeviceBase):
         try:
             bus_info_list = self.get_pci_bus_info()
             with self._pci_operation_lock():
-                for bus in bus_info_list:
-                    self.pci_entry_state_db(bus, PCIE_OPERATION_DETACHING)
+                self.pci_entries_state_db(bus_info_list, PCIE_OPERATION_DETACHING)
                 return self.pci_detach()
         except Exception as e:
             sys.stderr.write("Failed to handle PCI removal: {}\n".format(str(e)))
@@ -355,6 +475,35 @@ class ModuleBase(device_base.DeviceBase):
         except Exception as e:
             sys.stderr.write("Failed to write pcie bus info to state database: {}\n".format(str(e)))
 
+    def pci_entries_state_db(self, pcie_strings, operation):
+        """
+        Bulk variant of pci_entry_state_db. All entries of the module are
+        queued on a buffered table and written to the state database in a
+        single pipelined round-trip.
+
+        Args:
+            pcie_strings (list): The PCI bus strings to be written to state database
+            operation (str): The operation being performed ("detaching" or "attaching")
+        """
+        if not pcie_strings:
+            return
+        try:
+            # Do not use import if swsscommon is not needed
+            import swsscommon
+            if not self.state_db_connector:
+                self.state_db_connector = swsscommon.swsscommon.DBConnector("STATE_DB", 0)
+            pipeline = swsscommon.swsscommon.RedisPipeline(self.state_db_connector)
+            table = swsscommon.swsscommon.Table(pipeline, PCIE_DETACH_INFO_TABLE, True)
+            for pcie_string in pcie_strings:
+                if operation == PCIE_OPERATION_ATTACHING:
+                    table._del(pcie_string)
+                else:
+                    table.set(pcie_string, swsscommon.swsscommon.FieldValuePairs(
+                        [("bus_info", pcie_string), ("dpu_state", operation)]))
+            table.flush()
+        except Exception as e:
+            sys.stderr.write("Failed to write pcie bus info to state database: {}\n".format(str(e)))
+
     def handle_pci_rescan(self):
         """
         Handles PCI device rescan by updating state database and reattaching device.
@@ -366,8 +515,7 @@ class ModuleBase(device_base.DeviceBase):
             bus_info_list = self.get_pci_bus_info()
             with self._pci_operation_lock():
                 return_value = self.pci_reattach()
-                for bus in bus_info_list:
-                    self.pci_entry_state_db(bus, PCIE_OPERATION_ATTACHING)
+                self.pci_entries_state_db(bus_info_list, PCIE_OPERATION_ATTACHING)
                 return return_value
         except Exception as e:
             sys.stderr.write("Failed to handle PCI rescan: {}\n".format(str(e)))
@@ -805,11 +953,8 @@ class ModuleBase(device_base.DeviceBase):
 
             shutil.copy2(source_file, target_file)
 
-            # Restart sensord with lock
-            with self._sensord_operation_lock():
-                os.system("service sensord restart")
-
-            return True
+            # Restart sensord, coalesced with other modules
+            return self.request_sensord_restart().wait()
         except Exception as e:
             sys.stderr.write("Failed to handle sensor removal: {}\n".format(str(e)))
             return False
@@ -833,11 +978,8 @@ class ModuleBase(device_base.DeviceBase):
             # Remove the file
             os.remove(target_file)
 
-            # Restart sensord with lock
-            with self._sensord_operation_lock():
-                os.system("service sensord restart")
-
-            return True
+            # Restart sensord, coalesced with other modules
+            return self.request_sensord_restart().wait()
         except Exception as e:
             sys.stderr.write("Failed to handle sensor addition: {}\n".format(str(e)))
             return False
@@ -0,0 +1,231 @@
+"""
+    presence_watcher.py
+
+    Reusable engine for the transceiver change events of ChassisBase.get_change_event,
+    ModuleBase.get_change_event and SfpUtilBase.get_transceiver_change_event.
+
+    A PresenceSource gives the presence of all the ports at once, as a bitmap (bit i set if
+    port i is present): from a platform hook (e.g. a CPLD register read), from sysfs attributes
+    holding one bit or a word of bits each, or from the get_presence() of each SFP object.
+    PresenceWatcher compares successive bitmaps and returns the ports which changed in the
+    documented event formats. Sysfs attributes whose driver calls sysfs_notify() on presence
+    changes are waited on with poll(POLLPRI) instead of being read periodically.
+
+    Usage, in a platform chassis:
+        self._presence_watcher = PresenceWatcher(SysfsPresenceSource(
+            [('/sys/devices/platform/cpld/qsfp_present', 0, 32)], active_low=True, notify=True))
+
+        def get_change_event(self, timeout=0):
+            return self._presence_watcher.get_change_event(timeout)
+"""
+
+import os
+import select
+import time
+
+# Seconds between two reads of the presence when no notification can be waited for
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Seconds between two reads of notifying attributes, in case a notification is missed
+DEFAULT_NOTIFY_POLL_INTERVAL = 10.0
+
+SFP_STATUS_INSERTED = '1'
+SFP_STATUS_REMOVED = '0'
+
+class PresenceSource(object):
+    """
+    Presence of the ports computed by a platform hook.
+
+    Args:
+        read_bitmap: callable returning the presence bitmap, None on failure
+        poll_interval: seconds between two reads while waiting for a change
+    """
+    def __init__(self, read_bitmap=None, poll_interval=DEFAULT_POLL_INTERVAL):
+        self._read_bitmap = read_bitmap
+        self.poll_interval = poll_interval
+
+    def read(self):
+        """
+        Return: Integer, bitmap of the ports present, None if it could not be read
+        """
+        return self._read_bitmap()
+
+    def wait(self, timeout):
+        """
+        Block until the presence may have changed or timeout seconds elapsed (None: no limit)
+        """
+        time.sleep(self.poll_interval if timeout is None else min(timeout, self.poll_interval))
+
+    def close(self):
+        pass
+
+class SfpPresenceSource(PresenceSource):
+    """
+    Presence read from the get_presence() of each SFP object, bit i for sfp_list[i]. For
+    platforms without a cheaper way to read the presence of all the ports.
+    """
+    def __init__(self, sfp_list, poll_interval=DEFAULT_POLL_INTERVAL):
+        super(SfpPresenceSource, self).__init__(poll_interval=poll_interval)
+        self.sfp_list = sfp_list
+
+    def read(self):
+        bitmap = 0
+        for index, sfp in enumerate(self.sfp_list):
+            if sfp.get_presence():
+                bitmap |= 1 << index
+        return bitmap
+
+class SysfsPresenceSource(PresenceSource):
+    """
+    Presence read from sysfs attributes.
+
+    Args:
+        attributes: list of (path, first_port, num_ports): each attribute holds an integer
+                    (decimal or 0x-prefixed hex) whose bit i is the presence of port
+                    first_port + i, e.g. ('.../module_present', 5, 1) or ('.../present', 0, 32)
+        active_low: Boolean, True if a clear bit means present
+        notify: Boolean, True if the driver notifies changes of the attributes (sysfs_notify)
+        poll_interval: seconds between two reads, kept when notify is set in case a
+                       notification is missed
+    """
+    def __init__(self, attributes, active_low=False, notify=False, poll_interval=None):
+        if poll_interval is None:
+            poll_interval = DEFAULT_NOTIFY_POLL_INTERVAL if notify else DEFAULT_POLL_INTERVAL
+        super(SysfsPresenceSource, self).__init__(poll_interval=poll_interval)
+        self.attributes = attributes
+        self.active_low = active_low
+        self.notify = notify
+        # path -> fd, kept open from one read to the next
+        self._fds = {}
+        self._poller = None
+
+    def _open(self, path):
+        fd = self._fds.get(path)
+        if fd is None:
+            fd = os.open(path, os.O_RDONLY)
+            self._fds[path] = fd
+            self._poller = None
+        return fd
+
+    def _read_attribute(self, path):
+        fd = self._open(path)
+        try:
+            # Reading from offset 0 also re-arms the notification of the attribute
+            return int(os.pread(fd, 64, 0).decode().strip(), 0)
+        except (OSError, ValueError):
+            self._close_fd(path)
+            raise
+
+    def _close_fd(self, path):
+        fd = self._fds.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+            self._poller = None
+
+    def read(self):
+        bitmap = 0
+        try:
+            for path, first_port, num_ports in self.attributes:
+                value = self._read_attribute(path)
+                mask = (1 << num_ports) - 1
+                if self.active_low:
+                    value = ~value
+                bitmap |= (value & mask) << first_port
+        except (OSError, ValueError):
+            return None
+        return bitmap
+
+    def wait(self, timeout):
+        if not self.notify or not self._fds:
+            return super(SysfsPresenceSource, self).wait(timeout)
+        if self._poller is None:
+            self._poller = select.poll()
+            for fd in self._fds.values():
+                self._poller.register(fd, select.POLLPRI | select.POLLERR)
+        timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+        self._poller.poll(timeout * 1000)
+
+    def close(self):
+        for path in list(self._fds):
+            self._close_fd(path)
+
+class PresenceWatcher(object):
+    """
+    Turns the successive presence bitmaps of a PresenceSource into change events.
+
+    Args:
+        source: PresenceSource of the ports
+        index_base: device ID reported for the port of bit 0
+    """
+    def __init__(self, source, index_base=0):
+        self.source = source
+        self.index_base = index_base
+        # Presence last reported, None until first read
+        self.bitmap = None
+
+    def reset(self):
+        """
+        Forget the presence last reported, the next call takes it again as reference
+        """
+        self.bitmap = None
+
+    def _get_events(self, timeout):
+        """
+        Return: {device ID: status} of the ports changed since the last call, empty if none
+        changed within timeout milliseconds (0: no limit), None if the source failed
+        """
+        deadline = None if not timeout else time.monotonic() + timeout / 1000.0
+        if self.bitmap is None:
+            self.bitmap = self.source.read()
+            if self.bitmap is None:
+                return None
+            self.source.wait(None if deadline is None else max(0, deadline - time.monotonic()))
+
+        while True:
+            bitmap = self.source.read()
+            if bitmap is None:
+                return None
+            changed = bitmap ^ self.bitmap
+            if changed:
+                self.bitmap = bitmap
+                events = {}
+                while changed:
+                    bit = (changed & -changed).bit_length() - 1
+                    events[str(self.index_base + bit)] = \
+                        SFP_STATUS_INSERTED if bitmap & (1 << bit) else SFP_STATUS_REMOVED
+                    changed &= changed - 1
+                return events
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return {}
+            self.source.wait(remaining)
+
+    def get_change_event(self, timeout=0):
+        """
+        Returns the transceivers changed, as ChassisBase.get_change_event
+
+        Args:
+            timeout: Timeout in milliseconds. If timeout == 0, blocks until a change is
+                detected.
+
+        Returns:
+            (bool, dict): True if successful, and {'sfp': {'device_id': 'device_event'}},
+            empty if the timeout expired
+        """
+        events = self._get_events(timeout)
+        if events is None:
+            return False, {'sfp': {}}
+        return True, {'sfp': events}
+
+    def get_transceiver_change_event(self, timeout=0):
+        """
+        Returns the transceivers changed, as SfpUtilBase.get_transceiver_change_event
+
+        Returns:
+            (status, events): True if successful, and {'port index': status}, empty if the
+            timeout expired
+        """
+        events = self._get_events(timeout)
+        if events is None:
+            return False, {}
+        return True, events
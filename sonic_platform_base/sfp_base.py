@@ -71,11 +71,16 @@ class SfpBase(device_base.DeviceBase):
     SFP_PORT_TYPE_BIT_OSFP                = 0x00001000
     SFP_PORT_TYPE_BIT_SFP_DD              = 0x00002000
 
+    # Directory in which the static EEPROM pages of CMIS modules are persisted across
+    # restarts, None to read them from the module every time an XcvrApi is created
+    XCVR_STATIC_CACHE_DIR = None
+
     def __init__(self):
         # List of ThermalBase-derived objects representing all thermals
         # available on the SFP
         self._thermal_list = []
-        self._xcvr_api_factory = XcvrApiFactory(self.read_eeprom, self.write_eeprom)
+        self._xcvr_api_factory = XcvrApiFactory(self.read_eeprom, self.write_eeprom,
+                                                static_cache_dir=self.XCVR_STATIC_CACHE_DIR)
         self._xcvr_api = None
 
     def get_num_thermals(self):
@@ -21,6 +21,87 @@ except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
 
+def make_crc_table(poly, width):
+    """
+    Precompute the 256-entry lookup table of a non-reflected CRC of the
+    given polynomial and width in bits
+    """
+    top = 1 << (width - 1)
+    mask = (1 << width) - 1
+    table = []
+    for byte in range(256):
+        reg = byte << (width - 8)
+        for _ in range(8):
+            reg = ((reg << 1) ^ poly) if reg & top else (reg << 1)
+        table.append(reg & mask)
+    return table
+
+
+def compute_crc(data, table, width, init=0):
+    """
+    Table-driven non-reflected CRC of data, processing one byte per lookup
+    """
+    shift = width - 8
+    mask = (1 << width) - 1
+    reg = init
+    for byte in data:
+        reg = ((reg << 8) & mask) ^ table[((reg >> shift) ^ byte) & 0xff]
+    return reg
+
+
+# Struct formats summing whole big endian words, by checksum field size
+_2S_COMPLEMENT_FORMATS = {1: 'B', 2: '>H', 4: '>I', 8: '>Q'}
+
+
+def compute_2s_complement(data, size):
+    """
+    Two's complement of the sum of data taken as big endian words of size
+    bytes. A trailing partial word is summed as a shorter word.
+    """
+    data = bytes(data)
+    whole = len(data) - len(data) % size
+    fmt = _2S_COMPLEMENT_FORMATS.get(size)
+    if size == 1:
+        total = sum(data)
+    elif fmt is not None:
+        total = sum(word for word, in struct.iter_unpack(fmt, data[:whole]))
+    else:
+        total = sum(int.from_bytes(data[loc:loc + size], 'big')
+                    for loc in range(0, whole, size))
+    if whole != len(data):
+        total += int.from_bytes(data[whole:], 'big')
+    T = 1 << (size * 8)
+    return (T - total) & (T - 1)
+
+
+# Dell CRC: CRC-16 of polynomial 0x8005, zero initial value, not reflected
+DELL_CRC_TABLE = make_crc_table(0x8005, 16)
+# CRC-16/CCITT-FALSE: polynomial 0x1021, 0xffff initial value, not reflected
+CRC16_CCITT_TABLE = make_crc_table(0x1021, 16)
+# CRC-8: polynomial 0x07, zero initial value, not reflected
+CRC8_TABLE = make_crc_table(0x07, 8)
+
+# Checksum algorithms selectable through EepromDecoder.checksum_type(),
+# called with the data and EepromDecoder.checksum_field_size().
+# '2s-complement' and 'dell-crc' are computed by the EepromDecoder methods
+# compute_2s_complement() and compute_dell_crc() instead.
+CHECKSUM_ALGORITHMS = {
+    'crc32': lambda data, size: binascii.crc32(data) & 0xffffffff,
+    '2s-complement': compute_2s_complement,
+    'dell-crc': lambda data, size: compute_crc(data, DELL_CRC_TABLE, 16),
+    'crc16-ccitt': lambda data, size: compute_crc(data, CRC16_CCITT_TABLE, 16, 0xffff),
+    'crc8': lambda data, size: compute_crc(data, CRC8_TABLE, 8),
+}
+
+
+def register_checksum(name, algorithm):
+    """
+    Make a checksum algorithm, a function of (data, checksum field size),
+    available to EepromDecoder subclasses under name
+    """
+    CHECKSUM_ALGORITHMS[name] = algorithm
+
+
 class EepromDecoder(object):
     def __init__(self, path, format, start, status, readonly):
         self.p = path
@@ -87,43 +168,23 @@ class EepromDecoder(object):
         sys.exit(1)
 
     def compute_2s_complement(self, e, size):
-        crc = 0
-        loc = 0
-        end = len(e)
-        while loc != end:
-            crc += int('0x' + binascii.b2a_hex(e[loc:loc+size]), 0)
-            loc += size
-        T = 1 << (size * 8)
-        return (T - crc) & (T - 1)
+        return compute_2s_complement(e, size)
 
     def compute_dell_crc(self, message):
-        poly = 0x8005
-        reg = 0x0000
-        message += bytearray(b'\x00\x00')
-        for byte in message:
-            mask = 0x80
-            while (mask > 0):
-                reg<<=1
-                if byte & mask:
-                    reg += 1
-                mask>>=1
-                if reg > 0xffff:
-                    reg &= 0xffff
-                    reg ^= poly
-        return reg
+        return compute_crc(message, DELL_CRC_TABLE, 16)
 
     def calculate_checksum(self, e):
-        if self.checksum_type() == 'crc32':
-            return binascii.crc32(e) & 0xffffffff
-
-        if self.checksum_type() == '2s-complement':
-            size = self.checksum_field_size()
-            return self.compute_2s_complement(e, size)
-
-        if self.checksum_type() == 'dell-crc':
+        checksum_type = self.checksum_type()
+        # Computed by the methods, which subclasses may override
+        if checksum_type == '2s-complement':
+            return self.compute_2s_complement(e, self.checksum_field_size())
+        if checksum_type == 'dell-crc':
             return self.compute_dell_crc(e)
-        print('checksum type not yet supported')
-        sys.exit(1)
+        algorithm = CHECKSUM_ALGORITHMS.get(checksum_type)
+        if algorithm is None:
+            print('checksum type not yet supported')
+            sys.exit(1)
+        return algorithm(e, self.checksum_field_size())
 
     def is_checksum_valid(self, e):
         offset = 0 - self.checksum_field_size()
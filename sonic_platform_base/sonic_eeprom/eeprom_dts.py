@@ -7,7 +7,7 @@ except ImportError:
 try:
     import os
     import binascii
-    import subprocess
+    from collections import namedtuple
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
@@ -16,117 +16,156 @@ mtd_root = '/dev/mtd'
 dts_root = '/proc/device-tree/'
 sys_dev  = '/sys/devices/'
 
+# Device tree nodes that never hold eeproms, not walked
+PRUNED_NODES = ('__symbols__', '__fixups__', '__local_fixups__', 'aliases', 'chosen', 'cpus')
+
 #
-# This routine takes a token list containing the desired eeprom types
-# (e.g. 'sfp', 'psu', 'board'), and returns a dict of {[dts path:(dev attrs)]}
-# for the corresponding eeproms. For those accessible via i2c, the attrs
-# will contain (i2c bus index, i2c device number).  For those mounted to
-# /dev/mtd, the attrs will be (mtd partition number).
+# EEPROM node found in the device tree.
+#   path:     dts path of the node
+#   type:     'i2c' or 'mtd'
+#   dev_id:   i2c bus index, or mtd partition number (string)
+#   reg:      i2c address as two hex digits, None for mtd
+#   ro:       True if the node has a 'read-only' property
+#   instance: label of the node up to '_eeprom'
 #
-def get_dev_attr_from_dtb(tokens):
+DtsEepromNode = namedtuple('DtsEepromNode', ['path', 'type', 'dev_id', 'reg', 'ro', 'instance'])
 
-    dts_paths = []
-    i2c_devices = []
-    sub_devices = []
+# dts root -> list of DtsEepromNode, the device tree does not change until reboot
+_eeprom_nodes_cache = {}
 
-    eep_dict = {}
 
-    #
-    # first try i2c
-    #
+def _read_property(node, name):
     try:
-        ph = subprocess.Popen(['/bin/ls', '-R', dts_root],
-                              stdout=subprocess.PIPE,
-                              shell=False, stderr=subprocess.STDOUT)
-        cmdout = ph.communicate()[0]
-        ph.wait()
-    except OSError as e:
-        raise OSError("cannot access directory")
+        with open(os.path.join(node, name), 'rb') as f:
+            return f.read()
+    except (IOError, OSError):
+        return None
 
-    lines = cmdout.splitlines()
-    for I in lines:
-        if not I.endswith(':') or 'i2c' not in I:
-            continue
 
-        I = I.rstrip(':\n\r')
-        last = I.split('/')[-1]
-        if 'i2c' in last:
-            depth = I.count('i2c')
-            while len(sub_devices) < depth:
-                sub_devices.append([])
-            sub_devices[depth-1].append(I)
-        elif 'eeprom' in last:
-            dts_paths.append(I)
+def _read_instance(node):
+    label = _read_property(node, 'label')
+    if label is None:
+        return ''
+    return label.decode('ascii', 'ignore').rstrip('\0\n').partition('_eeprom')[0]
 
-    # re-order the device heirarchy and build the device list
-    for i in sub_devices:
-        for j in i:
-            i2c_devices.append(j)
-
-    for eep in dts_paths:
-        instance = ''
-        if os.path.isfile('/'.join([eep, 'label'])):
-            F = open('/'.join([eep, 'label']), "rb")
-            instance = F.read().partition('_eeprom')[0]
-            F.close()
-
-        # check for read-only
-        read_only = os.path.isfile('/'.join([eep, 'read-only']))
-
-        for t in tokens:
-            if t not in eep and t not in instance:
-                continue
 
-            # get the i2c idx by matching the path prefix
-            i2c_idx = i2c_devices.index(eep.rsplit('/', 1)[0])
+#
+# Walk the device tree in the order of 'ls -R' and return the i2c bus nodes
+# grouped by i2c nesting depth, the i2c eeprom nodes and the flash
+# partitions labelled as eeproms. EEPROM nodes are not descended into and
+# the pruned nodes are skipped; symlinks are not followed.
+#
+def _walk_device_tree(root):
+    i2c_buses = []
+    i2c_eeproms = []
+    flash_eeproms = []
+
+    stack = [root.rstrip('/') or '/']
+    while stack:
+        node = stack.pop()
+        try:
+            with os.scandir(node) as it:
+                children = sorted(e.name for e in it if e.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
 
-            # read the reg
-            reg_path = '/'.join([eep, 'reg'])
-            F = open(reg_path, "rb")
-            o = F.read()
-            reg = binascii.b2a_hex(o)[-2:]
-            F.close()
+        descend = []
+        for name in children:
+            if name in PRUNED_NODES:
+                continue
+            path = os.path.join(node, name)
+            if 'i2c' in name:
+                depth = path.count('i2c')
+                while len(i2c_buses) < depth:
+                    i2c_buses.append([])
+                i2c_buses[depth - 1].append(path)
+            elif 'eeprom' in name and 'i2c' in node:
+                i2c_eeproms.append(path)
+                continue
+            elif 'flash' in path:
+                label = _read_property(path, 'label')
+                if label is not None and b'eeprom' in label:
+                    flash_eeproms.append(path)
+            descend.append(path)
+        # visit the children in name order
+        stack.extend(reversed(descend))
 
-            eep_dict[eep] = {'type': 'i2c', \
-                             'dev-id': i2c_idx, \
-                             'reg': reg, \
-                             'ro': read_only}
-            break
+    return i2c_buses, i2c_eeproms, flash_eeproms
 
 
-    #
-    # now try flash
-    #
-    try:
-        ph = subprocess.Popen(['/bin/grep', '-r', 'eeprom', dts_root],
-                              stdout=subprocess.PIPE,
-                              shell=False, stderr=subprocess.STDOUT)
-        cmdout = ph.communicate()[0]
-        ph.wait()
-    except OSError as e:
+#
+# Return the list of DtsEepromNode of the device tree at root. The walk
+# is done once per root and cached for the lifetime of the process.
+#
+def get_eeprom_nodes(root=None):
+    if root is None:
+        root = dts_root
+    nodes = _eeprom_nodes_cache.get(root)
+    if nodes is not None:
+        return nodes
+
+    if not os.path.isdir(root):
         raise OSError("cannot access directory")
 
-    lines = cmdout.splitlines()
-    for I in lines:
-        if 'flash' not in I or 'label' not in I:
+    i2c_buses, i2c_eeproms, flash_eeproms = _walk_device_tree(root)
+
+    # re-order the device heirarchy and build the device list
+    i2c_devices = {}
+    for depth in i2c_buses:
+        for bus in depth:
+            i2c_devices.setdefault(bus, len(i2c_devices))
+
+    nodes = []
+    for eep in i2c_eeproms:
+        # get the i2c idx by matching the path prefix
+        i2c_idx = i2c_devices.get(eep.rsplit('/', 1)[0])
+        reg = _read_property(eep, 'reg')
+        if i2c_idx is None or not reg:
             continue
+        nodes.append(DtsEepromNode(eep, 'i2c', i2c_idx,
+                                   binascii.b2a_hex(reg)[-2:].decode('ascii'),
+                                   os.path.isfile(os.path.join(eep, 'read-only')),
+                                   _read_instance(eep)))
 
-        eep = I.partition(dts_root)[2].rpartition('label')[0]
-        full_eep = '/'.join([dts_root, eep])
-        F = open('/'.join([full_eep, 'label']), "rb")
-        instance = F.read().partition('_eeprom')[0]
-        F.close()
+    for eep in flash_eeproms:
+        mtd_n = eep.partition('partition@')[2]
+        nodes.append(DtsEepromNode(eep, 'mtd', mtd_n, None,
+                                   os.path.isfile(os.path.join(eep, 'read-only')),
+                                   _read_instance(eep)))
 
-        read_only = os.path.isfile('/'.join([full_eep, 'read-only']))
+    _eeprom_nodes_cache[root] = nodes
+    return nodes
 
-        for t in tokens:
-            if t not in instance:
-                continue
 
-            mtd_n = eep.partition('partition@')[2].rstrip('/')
-            eep_dict[full_eep] = {'type': 'mtd', \
-                                  'dev-id': mtd_n, \
-                                  'ro': read_only}
+def clear_eeprom_nodes_cache():
+    _eeprom_nodes_cache.clear()
+
+
+#
+# This routine takes a token list containing the desired eeprom types
+# (e.g. 'sfp', 'psu', 'board'), and returns a dict of {[dts path:(dev attrs)]}
+# for the corresponding eeproms. For those accessible via i2c, the attrs
+# will contain (i2c bus index, i2c device number).  For those mounted to
+# /dev/mtd, the attrs will be (mtd partition number).
+#
+def get_dev_attr_from_dtb(tokens):
+
+    eep_dict = {}
+
+    for node in get_eeprom_nodes():
+        if node.type == 'i2c':
+            if not any(t in node.path or t in node.instance for t in tokens):
+                continue
+            eep_dict[node.path] = {'type': 'i2c', \
+                                   'dev-id': node.dev_id, \
+                                   'reg': node.reg, \
+                                   'ro': node.ro}
+        else:
+            if not any(t in node.instance for t in tokens):
+                continue
+            eep_dict[node.path] = {'type': 'mtd', \
+                                   'dev-id': node.dev_id, \
+                                   'ro': node.ro}
 
     return eep_dict
 
@@ -13,6 +13,7 @@ try:
     import time
     import socket
     import re
+    from array import array
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
@@ -25,9 +26,13 @@ class bcmshell (object):
     socket fd by switchd, allowing users to run commands and extract delimited
     output.  bcmdiag opens the socket file, flushes the socket's read side and
     issues commands via bcmdiag.run().  The command output, upto the diag shell
-    prompt, is read from the socket and returned to the caller."""
+    prompt, is read from the socket and returned to the caller.  Several
+    commands can be issued in a single round-trip via bcmdiag.run_many()."""
 
-    version = "1.0"
+    version = "1.1"
+
+    # number of bytes requested from the socket per recv
+    recvsize = 65536
 
     #---------------
     #
@@ -55,8 +60,14 @@ class bcmshell (object):
         if type(prompt) is not str:
             raise SyntaxError("bcmshell constructor prompt expects an re string")
         else:
-            self.re_prompt = re.compile(prompt, re.MULTILINE)
-            self.re_connectprompt = re.compile("bcmshell\r\n\s*" + prompt, re.MULTILINE)
+            self.re_prompt = re.compile(prompt.encode(), re.MULTILINE)
+            self.re_prompt_head = re.compile(prompt.encode().lstrip(b'^'), re.MULTILINE)
+            # when commands are pipelined, the prompt following all but the
+            # last command is immediately followed by the next output
+            inline = re.sub(r'(\\s\*)?\$$', '', prompt) + r'[ \t]*'
+            self.re_inline_prompt = re.compile(inline.encode(), re.MULTILINE)
+            self.re_inline_prompt_head = re.compile(inline.encode().lstrip(b'^'), re.MULTILINE)
+            self.re_connectprompt = re.compile(b"bcmshell\r\n\\s*" + prompt.encode(), re.MULTILINE)
 
         if timeout <= 0:
             raise ValueError("bcmshell.timeout must be > 0")
@@ -85,7 +96,7 @@ class bcmshell (object):
             
         self.keepopen = keepopen
         self.socketobj = None
-        self.buffer = ''
+        self.buffer = bytearray()
 
         # text editing tools
         #
@@ -133,8 +144,8 @@ class bcmshell (object):
         s.append('logfileobj: ' + str(self.logfileobj))
         s.append('socketname: ' + str(self.socketname))
         s.append('socketobj: ' + str(self.socketobj))
-        s.append('prompt: \"' + str(self.re_prompt.pattern) + '\"')
-        s.append('buffer (last 100 chars): ' + str(self.buffer)[-100:])
+        s.append('prompt: \"' + self.re_prompt.pattern.decode() + '\"')
+        s.append('buffer (last 100 chars): ' + self.buffer[-100:].decode(errors='replace'))
         return '\n'.join(s)
 
     #---------------
@@ -257,7 +268,7 @@ class bcmshell (object):
                 d[I] = d[I][0]
 
         if len(d) == 1:
-            return d.values()[0]
+            return list(d.values())[0]
         else:
             return d
 
@@ -283,6 +294,25 @@ class bcmshell (object):
              {'HIGIG2': 0, 'PORT_TYPE': 0}]
         """
         
+        return list(self.iter_table(table, fields, start, entries))
+
+    #---------------
+    #
+    def iter_table(self, table, fields=False, start=None, entries=None, into=None):
+
+        """Generator flavour of gettable().  Table entries are parsed and
+        yielded as the dump arrives from the socket, so memory use does not
+        grow with the size of the table.
+
+        into - an array('Q') that raw entries are also appended to.  An entry
+        made of N 32-bit words takes (N + 1) / 2 consecutive 64-bit elements,
+        least significant word first.  Only valid when fields is False.
+
+        Example:
+        values = array('Q')
+        for entry in bcmshell.iter_table('egr_ing_port', into=values):
+            ..."""
+
         if type(table) is not str:
             raise TypeError("bcmshell.gettable(table) expects string not %s" %
                             type(table))
@@ -292,6 +322,11 @@ class bcmshell (object):
         elif table.find('\s') >= 0:
             raise ValueError("unexpected whitespace in bmcshell.gettable(%s)" %
                              table)
+        if into is not None:
+            if fields:
+                raise ValueError("bcmshell.iter_table(into) requires raw entries")
+            elif type(into) is not array or into.typecode != 'Q':
+                raise TypeError("bcmshell.iter_table(into) expects array('Q')")
 
         cmd = 'dump all'
         if not fields:
@@ -300,44 +335,34 @@ class bcmshell (object):
         if start != None or entries != None:
             cmd += " %d" % (start or 0)
             cmd += " %d" % (entries or 1)
-        
-        t = self.run(cmd)
-
-        if 'Unknown option or memory' in t:
-            raise RuntimeError('\"%s\" is not a table' % table)
-
-        if 'out of range' in t:
-            err = table
-            if start != None or entries != None:
-                err += " %d" % (start or 0)
-                err += " %d" % (entries or 1)
-            raise IndexError('\"%s\" table index is out of range' % err)
-
-        # get all of the return into a list
-        #
-        t = self.re_oneline.sub('', t)
-        t = self.re_table_header.sub('', t)
-        t = self.re_table_trailer.sub('', t)
-        t = t.split('\n')
-        if t[-1] == '':
-            t.pop()
-
-        # parse the contents
-        #
-        def __parse_table__(text, fields=False):
-            if fields:
-                t = text.split(',')
-                v = [self.__get_field__(T) for T in t]
-                return dict(v)
-            else:
-                t = text.split()
-                v = 0
-                for I in range(len(t)):
-                    v += (int(t[I], 16) << (32 * I))
-                return v
-        t = [__parse_table__(T, fields) for T in t]
 
-        return t
+        # entries may wrap onto indented continuation lines, so an entry is
+        # only complete once the next one starts or the output ends
+        output = self.__iter_output__(cmd)
+        pending = None
+        try:
+            for chunk in output:
+                for line in chunk.decode(errors='replace').split('\n'):
+                    if 'Unknown option or memory' in line:
+                        raise RuntimeError('\"%s\" is not a table' % table)
+
+                    if 'out of range' in line:
+                        err = table
+                        if start != None or entries != None:
+                            err += " %d" % (start or 0)
+                            err += " %d" % (entries or 1)
+                        raise IndexError('\"%s\" table index is out of range' % err)
+
+                    if pending is not None and (line == '' or line[0].isspace()):
+                        pending += line.lstrip()
+                        continue
+                    if pending:
+                        yield self.__parse_entry__(pending, fields, into)
+                    pending = line
+            if pending:
+                yield self.__parse_entry__(pending, fields, into)
+        finally:
+            output.close()
 
     #---------------
     #
@@ -397,38 +422,54 @@ class bcmshell (object):
         we detect the prompt.  cmd must be a string and must not include a
         newline, i.e. we expect a single command to be run per call."""
 
-        if type(cmd) is not str:
-            raise TypeError("expecting string argument to bmcdiag.run(cmd)")
-        elif cmd.find('\n') >= 0:
-            raise ValueError("unexpected newline in bmcdiag.run(cmd)")
+        return self.run_many([cmd])[0]
+
+    #---------------
+    #
+    def run_many(self, cmds):
+
+        """Issue a list of commands to the diag shell in a single write and
+        collect the return data of each command, delimited by the prompt that
+        follows it.  Each cmd must be a string and must not include a newline.
+        Returns a list with the output of every command, in order."""
+
+        for cmd in cmds:
+            if type(cmd) is not str:
+                raise TypeError("expecting string argument to bmcdiag.run(cmd)")
+            elif cmd.find('\n') >= 0:
+                raise ValueError("unexpected newline in bmcdiag.run(cmd)")
 
         self.__open__()
         try:
-            self.socketobj.sendall(cmd + '\n')
+            self.socketobj.sendall(''.join([cmd + '\n' for cmd in cmds]).encode())
         except socket.error as err:
             (errno, errstr) = err.args
-            raise IOError("unable to send command \"%s\", %s" % (cmd, errstr))
+            raise IOError("unable to send command \"%s\", %s" % ('; '.join(cmds), errstr))
 
-        self.buffer = ''
+        self.buffer = bytearray()
         self.socketobj.settimeout(self.timeout)
         quitting_time = time.time() + self.timeout
-        while True:
-            try:
-                self.buffer += self.socketobj.recv(4096)
-            except socket.timeout:
-                raise RuntimeError("recv stalled for %d seconds" % self.timeout)
-            found = self.re_prompt.search(self.buffer)
+        outputs = []
+        start = 0
+        scan = 0
+        while len(outputs) < len(cmds):
+            found = self.__find_prompt__(start, scan, len(outputs) == len(cmds) - 1)
             if found:
-                break
-            if time.time() > quitting_time:
-                raise RuntimeError("accepting input for %d seconds" % self.timeout)
+                outputs.append(self.buffer[start:found.start(0)].decode(errors='replace'))
+                start = scan = found.end(0)
+                continue
+
+            # the prompt starts a line, so only the trailing partial line
+            # needs to be scanned again once more data has arrived
+            scan = self.buffer.rfind(b'\n', scan) + 1 or scan
+            self.__recv__(self.buffer, quitting_time)
 
-        if found.end(0) != len(self.buffer):
+        if start != len(self.buffer):
             raise RuntimeError("prompt detected in the middle of input")
-        
+
         if not self.keepopen:
             self.close()
-        return self.buffer[:found.start(0)]
+        return outputs
 
     #---------------
     #
@@ -445,6 +486,113 @@ class bcmshell (object):
         m = self.re_get_field.search(text)
         return (m.group(1), int(m.group(2), 16))
         
+    #---------------
+    #
+    def __parse_entry__(self, text, fields=False, into=None):
+
+        """Parse a single table entry of a dump into an int or, if fields is
+        set, a dict of field/values"""
+
+        text = self.re_table_header.sub('', text)
+        text = self.re_table_trailer.sub('', text)
+        if fields:
+            t = text.split(',')
+            v = [self.__get_field__(T) for T in t]
+            return dict(v)
+        else:
+            t = [int(T, 16) for T in text.split()]
+            v = 0
+            for I in range(len(t)):
+                v += (t[I] << (32 * I))
+            if into is not None:
+                for I in range(0, len(t), 2):
+                    into.append(t[I] | (t[I + 1] << 32 if I + 1 < len(t) else 0))
+            return v
+
+    #---------------
+    #
+    def __iter_output__(self, cmd):
+
+        """Issue the command to the diag shell and yield its return data, as
+        chunks of complete lines, until we detect the prompt.  Only the
+        trailing partial line is kept buffered.  If the consumer stops early,
+        the socket is closed so that the unread output cannot leak into the
+        next command."""
+
+        if type(cmd) is not str:
+            raise TypeError("expecting string argument to bmcdiag.run(cmd)")
+        elif cmd.find('\n') >= 0:
+            raise ValueError("unexpected newline in bmcdiag.run(cmd)")
+
+        self.__open__()
+        try:
+            self.socketobj.sendall((cmd + '\n').encode())
+        except socket.error as err:
+            (errno, errstr) = err.args
+            raise IOError("unable to send command \"%s\", %s" % (cmd, errstr))
+
+        buf = bytearray()
+        self.socketobj.settimeout(self.timeout)
+        quitting_time = time.time() + self.timeout
+        completed = False
+        try:
+            while True:
+                found = self.re_prompt.search(buf)
+                if found:
+                    break
+                cut = buf.rfind(b'\n') + 1
+                if cut:
+                    chunk = bytes(buf[:cut])
+                    del buf[:cut]
+                    yield chunk
+                self.__recv__(buf, quitting_time)
+
+            if found.end(0) != len(buf):
+                raise RuntimeError("prompt detected in the middle of input")
+            if found.start(0):
+                yield bytes(buf[:found.start(0)])
+            completed = True
+        finally:
+            if not completed or not self.keepopen:
+                self.close()
+
+    #---------------
+    #
+    def __find_prompt__(self, start, scan, last):
+
+        """Search self.buffer, from offset scan, for the prompt delimiting the
+        output that starts at offset start.  A prompt without output follows
+        the previous one directly, so it is also looked for at start itself."""
+
+        if last:
+            head, anywhere = self.re_prompt_head, self.re_prompt
+        else:
+            head, anywhere = self.re_inline_prompt_head, self.re_inline_prompt
+
+        found = ((scan == start and head.match(self.buffer, start)) or
+                 anywhere.search(self.buffer, scan))
+        if found and not last and found.end(0) == len(self.buffer):
+            # the tail of the prompt may still be in flight
+            return None
+        return found
+
+    #---------------
+    #
+    def __recv__(self, buf, quitting_time):
+
+        """Append the next chunk of data available on the socket to the
+        bytearray buf"""
+
+        if time.time() > quitting_time:
+            raise RuntimeError("accepting input for %d seconds" % self.timeout)
+        try:
+            data = self.socketobj.recv(self.recvsize)
+        except socket.timeout:
+            raise RuntimeError("recv stalled for %d seconds" % self.timeout)
+        if not data:
+            raise IOError("connection to %s closed by peer" % self.socketname)
+        buf.extend(data)
+
     #---------------
     #
     def __open__(self):
@@ -475,27 +623,24 @@ class bcmshell (object):
 
             # flush out the socket in case it was left dirty
             try:
-                self.socketobj.sendall('echo bcmshell\n')
+                self.socketobj.sendall(b'echo bcmshell\n')
                 quitting_time = time.time() + self.timeout
-                buf = ''
+                buf = bytearray()
+                scan = 0
                 while True:
-                    try:
-                        buf += self.socketobj.recv(1024)
-                    except socket.timeout:
-                        raise IOError("unable to receive data from %s for %d seconds" %
-                                      (self.socketname, self.timeout))
-
-                    found = self.re_connectprompt.search(buf)
+                    found = self.re_connectprompt.search(buf, scan)
                     if found:
                         break
-                    if time.time() > quitting_time:
-                        raise IOError("unable to flush %s for %d seconds" %
-                                      (self.socketname, self.timeout))
+                    # the marker spans two lines, so rescan from the start of
+                    # the last complete line once more data has arrived
+                    scan = buf.rfind(b'\n', 0, max(buf.rfind(b'\n'), 0)) + 1
+                    try:
+                        self.__recv__(buf, quitting_time)
+                    except RuntimeError as e:
+                        raise IOError("unable to receive data from %s, %s" %
+                                      (self.socketname, str(e)))
 
-            except socket.error as err:
-                (errno, errstr) = err.args
-                raise IOError("Socket error: unable to flush %s on open: %s" % (self.socketname, errstr))
             except IOError as e:
-                raise IOError("unable to flush %s on open: %s" % (self.socketname, e.message))
+                raise IOError("unable to flush %s on open: %s" % (self.socketname, str(e)))
             except Exception:
                 raise IOError("unable to flush %s on open" % self.socketname)
@@ -0,0 +1,164 @@
+#
+# port_mapping_cache.py
+#
+# Port mappings compiled from the port configuration files, and their persistent cache
+#
+
+from __future__ import print_function
+
+try:
+    import hashlib
+    import json
+    import os
+    import tempfile
+    from collections import OrderedDict
+except ImportError as e:
+    raise ImportError("%s - required module not found" % str(e))
+
+PORT_MAPPING_CACHE_VERSION = 1
+
+
+class PortMappings(object):
+    """
+    Port mappings of one port configuration: the logical ports in configuration order,
+    and the logical to physical/bcm/asic and physical to logical indexes
+    """
+    def __init__(self):
+        self.logical = []
+        self.logical_to_physical = OrderedDict()
+        self.physical_to_logical = OrderedDict()
+        self.logical_to_bcm = OrderedDict()
+        self.logical_to_asic = OrderedDict()
+
+    def add(self, portname, fp_port_index, asic_inst, bcm_port=None):
+        self.logical.append(portname)
+        self.logical_to_asic[portname] = asic_inst
+        if bcm_port is not None:
+            self.logical_to_bcm[portname] = bcm_port
+        if fp_port_index is not None:
+            self.logical_to_physical[portname] = [fp_port_index]
+            self.physical_to_logical.setdefault(fp_port_index, []).append(portname)
+
+    def to_dict(self):
+        # Physical port indexes are kept as pairs, JSON object keys being strings only
+        return {
+            'logical': self.logical,
+            'logical_to_physical': list(self.logical_to_physical.items()),
+            'physical_to_logical': list(self.physical_to_logical.items()),
+            'logical_to_bcm': list(self.logical_to_bcm.items()),
+            'logical_to_asic': list(self.logical_to_asic.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        mappings = cls()
+        mappings.logical = list(data['logical'])
+        for name in ('logical_to_physical', 'physical_to_logical', 'logical_to_bcm', 'logical_to_asic'):
+            setattr(mappings, name, OrderedDict((key, value) for key, value in data[name]))
+        return mappings
+
+
+class PortMappingCache(object):
+    """
+    Directory of compiled port mappings, one file per configuration key. The mappings of a
+    key are valid while the files they were compiled from keep their modification time
+    and size. Mappings are also kept in memory, shared by the callers which must not change
+    them; with no directory, they are kept in memory only.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._mappings = {}
+
+    def _path(self, key):
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.directory, 'port_mappings_%s.json' % digest)
+
+    @staticmethod
+    def get_source_stamps(sources):
+        stamps = []
+        for path in sources:
+            try:
+                st = os.stat(path)
+                stamps.append([path, st.st_mtime_ns, st.st_size])
+            except OSError:
+                stamps.append([path, None, None])
+        return stamps
+
+    def load(self, key, stamps):
+        """
+        Returns the PortMappings cached for key and the given source stamps, None if none
+        """
+        try:
+            with open(self._path(key)) as f:
+                data = json.load(f)
+            if data.get('version') != PORT_MAPPING_CACHE_VERSION or data.get('key') != key or \
+                    data.get('sources') != stamps:
+                return None
+            return PortMappings.from_dict(data['mappings'])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, key, stamps, mappings):
+        data = {
+            'version': PORT_MAPPING_CACHE_VERSION,
+            'key': key,
+            'sources': stamps,
+            'mappings': mappings.to_dict(),
+        }
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.rename(tmp_path, self._path(key))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except (IOError, OSError):
+            return False
+        return True
+
+    def get(self, key, sources, compile_mappings):
+        """
+        Returns the mappings cached for key, compiled by compile_mappings() and cached if
+        missing or older than one of the source files. compile_mappings() returning None
+        (no ports) is not cached.
+        """
+        # Stamps are taken first, a source changing while compiled is compiled again next time
+        stamps = self.get_source_stamps(sources)
+        memory_key = json.dumps(key)
+        entry = self._mappings.get(memory_key)
+        if entry is not None and entry[0] == stamps:
+            return entry[1]
+        mappings = None
+        if self.directory is not None:
+            mappings = self.load(key, stamps)
+        if mappings is None:
+            mappings = compile_mappings()
+            if mappings is None:
+                return None
+            if self.directory is not None:
+                self.save(key, stamps, mappings)
+        self._mappings[memory_key] = (stamps, mappings)
+        return mappings
+
+
+class LogicalPortIndex(object):
+    """
+    Set of the logical ports of a list. A list replaced by another one is indexed again on
+    lookup, the code changing a list in place calls update() itself.
+    """
+    def __init__(self):
+        self._logical = None
+        self._ports = frozenset()
+
+    def update(self, logical):
+        self._logical = logical
+        self._ports = frozenset(logical)
+
+    def get(self, logical):
+        if logical is not self._logical:
+            self.update(logical)
+        return self._ports
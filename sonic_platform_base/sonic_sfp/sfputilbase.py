@@ -10,6 +10,7 @@ try:
     import os
     import re
     import sys
+    import threading
     from collections import OrderedDict
 
     from natsort import natsorted
@@ -23,6 +24,7 @@ try:
     from .sff8436 import sff8436InterfaceId  # Dot module supports both Python 2 and Python 3 using explicit relative import methods
     from .sff8436 import sff8436Dom    # Dot module supports both Python 2 and Python 3 using explicit relative import methods
     from .inf8628 import inf8628InterfaceId    # Dot module supports both Python 2 and Python 3 using explicit relative import methods
+    from .port_mapping_cache import LogicalPortIndex, PortMappingCache, PortMappings
 except ImportError as e:
     raise ImportError("%s - required module not found" % str(e))
 
@@ -153,6 +155,10 @@ class SfpUtilBase(object):
     DOM_EEPROM_ADDR = 0x51
     SFP_DEVICE_TYPE = "24c02"
 
+    # Directory where the mappings parsed from port_config.ini/portmap.ini files are
+    # cached, None to parse the files each time
+    PORT_MAPPING_CACHE_DIR = None
+
     # List to specify filter for sfp_ports
     # Needed by platforms like dni-6448 which
     # have only a subset of ports that support sfp
@@ -292,7 +298,84 @@ class SfpUtilBase(object):
             else:
                 return True
 
+    def _get_eeprom_cache(self, name):
+        cache = getattr(self, name, None)
+        if cache is None:
+            cache = {}
+            setattr(self, name, cache)
+        return cache
+
+    def _get_eeprom_cache_lock(self):
+        # Created lazily like the caches, __init__() being commonly overridden
+        lock = getattr(self, '_eeprom_cache_lock', None)
+        if lock is None:
+            lock = self.__dict__.setdefault('_eeprom_cache_lock', threading.RLock())
+        return lock
+
     def _get_port_eeprom_path(self, port_num, devid):
+        """Returns the path of the EEPROM sysfs file of the port, resolved (and the
+        i2c device instantiated) on first use only"""
+        with self._get_eeprom_cache_lock():
+            paths = self._get_eeprom_cache('_eeprom_path_cache')
+            path = paths.get((port_num, devid))
+            if path is None:
+                path = self._resolve_port_eeprom_path(port_num, devid)
+                if path is not None:
+                    paths[(port_num, devid)] = path
+            return path
+
+    def _get_port_eeprom_file(self, port_num, devid):
+        """Returns the EEPROM sysfs file of the port opened for reading. The file is
+        kept open until invalidate_eeprom_cache() or a read error, e.g. the module
+        being removed. None if it cannot be opened."""
+        with self._get_eeprom_cache_lock():
+            files = self._get_eeprom_cache('_eeprom_file_cache')
+            sysfsfile_eeprom = files.get((port_num, devid))
+            if sysfsfile_eeprom is None:
+                path = self._get_port_eeprom_path(port_num, devid)
+                if path is None:
+                    return None
+                try:
+                    sysfsfile_eeprom = open(path, mode="rb", buffering=0)
+                except IOError:
+                    self._get_eeprom_cache('_eeprom_path_cache').pop((port_num, devid), None)
+                    return None
+                files[(port_num, devid)] = sysfsfile_eeprom
+            return sysfsfile_eeprom
+
+    def invalidate_eeprom_cache(self, port_num=None):
+        """Closes the EEPROM files kept open and forgets the EEPROM paths resolved,
+        for port_num or for all ports if None. To be called on presence changes."""
+        with self._get_eeprom_cache_lock():
+            files = self._get_eeprom_cache('_eeprom_file_cache')
+            paths = self._get_eeprom_cache('_eeprom_path_cache')
+            for key in [key for key in files if port_num is None or key[0] == port_num]:
+                try:
+                    files.pop(key).close()
+                except Exception:
+                    pass
+            for key in [key for key in paths if port_num is None or key[0] == port_num]:
+                del paths[key]
+
+    def _drop_eeprom_file(self, sysfsfile_eeprom):
+        with self._get_eeprom_cache_lock():
+            for (port_num, devid), cached in self._get_eeprom_cache('_eeprom_file_cache').items():
+                if cached is sysfsfile_eeprom:
+                    self.invalidate_eeprom_cache(port_num)
+                    return
+
+    # Returns the bytes read, None on error. Reads fail if no SFP is present, with
+    # 'Connection timed out' from most drivers, and the port EEPROM is then reopened
+    # on the next access. The file is shared by the threads (and forked children) of
+    # the process, so it is read with pread() which leaves the file offset alone.
+    def _read_eeprom_file(self, sysfsfile_eeprom, offset, num_bytes):
+        try:
+            return os.pread(sysfsfile_eeprom.fileno(), num_bytes, offset)
+        except (IOError, OSError, ValueError):
+            self._drop_eeprom_file(sysfsfile_eeprom)
+            return None
+
+    def _resolve_port_eeprom_path(self, port_num, devid):
         sysfs_i2c_adapter_base_path = "/sys/class/i2c-adapter"
 
         if port_num in self.port_to_eeprom_mapping.keys():
@@ -330,19 +413,11 @@ class SfpUtilBase(object):
 
         return sysfs_sfp_i2c_client_eeprom_path
 
-    # Read out any bytes from any offset
-    def _read_eeprom_specific_bytes(self, sysfsfile_eeprom, offset, num_bytes):
+    def _format_eeprom_raw(self, raw, num_bytes):
         eeprom_raw = []
         for i in range(0, num_bytes):
             eeprom_raw.append("0x00")
 
-        try:
-            sysfsfile_eeprom.seek(offset)
-            raw = sysfsfile_eeprom.read(num_bytes)
-        except IOError:
-            print("Error: reading EEPROM sysfs file")
-            return None
-
         try:
             # raw is changed to bytearray to support both python 2 and 3.
             raw = bytearray(raw)
@@ -353,27 +428,27 @@ class SfpUtilBase(object):
 
         return eeprom_raw
 
-    # Read eeprom
-    def _read_eeprom_devid(self, port_num, devid, offset, num_bytes = 256):
-        sysfs_sfp_i2c_client_eeprom_path = self._get_port_eeprom_path(port_num, devid)
-
-        if not self._sfp_eeprom_present(sysfs_sfp_i2c_client_eeprom_path, offset):
+    # Read out any bytes from any offset
+    def _read_eeprom_specific_bytes(self, sysfsfile_eeprom, offset, num_bytes):
+        raw = self._read_eeprom_file(sysfsfile_eeprom, offset, num_bytes)
+        if raw is None:
+            print("Error: reading EEPROM sysfs file")
             return None
 
-        try:
-            sysfsfile_eeprom = open(sysfs_sfp_i2c_client_eeprom_path, mode="rb", buffering=0)
-        except IOError:
-            print("Error: reading sysfs file %s" % sysfs_sfp_i2c_client_eeprom_path)
-            return None
+        return self._format_eeprom_raw(raw, num_bytes)
 
-        eeprom_raw = self._read_eeprom_specific_bytes(sysfsfile_eeprom, offset, num_bytes)
+    # Read eeprom
+    def _read_eeprom_devid(self, port_num, devid, offset, num_bytes = 256):
+        sysfsfile_eeprom = self._get_port_eeprom_file(port_num, devid)
+        if sysfsfile_eeprom is None:
+            return None
 
-        try:
-            sysfsfile_eeprom.close()
-        except Exception:
+        # A failed read means that no SFP is present
+        raw = self._read_eeprom_file(sysfsfile_eeprom, offset, num_bytes)
+        if raw is None:
             return None
 
-        return eeprom_raw
+        return self._format_eeprom_raw(raw, num_bytes)
 
     def _write_eeprom_specific_bytes(self, sysfsfile_eeprom, offset, num_bytes, write_buffer):
         try:
@@ -387,8 +462,7 @@ class SfpUtilBase(object):
 
     def _write_eeprom_devid(self, port_num, devid, offset, num_bytes, write_buffer):
         sysfs_sfp_i2c_client_eeprom_path = self._get_port_eeprom_path(port_num, devid)
-
-        if not self._sfp_eeprom_present(sysfs_sfp_i2c_client_eeprom_path, offset):
+        if sysfs_sfp_i2c_client_eeprom_path is None:
             return False
 
         try:
@@ -404,7 +478,7 @@ class SfpUtilBase(object):
         except Exception:
             return False
 
-        return True
+        return result
 
     def _is_valid_port(self, port_num):
         if port_num >= self.port_start and port_num <= self.port_end:
@@ -417,14 +491,9 @@ class SfpUtilBase(object):
         logical_to_bcm = {}
         logical_to_physical = {}
         physical_to_logical = {}
-        last_fp_port_index = 0
-        last_portname = ""
-        first = 1
         port_pos_in_file = 0
-        parse_fmt_port_config_ini = False
         parse_fmt_platform_json = False
 
-        parse_fmt_port_config_ini = (os.path.basename(porttabfile) == PORT_CONFIG_INI)
         parse_fmt_platform_json = (os.path.basename(porttabfile) == PLATFORM_JSON)
 
         (platform, hwsku) = device_info.get_platform_and_hwsku()
@@ -459,6 +528,7 @@ class SfpUtilBase(object):
                     port_pos_in_file +=1
 
                 self.logical = logical
+                self._get_logical_index().update(self.logical)
                 self.logical_to_bcm = logical_to_bcm
                 self.logical_to_physical = logical_to_physical
                 self.physical_to_logical = physical_to_logical
@@ -471,6 +541,34 @@ class SfpUtilBase(object):
                 """
                 return None
 
+        # port_config.ini and portmap.ini only depend on the file, their parse is cached
+        if self.PORT_MAPPING_CACHE_DIR is not None:
+            key = ['porttab', os.path.abspath(porttabfile), asic_inst, list(self.sfp_ports),
+                   [backplane_prefix(), inband_prefix(), recirc_prefix()]]
+            mappings = PortMappingCache(self.PORT_MAPPING_CACHE_DIR).get(
+                key, [porttabfile], lambda: self._parse_porttab_file(porttabfile, asic_inst))
+        else:
+            mappings = self._parse_porttab_file(porttabfile, asic_inst)
+
+        self.logical.extend(mappings.logical)
+        self._get_logical_index().update(self.logical)
+        self.logical_to_asic.update(mappings.logical_to_asic)
+        self.logical_to_bcm.update(mappings.logical_to_bcm)
+        self.logical_to_physical.update(mappings.logical_to_physical)
+        self.physical_to_logical.update(mappings.physical_to_logical)
+
+        """
+        print("logical: " + self.logical)
+        print("logical to bcm: " + self.logical_to_bcm)
+        print("logical to physical: " + self.logical_to_physical)
+        print("physical to logical: " + self.physical_to_logical)
+        """
+
+    def _parse_porttab_file(self, porttabfile, asic_inst):
+        """Returns the PortMappings of a port_config.ini or portmap.ini file"""
+        mappings = PortMappings()
+        port_pos_in_file = 0
+        parse_fmt_port_config_ini = (os.path.basename(porttabfile) == PORT_CONFIG_INI)
 
         try:
             f = open(porttabfile)
@@ -521,41 +619,14 @@ class SfpUtilBase(object):
             if ((len(self.sfp_ports) > 0) and (fp_port_index not in self.sfp_ports)):
                 continue
 
-            if first == 1:
-                # Initialize last_[physical|logical]_port
-                # to the first valid port
-                last_fp_port_index = fp_port_index
-                last_portname = portname
-                first = 0
-
-            logical.append(portname)
-
-            # Mapping of logical port names available on a system to ASIC instance
-            self.logical_to_asic[portname] = asic_inst
-
-            logical_to_bcm[portname] = "xe" + bcm_port
-            logical_to_physical[portname] = [fp_port_index]
-            if physical_to_logical.get(fp_port_index) is None:
-                physical_to_logical[fp_port_index] = [portname]
-            else:
-                physical_to_logical[fp_port_index].append(portname)
-
-            last_fp_port_index = fp_port_index
-            last_portname = portname
+            # Mapping of logical port names available on a system to ASIC instance,
+            # bcm and physical ports
+            mappings.add(portname, fp_port_index, asic_inst, "xe" + bcm_port)
 
             port_pos_in_file += 1
 
-        self.logical.extend(logical)
-        self.logical_to_bcm.update(logical_to_bcm)
-        self.logical_to_physical.update(logical_to_physical)
-        self.physical_to_logical.update(physical_to_logical)
-
-        """
-        print("logical: " + self.logical)
-        print("logical to bcm: " + self.logical_to_bcm)
-        print("logical to physical: " + self.logical_to_physical)
-        print("physical to logical: " + self.physical_to_logical)
-        """
+        f.close()
+        return mappings
 
     def read_all_porttab_mappings(self, platform_dir, num_asic_inst):
         # In multi asic scenario, get all the port_config files for different asics
@@ -647,6 +718,7 @@ class SfpUtilBase(object):
             physical_to_phyaddrs[new_physical_port].append(phy_addr)
 
         self.logical = logical
+        self._get_logical_index().update(self.logical)
         self.phytab_mappings = phytab_mappings
         self.physical_to_logical = physical_to_logical
         self.physical_to_phyaddrs = physical_to_phyaddrs
@@ -672,8 +744,15 @@ class SfpUtilBase(object):
 
         return self.logical_to_physical[logical_port]
 
+    def _get_logical_index(self):
+        # The index may be missing if __init__() was overridden
+        logical_index = getattr(self, '_logical_index', None)
+        if logical_index is None:
+            logical_index = self._logical_index = LogicalPortIndex()
+        return logical_index
+
     def is_logical_port(self, port):
-        if port in self.logical:
+        if port in self._get_logical_index().get(self.logical):
             return 1
         else:
             return 0
@@ -832,15 +911,8 @@ class SfpUtilBase(object):
                 print("Error: sfp_object open failed")
                 return None
 
-            file_path = self._get_port_eeprom_path(port_num, self.IDENTITY_EEPROM_ADDR)
-            if not self._sfp_eeprom_present(file_path, 0):
-                print("Error, file not exist %s" % file_path)
-                return None
-
-            try:
-                sysfsfile_eeprom = open(file_path, mode="rb", buffering=0)
-            except IOError:
-                print("Error: reading sysfs file %s" % file_path)
+            sysfsfile_eeprom = self._get_port_eeprom_file(port_num, self.IDENTITY_EEPROM_ADDR)
+            if sysfsfile_eeprom is None:
                 return None
 
             sfp_type_raw = self._read_eeprom_specific_bytes(sysfsfile_eeprom, (offset + OSFP_TYPE_OFFSET), XCVR_TYPE_WIDTH)
@@ -879,12 +951,6 @@ class SfpUtilBase(object):
             else:
                 return None
 
-            try:
-                sysfsfile_eeprom.close()
-            except IOError:
-                print("Error: closing sysfs file %s" % file_path)
-                return None
-
             transceiver_info_dict['type'] = sfp_type_data['data']['type']['value']
             transceiver_info_dict['type_abbrv_name'] = sfp_type_abbrv_name['data']['type_abbrv_name']['value']
             transceiver_info_dict['manufacturer'] = sfp_vendor_name_data['data']['Vendor Name']['value']
@@ -906,15 +972,8 @@ class SfpUtilBase(object):
             transceiver_info_dict['dom_capability'] = '{}'
 
         else:
-            file_path = self._get_port_eeprom_path(port_num, self.IDENTITY_EEPROM_ADDR)
-            if not self._sfp_eeprom_present(file_path, 0):
-                print("Error, file not exist %s" % file_path)
-                return None
-
-            try:
-                sysfsfile_eeprom = open(file_path, mode="rb", buffering=0)
-            except IOError:
-                print("Error: reading sysfs file %s" % file_path)
+            sysfsfile_eeprom = self._get_port_eeprom_file(port_num, self.IDENTITY_EEPROM_ADDR)
+            if sysfsfile_eeprom is None:
                 return None
 
             if port_num in self.qsfp_ports:
@@ -996,12 +1055,6 @@ class SfpUtilBase(object):
             else:
                 return None
 
-            try:
-                sysfsfile_eeprom.close()
-            except IOError:
-                print("Error: closing sysfs file %s" % file_path)
-                return None
-
             transceiver_info_dict['type'] = sfp_interface_bulk_data['data']['type']['value']
             transceiver_info_dict['type_abbrv_name'] = sfp_interface_bulk_data['data']['type_abbrv_name']['value']
             transceiver_info_dict['manufacturer'] = sfp_vendor_name_data['data']['Vendor Name']['value']
@@ -1086,14 +1139,8 @@ class SfpUtilBase(object):
         elif port_num in self.qsfp_ports:
             offset = 0
             offset_xcvr = 128
-            file_path = self._get_port_eeprom_path(port_num, self.IDENTITY_EEPROM_ADDR)
-            if not self._sfp_eeprom_present(file_path, 0):
-                return None
-
-            try:
-                sysfsfile_eeprom = open(file_path, mode="rb", buffering=0)
-            except IOError:
-                print("Error: reading sysfs file %s" % file_path)
+            sysfsfile_eeprom = self._get_port_eeprom_file(port_num, self.IDENTITY_EEPROM_ADDR)
+            if sysfsfile_eeprom is None:
                 return None
 
             sfpd_obj = sff8436Dom()
@@ -1163,12 +1210,6 @@ class SfpUtilBase(object):
                 transceiver_dom_info_dict['tx3power'] = dom_channel_monitor_data['data']['TX3Power']['value']
                 transceiver_dom_info_dict['tx4power'] = dom_channel_monitor_data['data']['TX4Power']['value']
 
-            try:
-                sysfsfile_eeprom.close()
-            except IOError:
-                print("Error: closing sysfs file %s" % file_path)
-                return None
-
             transceiver_dom_info_dict['temperature'] = dom_temperature_data['data']['Temperature']['value']
             transceiver_dom_info_dict['voltage'] = dom_voltage_data['data']['Vcc']['value']
             transceiver_dom_info_dict['rx1power'] = dom_channel_monitor_data['data']['RX1Power']['value']
@@ -1182,14 +1223,8 @@ class SfpUtilBase(object):
 
         else:
             offset = 256
-            file_path = self._get_port_eeprom_path(port_num, self.DOM_EEPROM_ADDR)
-            if not self._sfp_eeprom_present(file_path, 0):
-                return None
-
-            try:
-                sysfsfile_eeprom = open(file_path, mode="rb", buffering=0)
-            except IOError:
-                print("Error: reading sysfs file %s" % file_path)
+            sysfsfile_eeprom = self._get_port_eeprom_file(port_num, self.DOM_EEPROM_ADDR)
+            if sysfsfile_eeprom is None:
                 return None
 
             sfpd_obj = sff8472Dom()
@@ -1213,12 +1248,6 @@ class SfpUtilBase(object):
             else:
                 return None
 
-            try:
-                sysfsfile_eeprom.close()
-            except IOError:
-                print("Error: closing sysfs file %s" % file_path)
-                return None
-
             transceiver_dom_info_dict['temperature'] = dom_temperature_data['data']['Temperature']['value']
             transceiver_dom_info_dict['voltage'] = dom_voltage_data['data']['Vcc']['value']
             transceiver_dom_info_dict['rx1power'] = dom_channel_monitor_data['data']['RXPower']['value']
@@ -1256,14 +1285,8 @@ class SfpUtilBase(object):
             return transceiver_dom_threshold_info_dict
 
         elif port_num in self.qsfp_ports:
-            file_path = self._get_port_eeprom_path(port_num, self.IDENTITY_EEPROM_ADDR)
-            if not self._sfp_eeprom_present(file_path, 0):
-                return None
-
-            try:
-                sysfsfile_eeprom = open(file_path, mode="rb", buffering=0)
-            except IOError:
-                print("Error: reading sysfs file %s" % file_path)
+            sysfsfile_eeprom = self._get_port_eeprom_file(port_num, self.IDENTITY_EEPROM_ADDR)
+            if sysfsfile_eeprom is None:
                 return None
 
             sfpd_obj = sff8436Dom()
@@ -1291,12 +1314,6 @@ class SfpUtilBase(object):
             else:
                 return None
 
-            try:
-                sysfsfile_eeprom.close()
-            except IOError:
-                print("Error: closing sysfs file %s" % file_path)
-                return None
-
             # Threshold Data
             transceiver_dom_threshold_info_dict['temphighalarm'] = dom_module_threshold_data['data']['TempHighAlarm']['value']
             transceiver_dom_threshold_info_dict['temphighwarning'] = dom_module_threshold_data['data']['TempHighWarning']['value']
@@ -1317,14 +1334,8 @@ class SfpUtilBase(object):
 
         else:
             offset = 256
-            file_path = self._get_port_eeprom_path(port_num, self.DOM_EEPROM_ADDR)
-            if not self._sfp_eeprom_present(file_path, 0):
-                return None
-
-            try:
-                sysfsfile_eeprom = open(file_path, mode="rb", buffering=0)
-            except IOError:
-                print("Error: reading sysfs file %s" % file_path)
+            sysfsfile_eeprom = self._get_port_eeprom_file(port_num, self.DOM_EEPROM_ADDR)
+            if sysfsfile_eeprom is None:
                 return None
 
             sfpd_obj = sff8472Dom()
@@ -1347,12 +1358,6 @@ class SfpUtilBase(object):
             else:
                 return None
 
-            try:
-                sysfsfile_eeprom.close()
-            except IOError:
-                print("Error: closing sysfs file %s" % file_path)
-                return None
-
             # Threshold Data
             transceiver_dom_threshold_info_dict['temphighalarm'] = dom_module_threshold_data['data']['TempHighAlarm']['value']
             transceiver_dom_threshold_info_dict['templowalarm'] = dom_module_threshold_data['data']['TempLowAlarm']['value']
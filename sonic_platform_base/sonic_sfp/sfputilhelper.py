@@ -11,9 +11,11 @@ try:
     import sys
     from collections import OrderedDict
 
+    import portconfig
     from natsort import natsorted
     from portconfig import get_port_config
     from sonic_py_common import device_info, multi_asic
+    from .port_mapping_cache import LogicalPortIndex, PortMappingCache, PortMappings
 
 except ImportError as e:
     raise ImportError("%s - required module not found" % str(e))
@@ -42,54 +44,102 @@ class SfpUtilHelper(object):
     physical_to_logical = {}
     physical_to_phyaddrs = {}
 
-    def __init__(self):
-        pass
+    # Directory where the port mappings compiled from the port configuration files are also
+    # kept across processes, None to keep them for the process lifetime only
+    PORT_MAPPING_CACHE_DIR = None
 
-    def read_porttab_mappings(self, porttabfile, asic_inst=0):
-        logical = []
-        logical_to_physical = {}
-        physical_to_logical = {}
-        fp_port_index = 1
+    # PortMappingCache shared by all the instances
+    _port_mapping_cache = None
 
-        (platform, hwsku) = device_info.get_platform_and_hwsku()
-
-        asic_name = None
-        if multi_asic.is_multi_asic():
-            asic_name = ASIC_NAME_PREFIX + str(asic_inst)
+    def __init__(self):
+        pass
 
-        ports, _, _ = get_port_config(hwsku, platform, asic_name=asic_name)
+    def _get_port_mapping_cache(self):
+        cache = SfpUtilHelper._port_mapping_cache
+        if cache is None or cache.directory != self.PORT_MAPPING_CACHE_DIR:
+            cache = SfpUtilHelper._port_mapping_cache = PortMappingCache(self.PORT_MAPPING_CACHE_DIR)
+        return cache
 
-        if not ports:
-            ports, _, _ = get_port_config(hwsku, platform, porttabfile)
-            if not ports:
-                print('Failed to get port config', file=sys.stderr)
-                sys.exit(1)
+    def _compile_port_mappings(self, ports, asic_inst):
+        mappings = PortMappings()
+        fp_port_index = 1
 
+        logical = []
         for intf in ports.keys():
             # Ignore if this is a non front panel interface
             if multi_asic.is_front_panel_port(intf, ports[intf].get(multi_asic.PORT_ROLE, None)):
                 logical.append(intf)
 
-        logical = natsorted(logical, key=lambda y: y.lower())
-        logical_to_physical, physical_to_logical = OrderedDict(),  OrderedDict()
-
-        for intf_name in logical:
+        for intf_name in natsorted(logical, key=lambda y: y.lower()):
+            mappings.logical.append(intf_name)
             if 'index' in ports[intf_name].keys():
                 fp_port_index = int(ports[intf_name]['index'])
-                logical_to_physical[intf_name] = [fp_port_index]
-
-            if physical_to_logical.get(fp_port_index) is None:
-                physical_to_logical[fp_port_index] = [intf_name]
-            else:
-                physical_to_logical[fp_port_index].append(intf_name)
+                mappings.logical_to_physical[intf_name] = [fp_port_index]
+            mappings.physical_to_logical.setdefault(fp_port_index, []).append(intf_name)
 
             # Mapping of logical port names available on a system to ASIC instance
-            self.logical_to_asic[intf_name] = asic_inst
+            mappings.logical_to_asic[intf_name] = asic_inst
+
+        return mappings
+
+    def _read_config_db_ports(self, asic_name):
+        config_db = portconfig.db_connect_configdb(asic_name)
+        if config_db is None:
+            return None
+        return config_db.get_table('PORT')
+
+    def _read_file_port_mappings(self, hwsku, platform, port_config_file, asic_inst):
+        """
+        Returns the port mappings of a port_config.ini or platform.json file, parsed again
+        only once the file changed. None if the file has no ports.
+        """
+        sources = [port_config_file]
+        if port_config_file.endswith('.json'):
+            # The ports of platform.json are read along with hwsku.json
+            hwsku_file = portconfig.get_hwsku_file_name(hwsku, platform)
+            if hwsku_file:
+                sources.append(hwsku_file)
+
+        def compile_mappings():
+            ports, _, _ = get_port_config(hwsku, platform, port_config_file)
+            if not ports:
+                return None
+            return self._compile_port_mappings(ports, asic_inst)
+
+        key = ['helper_porttab', os.path.abspath(port_config_file), hwsku, platform, asic_inst]
+        return self._get_port_mapping_cache().get(key, sources, compile_mappings)
 
-        self.logical.extend(logical)
+    def read_porttab_mappings(self, porttabfile, asic_inst=0):
+        (platform, hwsku) = device_info.get_platform_and_hwsku()
+
+        asic_name = None
+        asic_id = None
+        if multi_asic.is_multi_asic():
+            asic_name = ASIC_NAME_PREFIX + str(asic_inst)
+            asic_id = str(asic_inst)
+
+        # CONFIG_DB comes first as in get_port_config(), its ports are compiled on each call.
+        # Then the platform port configuration file and porttabfile, whose mappings are cached.
+        ports = self._read_config_db_ports(asic_name)
+        if ports:
+            mappings = self._compile_port_mappings(ports, asic_inst)
+        else:
+            mappings = None
+            for port_config_file in (portconfig.get_port_config_file_name(hwsku, platform, asic_id), porttabfile):
+                if port_config_file:
+                    mappings = self._read_file_port_mappings(hwsku, platform, port_config_file, asic_inst)
+                    if mappings is not None:
+                        break
+            if mappings is None:
+                print('Failed to get port config', file=sys.stderr)
+                sys.exit(1)
+
+        self.logical_to_asic.update(mappings.logical_to_asic)
+        self.logical.extend(mappings.logical)
         self.logical = list(OrderedDict.fromkeys(self.logical).keys())
-        self.logical_to_physical.update(logical_to_physical)
-        self.physical_to_logical.update(physical_to_logical)
+        self._get_logical_index().update(self.logical)
+        self.logical_to_physical.update(mappings.logical_to_physical)
+        self.physical_to_logical.update(mappings.physical_to_logical)
 
         return None
 
@@ -116,8 +166,15 @@ class SfpUtilHelper(object):
 
         return self.logical_to_physical[logical_port]
 
+    def _get_logical_index(self):
+        # The index may be missing if __init__() was overridden
+        logical_index = getattr(self, '_logical_index', None)
+        if logical_index is None:
+            logical_index = self._logical_index = LogicalPortIndex()
+        return logical_index
+
     def is_logical_port(self, port):
-        if port in self.logical:
+        if port in self._get_logical_index().get(self.logical):
             return 1
         else:
             return 0
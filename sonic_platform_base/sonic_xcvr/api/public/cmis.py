@@ -20,6 +20,8 @@ import time
 import copy
 from collections import defaultdict
 from ...utils.cache import read_only_cached_api_return
+from ...latched_flags import install_flag_collector
+from ...staged_control import install_staged_control, staged_control_transaction
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -55,6 +57,10 @@ FLAG_TYPE_STR_MAP = {
     VdmSubtypeIndex.VDM_SUBTYPE_LWARN_FLAG: "lwarn"
 }
 
+VDM_REAL_VALUE_SUBTYPES = (VdmSubtypeIndex.VDM_SUBTYPE_REAL_VALUE,)
+VDM_THRESHOLD_SUBTYPES = tuple(THRESHOLD_TYPE_STR_MAP)
+VDM_FLAG_SUBTYPES = tuple(FLAG_TYPE_STR_MAP)
+
 CMIS_VDM_KEY_TO_DB_PREFIX_KEY_MAP = {
     "Laser Temperature [C]" : "laser_temperature_media",
     "eSNR Media Input [dB]" : "esnr_media_input",
@@ -79,6 +85,44 @@ CMIS_VDM_KEY_TO_DB_PREFIX_KEY_MAP = {
     "Errored Frames Current Value Host Input" : "errored_frames_curr_host_input"
 }
 
+def _lane_flag_names(prefix):
+    return ["%s%d" % (prefix, lane) for lane in range(1, 9)]
+
+# Latched flag registers, (offset, size) in linear addressing: module flags (lower page bytes
+# 8-11), lane flags (page 11h bytes 135-152) and VDM flags (page 2Ch)
+CMIS_MODULE_FLAG_REGION = (8, 4)
+CMIS_LANE_FLAG_REGION = (0x11 * 128 + 135, 18)
+CMIS_VDM_FLAG_REGION = (0x2c * 128 + 128, 128)
+# Interrupt deasserted bit of lower page byte 3, set while no unmasked flag is latched
+CMIS_FLAG_SUMMARY = (3, 0x01)
+
+# Staged Control Set 0 registers written in one transaction (page 10h bytes 145-173: application
+# selection and signal integrity controls), Apply registers (bytes 143-144) excluded
+CMIS_STAGED_CTRL0_REGION = (0x10 * 128 + 145, 29)
+
+# Names of the bits of the latched module and lane flag bytes, by address
+CMIS_LATCHED_FLAG_NAMES = {
+    8: ['module_state_changed', 'module_firmware_fault', 'datapath_firmware_fault'],
+    9: ['case_temp_high_alarm_flag', 'case_temp_low_alarm_flag',
+        'case_temp_high_warn_flag', 'case_temp_low_warn_flag',
+        'voltage_high_alarm_flag', 'voltage_low_alarm_flag',
+        'voltage_high_warn_flag', 'voltage_low_warn_flag'],
+    10: ['aux1_high_alarm_flag', 'aux1_low_alarm_flag', 'aux1_high_warn_flag', 'aux1_low_warn_flag',
+         'aux2_high_alarm_flag', 'aux2_low_alarm_flag', 'aux2_high_warn_flag', 'aux2_low_warn_flag'],
+    11: ['aux3_high_alarm_flag', 'aux3_low_alarm_flag', 'aux3_high_warn_flag', 'aux3_low_warn_flag',
+         'custom_mon_high_alarm_flag', 'custom_mon_low_alarm_flag',
+         'custom_mon_high_warn_flag', 'custom_mon_low_warn_flag'],
+}
+CMIS_LATCHED_FLAG_NAMES.update({0x11 * 128 + offset: _lane_flag_names(prefix) for offset, prefix in enumerate([
+    consts.TX_FAULT_FIELD, consts.TX_LOS_FIELD, consts.TX_CDR_LOL, consts.TX_ADAPTIVE_INPUT_EQ_FAIL_FLAG,
+    consts.TX_POWER_HIGH_ALARM_FLAG, consts.TX_POWER_LOW_ALARM_FLAG,
+    consts.TX_POWER_HIGH_WARN_FLAG, consts.TX_POWER_LOW_WARN_FLAG,
+    consts.TX_BIAS_HIGH_ALARM_FLAG, consts.TX_BIAS_LOW_ALARM_FLAG,
+    consts.TX_BIAS_HIGH_WARN_FLAG, consts.TX_BIAS_LOW_WARN_FLAG,
+    consts.RX_LOS_FIELD, consts.RX_CDR_LOL,
+    consts.RX_POWER_HIGH_ALARM_FLAG, consts.RX_POWER_LOW_ALARM_FLAG,
+    consts.RX_POWER_HIGH_WARN_FLAG, consts.RX_POWER_LOW_WARN_FLAG], 135)})
+
 CMIS_XCVR_INFO_DEFAULT_DICT = {
         "type": "N/A",
         "type_abbrv_name": "N/A",
@@ -135,46 +179,111 @@ class CmisApi(XcvrApi):
         """
         cls.cache_enabled = bool(enabled)
 
-    def __init__(self, xcvr_eeprom, cdb_fw_hdlr=None):
+    def __init__(self, xcvr_eeprom, cdb_fw_hdlr=None, flag_summary=False):
         super(CmisApi, self).__init__(xcvr_eeprom)
+        self.flag_collector = self._install_flag_collector(flag_summary)
+        self.staged_control = install_staged_control(self.xcvr_eeprom, *CMIS_STAGED_CTRL0_REGION) \
+            if not self.is_flat_memory() else None
         self.vdm = CmisVdmApi(xcvr_eeprom) if not self.is_flat_memory() else None
         self.cdb = CmisCdbApi(xcvr_eeprom) if self.is_cdb_supported() else None
         self.cdb_fw_hdlr = cdb_fw_hdlr if self.is_cdb_supported() else None
+        self._vdm_db_keys = {}
 
     def get_cdb_fw_handler(self):
         return self.cdb_fw_hdlr
 
+    def _install_flag_collector(self, flag_summary=False):
+        """
+        Wraps the reader of the module so that the latched flag registers are read once per
+        polling cycle and shared by all the flag APIs, see LatchedFlagCollector.
+        """
+        regions = [CMIS_MODULE_FLAG_REGION]
+        if not self.is_flat_memory():
+            regions += [CMIS_LANE_FLAG_REGION, CMIS_VDM_FLAG_REGION]
+        return install_flag_collector(self.xcvr_eeprom, regions,
+                                      CMIS_FLAG_SUMMARY if flag_summary else None)
+
+    def set_flag_summary_enabled(self, enabled):
+        """
+        Sets whether the latched flags of this module are polled through its interrupt
+        indication: while it shows that no flag is latched, the flag registers are not read.
+        Masked flags do not assert the interrupt and are then reported as clear.
+        """
+        self.flag_collector.summary = CMIS_FLAG_SUMMARY if enabled else None
+
+    def get_latched_flag_counters(self):
+        """
+        Returns the number of times each module and lane flag was found set since the
+        API was created, for the flags found set at least once.
+        """
+        counters = {}
+        for (address, bit), count in self.flag_collector.get_counters().items():
+            names = CMIS_LATCHED_FLAG_NAMES.get(address)
+            if names is not None and bit < len(names):
+                counters[names[bit]] = count
+        return counters
+
+    def set_staged_control_write_max(self, write_max):
+        """
+        Sets the maximum number of bytes written at once when committing the staged
+        control registers, e.g. to the write_max of the optoe driver
+        """
+        if self.staged_control is not None:
+            self.staged_control.write_max = write_max
+
     def _get_vdm_key_to_db_prefix_map(self):
         return CMIS_VDM_KEY_TO_DB_PREFIX_KEY_MAP
 
-    @staticmethod
-    def _strip_str(val):
-        return val.rstrip() if isinstance(val, str) else val
-
-    def _update_vdm_dict(self, dict_to_update, new_key, vdm_raw_dict, vdm_observable_type, vdm_subtype_index, lane):
+    def _get_vdm_db_keys(self, vdm_subtypes):
         """
-        Updates the dictionary with the VDM value if the vdm_observable_type exists.
-        If the key does not exist, it will update the dictionary with 'N/A'.
+        Returns the DB keys of the given VDM subtypes for every observable type
+        and lane, built once per module.
 
         Args:
-            dict_to_update (dict): The dictionary to be updated.
-            new_key (str): The key to be added in dict_to_update.
-            vdm_raw_dict (dict): The raw VDM dictionary to be parsed.
-            vdm_observable_type (str): Lookup key in the VDM dictionary.
-            vdm_subtype_index (VdmSubtypeIndex): The index of the VDM subtype in the VDM page.
-            lane (int): The lane number to be looked up in the VDM dictionary.
+            vdm_subtypes (tuple): The VdmSubtypeIndex members to be reported.
 
         Returns:
-            bool: True if the key exists in the VDM dictionary, False if not.
+            list: (DB key, observable type, lane, subtype index) tuples.
         """
-        try:
-            dict_to_update[new_key] = vdm_raw_dict[vdm_observable_type][lane][vdm_subtype_index.value]
-        except (KeyError, TypeError):
-            dict_to_update[new_key] = 'N/A'
-            logger.debug('key {} not present in VDM'.format(new_key))
-            return False
+        db_keys = self._vdm_db_keys.get(vdm_subtypes)
+        if db_keys is None:
+            db_keys = []
+            for vdm_observable_type, db_key_name_prefix in self._get_vdm_key_to_db_prefix_map().items():
+                for lane in range(1, self.NUM_CHANNELS + 1):
+                    for vdm_subtype in vdm_subtypes:
+                        type_str = THRESHOLD_TYPE_STR_MAP.get(vdm_subtype) or FLAG_TYPE_STR_MAP.get(vdm_subtype)
+                        if type_str:
+                            db_key_name = f"{db_key_name_prefix}_{type_str}{lane}"
+                        else:
+                            db_key_name = f"{db_key_name_prefix}{lane}"
+                        db_keys.append((db_key_name, vdm_observable_type, lane, vdm_subtype.value))
+            self._vdm_db_keys[vdm_subtypes] = db_keys
+        return db_keys
+
+    def _get_vdm_db_dict(self, vdm_raw_dict, vdm_subtypes):
+        """
+        Maps the raw VDM dictionary onto the DB keys of the given VDM subtypes.
+        Keys not present in the VDM dictionary are set to 'N/A'.
+        """
+        vdm_db_dict = dict()
+        for db_key_name, vdm_observable_type, lane, vdm_subtype_index in self._get_vdm_db_keys(vdm_subtypes):
+            try:
+                vdm_db_dict[db_key_name] = vdm_raw_dict[vdm_observable_type][lane][vdm_subtype_index]
+            except (KeyError, TypeError):
+                vdm_db_dict[db_key_name] = 'N/A'
+        return vdm_db_dict
 
-        return True
+    def _invalidate_vdm_layout(self):
+        """
+        Drops the cached VDM descriptor layout, the observables advertised by
+        the module may change with the running firmware.
+        """
+        if self.vdm is not None:
+            self.vdm.invalidate_vdm_layout()
+
+    @staticmethod
+    def _strip_str(val):
+        return val.rstrip() if isinstance(val, str) else val
 
     def freeze_vdm_stats(self):
         '''
@@ -319,6 +428,16 @@ class CmisApi(XcvrApi):
         active_fw = [str(num) for num in [active_fw_major, active_fw_minor]]
         return '.'.join(active_fw)
 
+    def _read_active_firmware_rev(self):
+        '''
+        Returns the raw active firmware major and minor revision bytes, read in a
+        single transfer, None if the read fails. Cheap enough to tell on each poll
+        whether the running firmware changed.
+        '''
+        field = self.xcvr_eeprom.mem_map.get_field(consts.ACTIVE_FW_MAJOR_REV)
+        rev = self.xcvr_eeprom.read_raw(field.get_offset(), 2, return_raw=True)
+        return bytes(rev) if rev else None
+
     def get_module_inactive_firmware(self):
         '''
         This function returns the inactive firmware version
@@ -1668,9 +1787,14 @@ class CmisApi(XcvrApi):
         '''
         This function returns all the VDM items, including real time monitor value, threholds and flags
         '''
+        if self.vdm is None:
+            return {}
         if field_option is None:
             field_option = self.vdm.ALL_FIELD
-        vdm = self.vdm.get_vdm_allpage(field_option) if self.vdm is not None else {}
+        # The descriptor layout is kept while the active firmware is the same,
+        # it is parsed again once the firmware changed, whichever way it did
+        self.vdm.set_vdm_layout_firmware(self._read_active_firmware_rev())
+        vdm = self.vdm.get_vdm_allpage(field_option)
         return vdm
 
     def get_module_firmware_fault_state_changed(self):
@@ -1916,9 +2040,11 @@ class CmisApi(XcvrApi):
 
     def cdb_run_firmware(self, mode = 0x01):
         # run module FW (CMD 0109h)
+        self._invalidate_vdm_layout()
         return self.cdb.run_fw_image(mode)
 
     def cdb_commit_firmware(self):
+        self._invalidate_vdm_layout()
         return self.cdb.commit_fw_image()
 
     def module_fw_run(self, mode = 0x01):
@@ -1942,6 +2068,7 @@ class CmisApi(XcvrApi):
         if self.cdb is None:
             return False, "CDB NOT supported on this module"
         starttime = time.time()
+        self._invalidate_vdm_layout()
         fw_run_status = self.cdb.run_fw_image(mode)
         if fw_run_status == 1:
             txt += 'Module FW run: Success\n'
@@ -1975,6 +2102,7 @@ class CmisApi(XcvrApi):
             return False, "CDB NOT supported on this module"
         # commit module FW (CMD 010Ah)
         starttime = time.time()
+        self._invalidate_vdm_layout()
         fw_commit_status= self.cdb.commit_fw_image()
         if fw_commit_status == 1:
             txt += 'Module FW commit: Success\n'
@@ -2412,14 +2540,8 @@ class CmisApi(XcvrApi):
         rxsigpower{lane_num}                           = FLOAT                  ; rx signal power in dbm
         ========================================================================
         """
-        vdm_real_value_dict = dict()
         vdm_raw_dict = self.get_vdm(self.vdm.VDM_REAL_VALUE)
-        for vdm_observable_type, db_key_name_prefix in self._get_vdm_key_to_db_prefix_map().items():
-            for lane in range(1, self.NUM_CHANNELS + 1):
-                db_key_name = f"{db_key_name_prefix}{lane}"
-                self._update_vdm_dict(vdm_real_value_dict, db_key_name, vdm_raw_dict, vdm_observable_type,
-                                                    VdmSubtypeIndex.VDM_SUBTYPE_REAL_VALUE, lane)
-        return vdm_real_value_dict
+        return self._get_vdm_db_dict(vdm_raw_dict, VDM_REAL_VALUE_SUBTYPES)
 
     def get_transceiver_vdm_thresholds(self):
         """
@@ -2474,19 +2596,8 @@ class CmisApi(XcvrApi):
         rxtotpower_xxx{lane_num}                         = FLOAT         ; rx total power in  dbm (high/low alarm/warning)
         rxsigpower_xxx{lane_num}                         = FLOAT         ; rx signal power in dbm (high/low alarm/warning)        ========================================================================
         """
-        vdm_thresholds_dict = dict()
         vdm_raw_dict = self.get_vdm(self.vdm.VDM_THRESHOLD)
-        for vdm_observable_type, db_key_name_prefix in self._get_vdm_key_to_db_prefix_map().items():
-            for lane in range(1, self.NUM_CHANNELS + 1):
-                for vdm_threshold_type in range(VdmSubtypeIndex.VDM_SUBTYPE_HALARM_THRESHOLD.value, VdmSubtypeIndex.VDM_SUBTYPE_LWARN_THRESHOLD.value + 1):
-                    vdm_threshold_enum = VdmSubtypeIndex(vdm_threshold_type)
-                    threshold_type_str = THRESHOLD_TYPE_STR_MAP.get(vdm_threshold_enum)
-                    if threshold_type_str:
-                        db_key_name = f"{db_key_name_prefix}_{threshold_type_str}{lane}"
-                        self._update_vdm_dict(vdm_thresholds_dict, db_key_name, vdm_raw_dict,
-                                                            vdm_observable_type, vdm_threshold_enum, lane)
-
-        return vdm_thresholds_dict
+        return self._get_vdm_db_dict(vdm_raw_dict, VDM_THRESHOLD_SUBTYPES)
 
     def get_transceiver_vdm_flags(self):
         """
@@ -2541,19 +2652,8 @@ class CmisApi(XcvrApi):
         rxtotpower_xxx{lane_num}                         = FLOAT         ; rx total power in  dbm (high/low alarm/warning flag)
         rxsigpower_xxx{lane_num}                         = FLOAT         ; rx signal power in dbm (high/low alarm/warning flag)
         """
-        vdm_flags_dict = dict()
         vdm_raw_dict = self.get_vdm(self.vdm.VDM_FLAG)
-        for vdm_observable_type, db_key_name_prefix in self._get_vdm_key_to_db_prefix_map().items():
-            for lane in range(1, self.NUM_CHANNELS + 1):
-                for vdm_flag_type in range(VdmSubtypeIndex.VDM_SUBTYPE_HALARM_FLAG.value, VdmSubtypeIndex.VDM_SUBTYPE_LWARN_FLAG.value + 1):
-                    vdm_flag_enum = VdmSubtypeIndex(vdm_flag_type)
-                    flag_type_str = FLAG_TYPE_STR_MAP.get(vdm_flag_enum)
-                    if flag_type_str:
-                        db_key_name = f"{db_key_name_prefix}_{flag_type_str}{lane}"
-                        self._update_vdm_dict(vdm_flags_dict, db_key_name, vdm_raw_dict,
-                                                            vdm_observable_type, vdm_flag_enum, lane)
-
-        return vdm_flags_dict
+        return self._get_vdm_db_dict(vdm_raw_dict, VDM_FLAG_SUBTYPES)
 
     def set_datapath_init(self, channel):
         """
@@ -2700,6 +2800,7 @@ class CmisApi(XcvrApi):
 
         return (appl & 0xf)
 
+    @staged_control_transaction
     def set_application(self, channel, appl_code, ec=0):
         """
         Update the selected application code to the specified lanes on the host side
@@ -2899,6 +3000,7 @@ class CmisApi(XcvrApi):
             return False
         return rx_post_support
 
+    @staged_control_transaction
     def scs_lane_write(self, si_param, host_lanes_mask, si_settings_dict):
         '''
         This function sets each lane val based on SI param
@@ -2915,6 +3017,7 @@ class CmisApi(XcvrApi):
                 return False
         return True
 
+    @staged_control_transaction
     def stage_output_eq_pre_cursor_target_rx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies RX output eq pre cursor settings
@@ -2934,6 +3037,7 @@ class CmisApi(XcvrApi):
                 return False
         return True
 
+    @staged_control_transaction
     def stage_output_eq_post_cursor_target_rx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies RX output eq post cursor settings
@@ -2953,6 +3057,7 @@ class CmisApi(XcvrApi):
                 return False
         return True
 
+    @staged_control_transaction
     def stage_output_amp_target_rx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies RX output amp settings
@@ -2972,6 +3077,7 @@ class CmisApi(XcvrApi):
                 return False
         return True
 
+    @staged_control_transaction
     def stage_fixed_input_target_tx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies fixed TX input si settings
@@ -2991,6 +3097,7 @@ class CmisApi(XcvrApi):
                 return False
         return True
 
+    @staged_control_transaction
     def stage_adaptive_input_eq_recall_tx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies adaptive TX input recall si settings.
@@ -2999,6 +3106,7 @@ class CmisApi(XcvrApi):
             return False
         return self.scs_lane_write(consts.ADAPTIVE_INPUT_EQ_RECALLED_TX, host_lanes_mask, si_settings_dict)
 
+    @staged_control_transaction
     def stage_adaptive_input_eq_enable_tx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies adaptive TX input enable si settings
@@ -3007,6 +3115,7 @@ class CmisApi(XcvrApi):
             return False
         return self.scs_lane_write(consts.ADAPTIVE_INPUT_EQ_ENABLE_TX, host_lanes_mask, si_settings_dict)
 
+    @staged_control_transaction
     def stage_cdr_tx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies TX CDR si settings
@@ -3015,6 +3124,7 @@ class CmisApi(XcvrApi):
             return False
         return self.scs_lane_write(consts.CDR_ENABLE_TX, host_lanes_mask, si_settings_dict)
 
+    @staged_control_transaction
     def stage_cdr_rx(self, host_lanes_mask, si_settings_dict):
         '''
         This function applies RX CDR si settings
@@ -3023,6 +3133,7 @@ class CmisApi(XcvrApi):
             return False
         return self.scs_lane_write(consts.CDR_ENABLE_RX, host_lanes_mask, si_settings_dict)
 
+    @staged_control_transaction
     def stage_rx_si_settings(self, host_lanes_mask, si_settings_dict):
         for si_param in si_settings_dict:
             if si_param == consts.OUTPUT_EQ_PRE_CURSOR_TARGET_RX:
@@ -3046,6 +3157,7 @@ class CmisApi(XcvrApi):
 
         return True
 
+    @staged_control_transaction
     def stage_tx_si_settings(self, host_lanes_mask, si_settings_dict):
         for si_param in si_settings_dict:
             if si_param == consts.FIXED_INPUT_EQ_TARGET_TX:
@@ -3069,6 +3181,7 @@ class CmisApi(XcvrApi):
 
         return True
 
+    @staged_control_transaction
     def stage_custom_si_settings(self, host_lanes_mask, optics_si_dict):
         # Create TX/RX specific si_dict
         rx_si_settings = {}
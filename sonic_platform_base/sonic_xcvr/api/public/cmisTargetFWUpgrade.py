@@ -6,6 +6,7 @@
 """
 
 import sys
+import time
 import traceback
 from ...fields import consts
 from .cmis import CmisApi
@@ -24,6 +25,10 @@ SERVER_FW_VERSION_NUMBER_SIZE = 4
 
 TARGET_LIST = [TARGET_E0_VALUE, TARGET_E1_VALUE, TARGET_E2_VALUE]
 
+# Seconds for which the firmware versions read from a target are kept, the remote targets
+# possibly being upgraded without the local active firmware changing
+FIRMWARE_VERSIONS_CACHE_TTL = 300
+
 CABLE_E1_FIRMWARE_INFO_MAP = {
     'active_firmware': 'e1_active_firmware',
     'inactive_firmware': 'e1_inactive_firmware',
@@ -42,6 +47,45 @@ REMOTE_TARGET_FIRMWARE_INFO_MAP = {
 }
 
 class CmisTargetFWUpgradeAPI(CmisApi):
+    def _get_target_firmware_versions_cache(self):
+        """
+        Returns:
+            dict of the firmware versions read from each target,
+            {target: (firmware info, local active firmware revision, expiry time)}
+        """
+        cache = getattr(self, '_target_firmware_versions', None)
+        if cache is None:
+            cache = self._target_firmware_versions = {}
+        return cache
+
+    def invalidate_firmware_versions_cache(self):
+        """
+        Drops the firmware versions read from the targets, which are read again on the next
+        get_transceiver_info_firmware_versions call. Firmware download, run and commit call it.
+        """
+        self._target_firmware_versions = {}
+
+    def module_fw_download(self, *args, **kwargs):
+        self.invalidate_firmware_versions_cache()
+        try:
+            return super().module_fw_download(*args, **kwargs)
+        finally:
+            self.invalidate_firmware_versions_cache()
+
+    def module_fw_run(self, *args, **kwargs):
+        self.invalidate_firmware_versions_cache()
+        try:
+            return super().module_fw_run(*args, **kwargs)
+        finally:
+            self.invalidate_firmware_versions_cache()
+
+    def module_fw_commit(self, *args, **kwargs):
+        self.invalidate_firmware_versions_cache()
+        try:
+            return super().module_fw_commit(*args, **kwargs)
+        finally:
+            self.invalidate_firmware_versions_cache()
+
     def set_firmware_download_target_end(self, target):
         """
         Sets the target mode to the specified target.
@@ -79,6 +123,12 @@ class CmisTargetFWUpgradeAPI(CmisApi):
     """
     Reads the active, inactive and server firmware version from all targets
     and returns a dictionary of the firmware versions.
+    The versions of a target only change with a firmware download, run or commit, so the versions
+    read from each target are kept and only the targets not read yet are switched to, all in a
+    single target mode window ending with the return to E0. The versions kept are dropped by a
+    download, run or commit through this API, once the local active firmware revision differs
+    from the one read with them (e.g. upgraded by another process), or after
+    FIRMWARE_VERSIONS_CACHE_TTL seconds.
     Returns:
         A dictionary of the firmware versions for all targets.
     """
@@ -94,7 +144,21 @@ class CmisTargetFWUpgradeAPI(CmisApi):
             'e2_server_firmware': 'N/A'
         }
 
+        cache = self._get_target_firmware_versions_cache() if self.cache_enabled else {}
+        # Read in E0 before any target switch, nothing is kept if it cannot be read
+        local_rev = self._read_active_firmware_rev() if self.cache_enabled else None
+        now = time.monotonic()
+        target_switched = False
         for target in TARGET_LIST:
+            cached = cache.pop(target, None)
+            if cached is not None:
+                target_firmware_versions, rev, expiry = cached
+                if rev == local_rev and now < expiry:
+                    cache[target] = cached
+                    return_dict.update(target_firmware_versions)
+                    continue
+
+            target_switched = True
             try:
                 if not self.set_firmware_download_target_end(target):
                     logger.error("Target mode change failed. Target: {}".format(target))
@@ -104,10 +168,14 @@ class CmisTargetFWUpgradeAPI(CmisApi):
                 if target in REMOTE_TARGET_FIRMWARE_INFO_MAP:
                     # Add server firmware version to the firmware_versions dictionary
                     firmware_versions.update(self._get_server_firmware_version())
-                    return_dict.update(self._convert_firmware_info_to_target_firmware_info(
-                                                                    firmware_versions, REMOTE_TARGET_FIRMWARE_INFO_MAP[target]))
+                    target_firmware_versions = self._convert_firmware_info_to_target_firmware_info(
+                                                                    firmware_versions, REMOTE_TARGET_FIRMWARE_INFO_MAP[target])
                 else:
-                    return_dict.update(firmware_versions)
+                    target_firmware_versions = firmware_versions
+                return_dict.update(target_firmware_versions)
+                # The active firmware version is N/A if the versions could not be read
+                if local_rev is not None and firmware_versions.get('active_firmware', 'N/A') != 'N/A':
+                    cache[target] = (target_firmware_versions, local_rev, now + FIRMWARE_VERSIONS_CACHE_TTL)
             except Exception as e:
                 logger.error("Exception occurred while handling target {} firmware version: {}".format(target, repr(e)))
                 exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -117,7 +185,8 @@ class CmisTargetFWUpgradeAPI(CmisApi):
                         logger.error(tb_line_split)
                 continue
 
-        self.set_firmware_download_target_end(TARGET_E0_VALUE)
+        if target_switched:
+            self.set_firmware_download_target_end(TARGET_E0_VALUE)
         return return_dict
 
     def _is_remote_target_accessible(self):
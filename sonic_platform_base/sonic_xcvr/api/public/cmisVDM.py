@@ -17,6 +17,31 @@ VDM_FLAG_PAGE = 0x2c
 VDM_FREEZE = 128
 VDM_UNFREEZE = 0
 
+VDM_WORDS_PER_PAGE = PAGE_SIZE // VDM_SIZE
+
+VDM_U16_PAGE = struct.Struct('>%dH' % VDM_WORDS_PER_PAGE)
+VDM_S16_PAGE = struct.Struct('>%dh' % VDM_WORDS_PER_PAGE)
+
+# F16: bits 15-11 are the exponent with a bias of 24, bits 10-0 the mantissa
+F16_SCALE = [10**(exponent - 24) for exponent in range(32)]
+VDM_FORMATS = ('S16', 'U16', 'F16')
+
+def decode_vdm_word(words, position, vdm_format, scale):
+    '''
+    This function decodes the word at position of a VDM page, given as the
+    (U16, S16) tuples of all the words of the page.
+    '''
+    u16, s16 = words
+    if vdm_format == 'S16':
+        return s16[position] * scale
+    elif vdm_format == 'U16':
+        return u16[position] * scale
+    value = u16[position]
+    return (value & 0x7ff) * F16_SCALE[value >> 11]
+
+# High alarm, low alarm, high warning and low warning flags of a flag nibble
+VDM_FLAG_BITS = [[bool((nibble >> bit) & 0x1) for bit in range(4)] for nibble in range(16)]
+
 class CmisVdmApi(XcvrApi):
 
     VDM_REAL_VALUE = 0x1
@@ -26,15 +51,34 @@ class CmisVdmApi(XcvrApi):
 
     def __init__(self, xcvr_eeprom):
         super(CmisVdmApi, self).__init__(xcvr_eeprom)
-    
+        self._vdm_layout_cache = {}
+        self.vdm_layout_firmware = None
+
+    def set_vdm_layout_firmware(self, firmware):
+        '''
+        This function binds the parsed descriptor layouts to the given active
+        firmware version. While bound, the descriptor pages are not read
+        again. Layouts parsed for another firmware version are dropped, and
+        None (unknown firmware) drops them and unbinds them.
+        '''
+        if firmware != self.vdm_layout_firmware:
+            self._vdm_layout_cache = {}
+        self.vdm_layout_firmware = firmware
+
+    def invalidate_vdm_layout(self):
+        '''
+        This function drops the parsed descriptor layouts, e.g. when the module
+        firmware is about to be run or committed.
+        '''
+        self._vdm_layout_cache = {}
+        self.vdm_layout_firmware = None
+
     def get_F16(self, value):
         '''
         This function converts raw data to "F16" format defined in cmis.
         '''
-        scale_exponent = (value >> 11) & 0x1f
-        mantissa = value & 0x7ff
-        result = mantissa*10**(scale_exponent-24)
-        return result
+        value &= 0xffff
+        return (value & 0x7ff) * F16_SCALE[value >> 11]
 
     def get_vdm_page(self, page, VDM_flag_page, field_option=ALL_FIELD):
         '''
@@ -55,129 +99,89 @@ class CmisVdmApi(XcvrApi):
         '''
         if page not in [0x20, 0x21, 0x22, 0x23]:
             raise ValueError('Page not in VDM Descriptor range!')
-        vdm_descriptor = self.xcvr_eeprom.read_raw(page * PAGE_SIZE + PAGE_OFFSET, PAGE_SIZE)
-        if not vdm_descriptor:
-            return {}
-
-        # Odd Adress VDM observable type ID, real-time monitored value in Page + 4
-        vdm_typeID = vdm_descriptor[1::2]
-        # Even Address
-        # Bit 7-4: Threshold set ID in Page + 8, in group of 8 bytes, 16 sets/page
-        # Bit 3-0: n. Monitored lane n+1 
-        vdm_lane = [(elem & 0xf) for elem in vdm_descriptor[0::2]]
-        VDM_thresholdID = [(elem>>4) for elem in vdm_descriptor[0::2]]
-        vdm_valuePage = page + 4
-        vdm_thrshPage = page + 8
-        vdm_Page_data = {}
-        VDM_TYPE_DICT = self.xcvr_eeprom.mem_map.codes.VDM_TYPE
-        for index, typeID in enumerate(vdm_typeID):
-            if typeID not in VDM_TYPE_DICT:
-                continue
+        cached = self._vdm_layout_cache.get(page)
+        if cached is not None and self.vdm_layout_firmware is not None:
+            layout = cached[1]
+        else:
+            vdm_descriptor = self.xcvr_eeprom.read_raw(page * PAGE_SIZE + PAGE_OFFSET, PAGE_SIZE)
+            if not vdm_descriptor:
+                return {}
+            layout = self.get_vdm_layout(page, vdm_descriptor)
+
+        # Samples and thresholds of all the observables of the page are read
+        # in one transfer each and decoded in one pass
+        if field_option & self.VDM_REAL_VALUE:
+            vdm_values = self._read_vdm_words(page + 4)
+            if vdm_values is None:
+                return {}
+        else:
+            vdm_values = None
 
-            vdm_info_dict = VDM_TYPE_DICT[typeID]
-            thrshID = VDM_thresholdID[index]
-            vdm_type = vdm_info_dict[0]
-            vdm_format = vdm_info_dict[1]
-            scale = vdm_info_dict[2]
-
-            vdm_value_offset = vdm_valuePage * PAGE_SIZE + PAGE_OFFSET + VDM_SIZE * index
-            vdm_high_alarm_offset = vdm_thrshPage * PAGE_SIZE + PAGE_OFFSET + THRSH_SPACING * thrshID
-            vdm_low_alarm_offset = vdm_high_alarm_offset + 2
-            vdm_high_warn_offset = vdm_high_alarm_offset + 4
-            vdm_low_warn_offset = vdm_high_alarm_offset + 6
-
-            if field_option & self.VDM_REAL_VALUE:
-                vdm_value_raw = self.xcvr_eeprom.read_raw(vdm_value_offset, VDM_SIZE, True)
-                if not vdm_value_raw:
-                    continue
-                if vdm_format == 'S16':
-                    vdm_value = struct.unpack('>h',vdm_value_raw)[0] * scale
-                elif vdm_format == 'U16':
-                    vdm_value = struct.unpack('>H',vdm_value_raw)[0] * scale
-                elif vdm_format == 'F16':
-                    vdm_value_int = struct.unpack('>H',vdm_value_raw)[0]
-                    vdm_value = self.get_F16(vdm_value_int)
-                else:
-                    continue
-            else:
-                vdm_value = None
-
-            if field_option & self.VDM_THRESHOLD:
-                vdm_thrsh_raw = self.xcvr_eeprom.read_raw(vdm_high_alarm_offset, VDM_SIZE*4, True)
-                if not vdm_thrsh_raw:
-                    continue
-                vdm_thrsh_high_alarm_raw = vdm_thrsh_raw[0:2]
-                vdm_thrsh_low_alarm_raw = vdm_thrsh_raw[2:4]
-                vdm_thrsh_high_warn_raw = vdm_thrsh_raw[4:6]
-                vdm_thrsh_low_warn_raw = vdm_thrsh_raw[6:8]
-
-                if vdm_format == 'S16':
-                    vdm_thrsh_high_alarm = struct.unpack('>h', vdm_thrsh_high_alarm_raw)[0] * scale
-                    vdm_thrsh_low_alarm = struct.unpack('>h', vdm_thrsh_low_alarm_raw)[0] * scale
-                    vdm_thrsh_high_warn = struct.unpack('>h', vdm_thrsh_high_warn_raw)[0] * scale
-                    vdm_thrsh_low_warn = struct.unpack('>h', vdm_thrsh_low_warn_raw)[0] * scale
-                elif vdm_format == 'U16':
-                    vdm_thrsh_high_alarm = struct.unpack('>H', vdm_thrsh_high_alarm_raw)[0] * scale
-                    vdm_thrsh_low_alarm = struct.unpack('>H', vdm_thrsh_low_alarm_raw)[0] * scale
-                    vdm_thrsh_high_warn = struct.unpack('>H', vdm_thrsh_high_warn_raw)[0] * scale
-                    vdm_thrsh_low_warn = struct.unpack('>H', vdm_thrsh_low_warn_raw)[0] * scale
-                elif vdm_format == 'F16':
-                    vdm_thrsh_high_alarm_int = struct.unpack('>H', vdm_thrsh_high_alarm_raw)[0]
-                    vdm_thrsh_low_alarm_int = struct.unpack('>H', vdm_thrsh_low_alarm_raw)[0]
-                    vdm_thrsh_high_warn_int = struct.unpack('>H', vdm_thrsh_high_warn_raw)[0]
-                    vdm_thrsh_low_warn_int = struct.unpack('>H', vdm_thrsh_low_warn_raw)[0]
-                    vdm_thrsh_high_alarm = self.get_F16(vdm_thrsh_high_alarm_int)
-                    vdm_thrsh_low_alarm = self.get_F16(vdm_thrsh_low_alarm_int)
-                    vdm_thrsh_high_warn = self.get_F16(vdm_thrsh_high_warn_int)
-                    vdm_thrsh_low_warn = self.get_F16(vdm_thrsh_low_warn_int)
-                else:
-                    continue
-            else:
-                vdm_thrsh_high_alarm = None
-                vdm_thrsh_low_alarm = None
-                vdm_thrsh_high_warn = None
-                vdm_thrsh_low_warn = None
+        if field_option & self.VDM_THRESHOLD:
+            vdm_thrshs = self._read_vdm_words(page + 8)
+            if vdm_thrshs is None:
+                return {}
+        else:
+            vdm_thrshs = None
 
+        vdm_Page_data = {}
+        for index, vdm_type, lane, thrshID, vdm_format, scale in layout:
+            vdm_item = [None] * 9
+            if vdm_values is not None:
+                vdm_item[0] = decode_vdm_word(vdm_values, index, vdm_format, scale)
+            if vdm_thrshs is not None:
+                # high alarm, low alarm, high warning, low warning
+                position = thrshID * THRSH_SPACING // VDM_SIZE
+                vdm_item[1:5] = [decode_vdm_word(vdm_thrshs, position + i, vdm_format, scale)
+                                 for i in range(4)]
             if VDM_flag_page:
-                vdm_flag_offset = 32 * (page - 0x20) + index//2
-                bit_offset = 4*(index%2)
-                vdm_high_alarm_flag = bool((VDM_flag_page[vdm_flag_offset] >> (bit_offset)) & 0x1)
-                vdm_low_alarm_flag = bool((VDM_flag_page[vdm_flag_offset] >> (bit_offset+1)) & 0x1)
-                vdm_high_warn_flag = bool((VDM_flag_page[vdm_flag_offset] >> (bit_offset+2)) & 0x1)
-                vdm_low_warn_flag = bool((VDM_flag_page[vdm_flag_offset] >> (bit_offset+3)) & 0x1)
-            else:
-                vdm_high_alarm_flag = None
-                vdm_low_alarm_flag = None
-                vdm_high_warn_flag = None
-                vdm_low_warn_flag = None
-
-            if vdm_type not in vdm_Page_data:
-                vdm_Page_data[vdm_type] = {
-                    vdm_lane[index]+1: [
-                        vdm_value,
-                        vdm_thrsh_high_alarm,
-                        vdm_thrsh_low_alarm,
-                        vdm_thrsh_high_warn,
-                        vdm_thrsh_low_warn,
-                        vdm_high_alarm_flag,
-                        vdm_low_alarm_flag,
-                        vdm_high_warn_flag,
-                        vdm_low_warn_flag]
-                }
-
-            else:
-                vdm_Page_data[vdm_info_dict[0]][vdm_lane[index]+1] = [
-                    vdm_value,
-                    vdm_thrsh_high_alarm,
-                    vdm_thrsh_low_alarm,
-                    vdm_thrsh_high_warn,
-                    vdm_thrsh_low_warn,
-                    vdm_high_alarm_flag,
-                    vdm_low_alarm_flag,
-                    vdm_high_warn_flag,
-                    vdm_low_warn_flag]
+                flags = VDM_flag_page[32 * (page - 0x20) + index // 2] >> (4 * (index % 2))
+                vdm_item[5:9] = VDM_FLAG_BITS[flags & 0xf]
+            vdm_Page_data.setdefault(vdm_type, {})[lane] = vdm_item
         return vdm_Page_data
 
+    def get_vdm_layout(self, page, vdm_descriptor):
+        '''
+        This function parses the descriptor of a VDM page into a list of
+        (index, observable type, lane, threshold set ID, data type, scale)
+        tuples for the observables known in VDM_TYPE. The parsed layout of the
+        page is reused for as long as its descriptor does not change.
+        '''
+        vdm_descriptor = bytes(vdm_descriptor)
+        cached = self._vdm_layout_cache.get(page)
+        if cached is not None and cached[0] == vdm_descriptor:
+            return cached[1]
+
+        VDM_TYPE_DICT = self.xcvr_eeprom.mem_map.codes.VDM_TYPE
+        layout = []
+        for index in range(len(vdm_descriptor) // 2):
+            # Odd Adress VDM observable type ID, real-time monitored value in Page + 4
+            typeID = vdm_descriptor[2 * index + 1]
+            if typeID not in VDM_TYPE_DICT:
+                continue
+            vdm_type, vdm_format, scale = VDM_TYPE_DICT[typeID]
+            if vdm_format not in VDM_FORMATS:
+                continue
+            # Even Address
+            # Bit 7-4: Threshold set ID in Page + 8, in group of 8 bytes, 16 sets/page
+            # Bit 3-0: n. Monitored lane n+1
+            lane = (vdm_descriptor[2 * index] & 0xf) + 1
+            thrshID = vdm_descriptor[2 * index] >> 4
+            layout.append((index, vdm_type, lane, thrshID, vdm_format, scale))
+        self._vdm_layout_cache[page] = (vdm_descriptor, layout)
+        return layout
+
+    def _read_vdm_words(self, page):
+        '''
+        This function reads a whole VDM sample or threshold page in a single
+        transfer and unpacks all its words at once. Returns a tuple of the
+        U16 and S16 interpretations of the words, None if the read fails.
+        '''
+        raw = self.xcvr_eeprom.read_raw(page * PAGE_SIZE + PAGE_OFFSET, PAGE_SIZE, True)
+        if not raw or len(raw) < PAGE_SIZE:
+            return None
+        return VDM_U16_PAGE.unpack_from(raw), VDM_S16_PAGE.unpack_from(raw)
+
     def get_vdm_allpage(self, field_option=ALL_FIELD ):
         '''
         This function returns VDM items from all advertised VDM pages.
@@ -10,16 +10,32 @@ from ...fields import consts
 from ..xcvr_api import XcvrApi
 
 from ...codes.public.sff8636 import Sff8636Codes
+from ...latched_flags import install_flag_collector
+
+# Latched interrupt flags of the lower page, bytes 3-14, in one read
+SFF8636_FLAG_REGION = (3, 12)
+# IntL bit of lower page byte 2, set while no unmasked flag is latched
+SFF8636_FLAG_SUMMARY = (2, 0x02)
 
 class Sff8636Api(XcvrApi):
     NUM_CHANNELS = 4
     POWER_CLASS_PATTERN = r'^Power Class ([1-8])'
 
-    def __init__(self, xcvr_eeprom):
+    def __init__(self, xcvr_eeprom, flag_summary=False):
         super(Sff8636Api, self).__init__(xcvr_eeprom)
         self._temp_support = None
         self._voltage_support = None
         self._is_copper = None
+        self.flag_collector = install_flag_collector(
+            xcvr_eeprom, [SFF8636_FLAG_REGION], SFF8636_FLAG_SUMMARY if flag_summary else None)
+
+    def set_flag_summary_enabled(self, enabled):
+        """
+        Sets whether the latched flags of this module are polled through its IntL indication:
+        while it shows that no flag is latched, the flag registers are not read. Masked flags
+        do not assert IntL and are then reported as clear.
+        """
+        self.flag_collector.summary = SFF8636_FLAG_SUMMARY if enabled else None
 
     def get_model(self):
         return self.xcvr_eeprom.read(consts.VENDOR_PART_NO_FIELD)
@@ -0,0 +1,237 @@
+"""
+    async_sfp.py
+
+    asyncio facade over SfpOptoeBase and its XcvrApi.
+
+    The transceiver APIs block on EEPROM reads and writes, so AsyncSfp runs them in worker
+    threads, one bounded executor per I2C bus: operations on a bus are serialized (or limited to
+    workers_per_bus at once) while operations on different buses overlap. Operations wait for
+    their bus in the event loop, not in the executor queue, so that thousands of them can be
+    scheduled, cancelled before they start, and held back by max_pending.
+
+    Usage, in a daemon:
+        runner = AsyncSfpRunner(max_pending=256)
+        sfps = [AsyncSfp(sfp, runner) for sfp in chassis.get_all_sfps()]
+        infos = await asyncio.gather(*(sfp.get_transceiver_info() for sfp in sfps))
+        await sfps[0].set_lpmode(False)
+        runner.shutdown()
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .sfp_optoe_base import SfpOptoeBase
+
+# Seconds between two checks of the module state during a low power mode change
+LPMODE_POLL_INTERVAL = 0.1
+
+class AsyncSfpRunner(object):
+    """
+    Runs blocking transceiver operations in a bounded executor per bus. A runner is used from
+    a single event loop.
+
+    Args:
+        workers_per_bus: Integer, operations run at once on a bus
+        max_pending: Integer, operations accepted at once over all buses (waiting for their bus
+                     or running), further callers waiting for one to complete; None for no limit
+    """
+    def __init__(self, workers_per_bus=1, max_pending=None):
+        self.workers_per_bus = workers_per_bus
+        self.max_pending = max_pending
+        # bus -> ThreadPoolExecutor
+        self._executors = {}
+        # bus -> asyncio.Semaphore of the workers of the bus, created in the event loop
+        self._bus_slots = {}
+        self._pending_slots = None
+
+    def _get_executor(self, bus):
+        executor = self._executors.get(bus)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=self.workers_per_bus,
+                                          thread_name_prefix='xcvr-bus-{}'.format(bus))
+            self._executors[bus] = executor
+        return executor
+
+    def _get_bus_slots(self, bus):
+        slots = self._bus_slots.get(bus)
+        if slots is None:
+            slots = self._bus_slots[bus] = asyncio.Semaphore(self.workers_per_bus)
+        return slots
+
+    async def run(self, bus, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) in the executor of bus
+
+        Returns:
+            The result of func. If the caller is cancelled before func starts, func does not run;
+            once started, func completes in its worker and the bus is only reused after it.
+        """
+        if self.max_pending is not None and self._pending_slots is None:
+            self._pending_slots = asyncio.Semaphore(self.max_pending)
+        pending_slots = self._pending_slots
+        if pending_slots is not None:
+            await pending_slots.acquire()
+        try:
+            bus_slots = self._get_bus_slots(bus)
+            await bus_slots.acquire()
+        except BaseException:
+            if pending_slots is not None:
+                pending_slots.release()
+            raise
+
+        loop = asyncio.get_running_loop()
+        def release(_):
+            bus_slots.release()
+            if pending_slots is not None:
+                pending_slots.release()
+        try:
+            future = self._get_executor(bus).submit(func, *args, **kwargs)
+        except BaseException:
+            release(None)
+            raise
+        # Slots are given back when the worker is done, even if the caller was cancelled
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(release, f))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait=True):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
+        self._executors.clear()
+
+def _offload(name):
+    """
+    Return: coroutine method running the method name of the SFP in its bus executor
+    """
+    async def method(self, *args, **kwargs):
+        return await self.run(getattr(self.sfp, name), *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = "Awaitable version of SfpOptoeBase.{}".format(name)
+    return method
+
+def _offload_api(name):
+    """
+    Return: coroutine method running the method name of the XcvrApi in the bus executor, None if
+    the SFP has no XcvrApi
+    """
+    async def method(self, *args, **kwargs):
+        api = await self.get_xcvr_api()
+        if api is None:
+            return None
+        return await self.run(getattr(api, name), *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = "Awaitable version of XcvrApi.{}".format(name)
+    return method
+
+class AsyncSfp(object):
+    """
+    Awaitable operations of an SfpOptoeBase.
+
+    Args:
+        sfp: SfpOptoeBase
+        runner: AsyncSfpRunner shared by the SFPs of the platform, a runner of its own if None
+        bus: hashable key of the I2C bus of the SFP, taken from its EEPROM path if None
+    """
+    def __init__(self, sfp, runner=None, bus=None):
+        self.sfp = sfp
+        self.runner = runner if runner is not None else AsyncSfpRunner()
+        self.bus = bus if bus is not None else self._get_default_bus()
+
+    def _get_default_bus(self):
+        """
+        Return: I2C adapter of the EEPROM ('5' for /sys/bus/i2c/devices/5-0050/eeprom), the SFP
+        itself if unknown
+        """
+        try:
+            device = os.path.basename(os.path.dirname(self.sfp.get_eeprom_path()))
+        except (NotImplementedError, AttributeError, TypeError):
+            return self.sfp
+        adapter, sep, _ = device.partition('-')
+        return adapter if sep and adapter.isdigit() else self.sfp
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking operation on the bus of the SFP
+        """
+        return await self.runner.run(self.bus, func, *args, **kwargs)
+
+    async def get_xcvr_api(self):
+        # Creating the API reads the EEPROM, only the first call goes to the executor
+        api = getattr(self.sfp, '_xcvr_api', None)
+        if api is not None:
+            return api
+        return await self.run(self.sfp.get_xcvr_api)
+
+    get_presence = _offload('get_presence')
+    get_transceiver_info = _offload('get_transceiver_info')
+    get_transceiver_info_firmware_versions = _offload('get_transceiver_info_firmware_versions')
+    get_transceiver_dom_real_value = _offload('get_transceiver_dom_real_value')
+    get_transceiver_threshold_info = _offload('get_transceiver_threshold_info')
+    get_transceiver_dom_flags = _offload('get_transceiver_dom_flags')
+    get_transceiver_status = _offload('get_transceiver_status')
+    get_transceiver_status_flags = _offload('get_transceiver_status_flags')
+    get_transceiver_vdm_real_value = _offload('get_transceiver_vdm_real_value')
+    get_transceiver_vdm_thresholds = _offload('get_transceiver_vdm_thresholds')
+    get_transceiver_vdm_flags = _offload('get_transceiver_vdm_flags')
+    get_transceiver_pm = _offload('get_transceiver_pm')
+    get_lpmode = _offload('get_lpmode')
+    tx_disable = _offload('tx_disable')
+    tx_disable_channel = _offload('tx_disable_channel')
+    reset = _offload('reset')
+
+    get_module_fw_info = _offload_api('get_module_fw_info')
+    get_module_fw_mgmt_feature = _offload_api('get_module_fw_mgmt_feature')
+    module_fw_run = _offload_api('module_fw_run')
+    module_fw_commit = _offload_api('module_fw_commit')
+
+    async def module_fw_download(self, imagepath):
+        """
+        Awaitable version of XcvrApi.module_fw_download, with the download parameters
+        advertised by the module
+
+        Returns:
+            (status, message) of the download, None if the SFP has no XcvrApi
+        """
+        api = await self.get_xcvr_api()
+        if api is None:
+            return None
+        # The CDB exchanges of a download wait on the module in between, they run as one
+        # operation so that no other operation interleaves with them on the module
+        def download():
+            result = api.get_module_fw_mgmt_feature()
+            if result is None:
+                return False, 'Failed to get the firmware management features'
+            if not result['status']:
+                return False, result['info']
+            return api.module_fw_download(*result['feature'], imagepath)
+        return await self.run(download)
+
+    async def set_lpmode(self, lpmode):
+        """
+        Awaitable version of SfpOptoeBase.set_lpmode. For CMIS modules the wait for the module
+        state change is an asyncio.sleep poll, which leaves the bus to other operations.
+
+        Returns:
+            True if the module reached the requested power mode in the time it advertises
+        """
+        sfp_set_lpmode = getattr(type(self.sfp), 'set_lpmode', None)
+        api = await self.get_xcvr_api()
+        if sfp_set_lpmode is not SfpOptoeBase.set_lpmode or not hasattr(api, 'wait_time_condition'):
+            # Platform specific or not CMIS: blocking implementation
+            return await self.run(self.sfp.set_lpmode, lpmode)
+
+        if not await self.run(api.set_lpmode, lpmode, wait_state_change=False):
+            return False
+        if lpmode:
+            condition, expected = api.get_lpmode, True
+            duration_ms = await self.run(api.get_module_pwr_down_duration)
+        else:
+            condition, expected = api.get_module_state, 'ModuleReady'
+            duration_ms = await self.run(api.get_module_pwr_up_duration)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration_ms / 1000.0
+        while loop.time() < deadline:
+            if await self.run(condition) == expected:
+                return True
+            await asyncio.sleep(LPMODE_POLL_INTERVAL)
+        return await self.run(condition) == expected
@@ -0,0 +1,222 @@
+"""
+   cmis_bringup.py
+
+   Non-blocking datapath bring-up of CMIS modules.
+
+   CmisApi.set_lpmode and the datapath control APIs wait for each state change in a sleeping
+   poll loop, so bringing up N ports one after the other takes N times the power-up and datapath
+   init durations of the modules. CmisBringupTask performs the same sequence (low power exit,
+   datapath deinit, application selection, datapath init, TX turn-on) as a state machine that
+   never sleeps, each step being given the duration advertised by the module as deadline.
+   CmisBringupManager advances the tasks of any number of ports on each tick, bringing up a
+   chassis in about the time of its slowest module.
+"""
+
+import time
+
+BRINGUP_STATE_LPMODE_EXIT = 'LpModeExit'
+BRINGUP_STATE_MODULE_READY_WAIT = 'ModuleReadyWait'
+BRINGUP_STATE_DP_DEINIT = 'DpDeinit'
+BRINGUP_STATE_DP_DEINIT_WAIT = 'DpDeinitWait'
+BRINGUP_STATE_APPL_APPLY = 'ApplApply'
+BRINGUP_STATE_CONFIG_WAIT = 'ConfigWait'
+BRINGUP_STATE_DP_INIT = 'DpInit'
+BRINGUP_STATE_DP_INIT_WAIT = 'DpInitWait'
+BRINGUP_STATE_TX_ON = 'TxOn'
+BRINGUP_STATE_TX_ON_WAIT = 'TxOnWait'
+BRINGUP_STATE_READY = 'Ready'
+BRINGUP_STATE_FAILED = 'Failed'
+
+BRINGUP_FINAL_STATES = (BRINGUP_STATE_READY, BRINGUP_STATE_FAILED)
+
+# Modules do not advertise how long the configuration commands take
+CONFIG_TIMEOUT_MS = 5000
+
+# Seconds between the ticks of CmisBringupManager.run()
+DEFAULT_TICK_INTERVAL = 0.1
+
+class CmisBringupTask(object):
+    """
+    Bring-up of the datapath of a group of host lanes of one module.
+
+    Args:
+        api: CmisApi of the module
+        host_lanes_mask: Integer, bitmask of the host lanes of the datapath
+        appl_code: Integer, application to select
+        ec: Integer, explicit control bit of the application selection
+        si_settings: dict of optics SI settings to stage, as taken by stage_custom_si_settings,
+                     None to leave them
+        tx_on: Boolean, False to leave the TX disabled once the datapath is initialized
+    """
+    def __init__(self, api, host_lanes_mask, appl_code, ec=0, si_settings=None, tx_on=True):
+        self.api = api
+        self.host_lanes_mask = host_lanes_mask
+        self.appl_code = appl_code
+        self.ec = ec
+        self.si_settings = si_settings
+        self.tx_on = tx_on
+        self.state = BRINGUP_STATE_LPMODE_EXIT
+        # Time after which the state being waited for is considered missed
+        self.deadline = None
+        # Reason of the failure, None unless state is BRINGUP_STATE_FAILED
+        self.error = None
+
+    def is_done(self):
+        return self.state in BRINGUP_FINAL_STATES
+
+    def _lanes(self):
+        return [lane for lane in range(self.api.NUM_CHANNELS) if self.host_lanes_mask & (1 << lane)]
+
+    def _lanes_in(self, status, key_format, expected):
+        if status is None:
+            return False
+        return all(status.get(key_format.format(lane + 1)) in expected for lane in self._lanes())
+
+    def _wait(self, state, now, duration_ms):
+        self.state = state
+        self.deadline = now + duration_ms / 1000.0
+
+    def _fail(self, error):
+        self.state = BRINGUP_STATE_FAILED
+        self.deadline = None
+        self.error = error
+        return False
+
+    def _check(self, reached, now, next_state, error):
+        """
+        Move to next_state if the state waited for is reached, fail if its deadline passed
+
+        Returns:
+            Boolean, True if the task moved on
+        """
+        if reached:
+            self.state = next_state
+            self.deadline = None
+            return True
+        if now >= self.deadline:
+            self._fail(error)
+        return False
+
+    def step(self, now):
+        """
+        Perform the action of the current state or check the state change waited for
+
+        Returns:
+            Boolean, True if the task moved to another state
+        """
+        api = self.api
+        state = self.state
+        if state == BRINGUP_STATE_LPMODE_EXIT:
+            if api.get_module_state() == 'ModuleReady':
+                self.state = BRINGUP_STATE_DP_DEINIT
+                return True
+            if not api.set_lpmode(False, wait_state_change=False):
+                return self._fail('low power exit not supported')
+            self._wait(BRINGUP_STATE_MODULE_READY_WAIT, now, api.get_module_pwr_up_duration())
+            return True
+        if state == BRINGUP_STATE_MODULE_READY_WAIT:
+            return self._check(api.get_module_state() == 'ModuleReady', now,
+                               BRINGUP_STATE_DP_DEINIT, 'module not ready')
+        if state == BRINGUP_STATE_DP_DEINIT:
+            api.tx_disable_channel(self.host_lanes_mask, True)
+            api.set_datapath_deinit(self.host_lanes_mask)
+            self._wait(BRINGUP_STATE_DP_DEINIT_WAIT, now, api.get_datapath_deinit_duration())
+            return True
+        if state == BRINGUP_STATE_DP_DEINIT_WAIT:
+            return self._check(self._lanes_in(api.get_datapath_state(), 'DP{}State', ('DataPathDeactivated',)),
+                               now, BRINGUP_STATE_APPL_APPLY, 'datapath not deactivated')
+        if state == BRINGUP_STATE_APPL_APPLY:
+            api.set_application(self.host_lanes_mask, self.appl_code, self.ec)
+            if self.si_settings and not api.stage_custom_si_settings(self.host_lanes_mask, self.si_settings):
+                return self._fail('SI settings not staged')
+            api.scs_apply_datapath_init(self.host_lanes_mask)
+            self._wait(BRINGUP_STATE_CONFIG_WAIT, now, CONFIG_TIMEOUT_MS)
+            return True
+        if state == BRINGUP_STATE_CONFIG_WAIT:
+            status = api.get_config_datapath_hostlane_status()
+            if status is not None:
+                for lane in self._lanes():
+                    lane_status = status.get('ConfigStatusLane{}'.format(lane + 1))
+                    if lane_status is not None and lane_status.startswith('ConfigRejected'):
+                        return self._fail(lane_status)
+            return self._check(self._lanes_in(status, 'ConfigStatusLane{}', ('ConfigSuccess',)), now,
+                               BRINGUP_STATE_DP_INIT, 'configuration not applied')
+        if state == BRINGUP_STATE_DP_INIT:
+            api.set_datapath_init(self.host_lanes_mask)
+            self._wait(BRINGUP_STATE_DP_INIT_WAIT, now, api.get_datapath_init_duration())
+            return True
+        if state == BRINGUP_STATE_DP_INIT_WAIT:
+            next_state = BRINGUP_STATE_TX_ON if self.tx_on else BRINGUP_STATE_READY
+            return self._check(self._lanes_in(api.get_datapath_state(), 'DP{}State',
+                                              ('DataPathInitialized', 'DataPathActivated')),
+                               now, next_state, 'datapath not initialized')
+        if state == BRINGUP_STATE_TX_ON:
+            api.tx_disable_channel(self.host_lanes_mask, False)
+            self._wait(BRINGUP_STATE_TX_ON_WAIT, now, api.get_datapath_tx_turnon_duration())
+            return True
+        if state == BRINGUP_STATE_TX_ON_WAIT:
+            return self._check(self._lanes_in(api.get_datapath_state(), 'DP{}State', ('DataPathActivated',)),
+                               now, BRINGUP_STATE_READY, 'datapath not activated')
+        return False
+
+class CmisBringupManager(object):
+    """
+    Drives the bring-up tasks of many ports, one step of each per tick.
+
+    Usage:
+        manager = CmisBringupManager()
+        manager.add(port, CmisBringupTask(api, 0xff, 1))
+        manager.run()
+        manager.get_states()
+
+    or call tick() from an existing event loop until is_done().
+    """
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        # port -> CmisBringupTask
+        self.tasks = {}
+
+    def add(self, port, task):
+        self.tasks[port] = task
+        return task
+
+    def remove(self, port):
+        return self.tasks.pop(port, None)
+
+    def is_done(self):
+        return all(task.is_done() for task in self.tasks.values())
+
+    def tick(self, now=None):
+        """
+        Advance every task not done yet. Tasks whose action completed go on with their next
+        state in the same tick, while tasks waiting for the module are checked once.
+
+        Returns:
+            Boolean, True once every task is done
+        """
+        if now is None:
+            now = self.clock()
+        for task in self.tasks.values():
+            while not task.is_done() and task.step(now) and task.deadline is None:
+                continue
+        return self.is_done()
+
+    def run(self, tick_interval=DEFAULT_TICK_INTERVAL, timeout=None):
+        """
+        Tick until every task is done or timeout seconds elapsed
+
+        Returns:
+            dict, {port: state} of the tasks
+        """
+        start = self.clock()
+        while not self.tick():
+            if timeout is not None and self.clock() - start >= timeout:
+                break
+            time.sleep(tick_interval)
+        return self.get_states()
+
+    def get_states(self):
+        """
+        Return: {port: state} of the tasks
+        """
+        return {port: task.state for port, task in self.tasks.items()}
@@ -0,0 +1,218 @@
+"""
+   dom_snapshot.py
+
+   Shared-memory publication of transceiver DOM and status snapshots.
+
+   The process polling the modules (the publisher) writes, per port, the results of the
+   monitoring APIs into a memory-mapped file. Any other process (CLI, sfputil, telemetry) maps
+   the same file and reads consistent, timestamped snapshots without going to the module.
+
+   Layout of the file, native byte order:
+       header: magic 'XDOM', layout version (2 bytes), port count (2 bytes), slot size (4 bytes)
+       one slot of slot size bytes per port:
+           sequence (4 bytes), timestamp (8 bytes float), payload length (4 bytes), payload
+
+   Slots are protected by a seqlock: the publisher makes the sequence odd before updating a
+   slot and even again afterwards, and readers retry while the sequence is odd or changed
+   while they copied the slot. The payload is the JSON encoding of {api name: return value}, so
+   tuples are read back as lists and dictionary keys as strings.
+
+   Readers opt in per SFP with SfpOptoeBase.enable_dom_snapshot(path).
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+
+SNAPSHOT_MAGIC = b'XDOM'
+SNAPSHOT_LAYOUT_VERSION = 1
+DEFAULT_SLOT_SIZE = 16384
+
+# XcvrApi methods captured by DomSnapshotPublisher.publish_api()
+SNAPSHOT_APIS = (
+    'get_transceiver_dom_real_value',
+    'get_transceiver_dom_flags',
+    'get_transceiver_status',
+    'get_transceiver_status_flags',
+)
+
+_HEADER = struct.Struct('=4sHHI')
+_SLOT_HEADER = struct.Struct('=IdI')
+_SEQ = struct.Struct('=I')
+_SLOT_FIELDS = struct.Struct('=dI')
+
+READ_RETRIES = 100
+
+class DomSnapshot(object):
+    """
+    Snapshot of one port read from the shared file
+    """
+    __slots__ = ('version', 'timestamp', 'data')
+
+    def __init__(self, version, timestamp, data):
+        # Number of times the port was published
+        self.version = version
+        # time.time() of the publication
+        self.timestamp = timestamp
+        # {api name: return value}
+        self.data = data
+
+    def get_age(self):
+        """
+        Return: seconds elapsed since the snapshot was published
+        """
+        return time.time() - self.timestamp
+
+class DomSnapshotPublisher(object):
+    """
+    Writer side, owned by the single process polling the modules.
+
+    Args:
+        path: file to publish to, created or resized as needed
+        num_ports: number of port slots, ports are numbered from 0
+        slot_size: bytes reserved per port, snapshot header included
+    """
+    def __init__(self, path, num_ports, slot_size=DEFAULT_SLOT_SIZE):
+        assert slot_size > _SLOT_HEADER.size
+        self.path = path
+        self.num_ports = num_ports
+        self.slot_size = slot_size
+        self._sequences = [0] * num_ports
+        size = _HEADER.size + num_ports * slot_size
+        header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_LAYOUT_VERSION, num_ports, slot_size)
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            existing = os.pread(fd, _HEADER.size, 0)
+            if existing != header or os.fstat(fd).st_size != size:
+                # Readers mapping the old layout notice the new file on their next open
+                os.close(fd)
+                tmp_path = '%s.%d.tmp' % (path, os.getpid())
+                fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, header, 0)
+                os.replace(tmp_path, path)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        for port in range(num_ports):
+            seq, = _SEQ.unpack_from(self._mmap, self._slot_offset(port))
+            # Resume the sequence of a previous publisher, leaving any interrupted update
+            self._sequences[port] = seq + (seq & 1)
+
+    def _slot_offset(self, port):
+        return _HEADER.size + port * self.slot_size
+
+    def publish(self, port, data, timestamp=None):
+        """
+        Publish the snapshot data ({api name: return value}) of port
+        """
+        payload = json.dumps(data, separators=(',', ':')).encode()
+        if _SLOT_HEADER.size + len(payload) > self.slot_size:
+            raise ValueError("Snapshot of port %d is %d bytes, slot size is %d" %
+                             (port, len(payload), self.slot_size))
+        if timestamp is None:
+            timestamp = time.time()
+        offset = self._slot_offset(port)
+        seq = self._sequences[port]
+        _SEQ.pack_into(self._mmap, offset, seq + 1)
+        _SLOT_FIELDS.pack_into(self._mmap, offset + _SEQ.size, timestamp, len(payload))
+        begin = offset + _SLOT_HEADER.size
+        self._mmap[begin:begin + len(payload)] = payload
+        _SEQ.pack_into(self._mmap, offset, seq + 2)
+        self._sequences[port] = seq + 2
+
+    def publish_api(self, port, api, apis=SNAPSHOT_APIS):
+        """
+        Read the monitoring APIs of api (an XcvrApi) and publish their results for port.
+        APIs the module does not implement are left out of the snapshot.
+        """
+        data = {}
+        for name in apis:
+            try:
+                data[name] = getattr(api, name)()
+            except NotImplementedError:
+                continue
+        self.publish(port, data)
+        return data
+
+    def close(self):
+        self._mmap.close()
+
+class DomSnapshotReader(object):
+    """
+    Reader side, usable from any number of processes
+    """
+    def __init__(self, path):
+        self.path = path
+        self._mmap = None
+        self._inode = None
+        self.num_ports = 0
+        self.slot_size = 0
+
+    def _open(self):
+        self.close()
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            st = os.fstat(fd)
+            if st.st_size < _HEADER.size:
+                return False
+            magic, version, num_ports, slot_size = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_LAYOUT_VERSION or \
+                    st.st_size < _HEADER.size + num_ports * slot_size:
+                return False
+            self._mmap = mmap.mmap(fd, st.st_size, access=mmap.ACCESS_READ)
+            self._inode = st.st_ino
+            self.num_ports = num_ports
+            self.slot_size = slot_size
+        finally:
+            os.close(fd)
+        return True
+
+    def _is_replaced(self):
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except OSError:
+            return True
+
+    def _read_slot(self, port):
+        offset = _HEADER.size + port * self.slot_size
+        for _ in range(READ_RETRIES):
+            seq, timestamp, length = _SLOT_HEADER.unpack_from(self._mmap, offset)
+            if seq == 0:
+                return None
+            if seq & 1 or length > self.slot_size - _SLOT_HEADER.size:
+                continue
+            begin = offset + _SLOT_HEADER.size
+            payload = self._mmap[begin:begin + length]
+            if _SEQ.unpack_from(self._mmap, offset)[0] == seq:
+                return DomSnapshot(seq // 2, timestamp, json.loads(payload))
+        return None
+
+    def read(self, port, max_age=None):
+        """
+        Return: DomSnapshot of port, None if the port has no snapshot, a consistent copy could
+        not be taken, or the snapshot is older than max_age seconds
+        """
+        if self._mmap is None and not self._open():
+            return None
+        snapshot = None
+        if port < self.num_ports:
+            snapshot = self._read_slot(port)
+        if snapshot is None or (max_age is not None and snapshot.get_age() > max_age):
+            # A restarted publisher may have replaced the file
+            if self._is_replaced() and self._open() and port < self.num_ports:
+                snapshot = self._read_slot(port)
+        if snapshot is None or (max_age is not None and snapshot.get_age() > max_age):
+            return None
+        return snapshot
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
@@ -178,6 +178,7 @@ class NumberRegField(RegField):
         super(NumberRegField, self).__init__(name, offset, *fields, **kwargs)
         self.scale = kwargs.get("scale")
         self.format = kwargs.get("format", "B")
+        self._struct = struct.Struct(self.format)
         self.bitdecode = kwargs.get("bitdecode", False)
 
     def decode(self, raw_data, **decoded_deps):
@@ -186,7 +187,7 @@ class NumberRegField(RegField):
             for field in self.fields:
                 decoded[field.name] = field.decode(raw_data, **decoded_deps)
         else:
-            decoded = struct.unpack(self.format, raw_data)[0]
+            decoded = self._struct.unpack(raw_data)[0]
             mask = self.get_bitmask()
             if mask is not None:
                 decoded &= mask
@@ -225,9 +226,10 @@ class StringRegField(RegField):
         super(StringRegField, self).__init__(name, offset, *fields, **kwargs)
         self.encoding = kwargs.get("encoding", "ascii")
         self.format = kwargs.get("format", ">%ds" % self.size)
+        self._struct = struct.Struct(self.format)
 
     def decode(self, raw_data, **decoded_deps):
-        return struct.unpack(self.format, raw_data)[0].decode(self.encoding, 'ignore')
+        return self._struct.unpack(raw_data)[0].decode(self.encoding, 'ignore')
 
 class CodeRegField(RegField):
     """
@@ -237,9 +239,10 @@ class CodeRegField(RegField):
         super(CodeRegField, self).__init__(name, offset, *fields, **kwargs)
         self.code_dict = code_dict
         self.format = kwargs.get("format", "B")
+        self._struct = struct.Struct(self.format)
 
     def decode(self, raw_data, **decoded_deps):
-        code = struct.unpack(self.format, raw_data)[0]
+        code = self._struct.unpack(raw_data)[0]
         mask = self.get_bitmask()
         if mask is not None:
             code &= mask
@@ -264,6 +267,8 @@ class ServerFWVersionRegField(RegField):
         super(ServerFWVersionRegField, self).__init__(name, offset, *fields, **kwargs)
 
     def decode(self, raw_data, **decoded_deps):
+        if isinstance(raw_data, memoryview):
+            raw_data = bytearray(raw_data)
         server_fw_version_str = ''
         server_fw_version_size = 16
         server_fw_version_number_size = 4
@@ -288,6 +293,19 @@ class RegGroupField(XcvrField):
     def __init__(self, name, *fields, **kwargs):
         super(RegGroupField, self).__init__(name, fields[0].get_offset(), **kwargs)
         self.fields = fields
+        self._members = None
+
+    def _get_members(self):
+        """
+        Return: list of (field, begin, end, deps) tuples locating each member field in the
+        raw data of this group, computed once
+        """
+        if self._members is None:
+            start = self.offset
+            self._members = [(field, field.get_offset() - start,
+                              field.get_offset() + field.get_size() - start, field.get_deps())
+                             for field in self.fields]
+        return self._members
 
     def get_size(self):
         start = self.offset
@@ -304,21 +322,20 @@ class RegGroupField(XcvrField):
             Return: a dict mapping member field names to their decoded results
         """
         result = {}
-        start = self.offset
-        for field in self.fields:
-            offset = field.get_offset()
-            if not field.get_deps():
-                result[field.name] = field.decode(raw_data[offset - start: offset + field.get_size() - start],
-                                              **decoded_deps)
+        # Member fields decode slices of a view on raw_data rather than copies
+        view = memoryview(raw_data)
+        members = self._get_members()
+        for field, begin, end, deps in members:
+            if not deps:
+                result[field.name] = field.decode(view[begin:end], **decoded_deps)
 
         # Now decode any fields that have dependant fields in the same RegGroupField scope
-        for field in self.fields:
-            offset = field.get_offset()
-            deps = field.get_deps()
+        for field, begin, end, deps in members:
             if deps:
-                decoded_deps.update({dep: result[dep] for dep in deps if dep in result})
-                result[field.name] = field.decode(raw_data[offset - start: offset + field.get_size() - start],
-                                                **decoded_deps)
+                for dep in deps:
+                    if dep in result:
+                        decoded_deps[dep] = result[dep]
+                result[field.name] = field.decode(view[begin:end], **decoded_deps)
         return result
 
 class DateField(StringRegField):
@@ -0,0 +1,185 @@
+"""
+   latched_flags.py
+
+   Shared collection of the latched (clear-on-read) flag registers of xcvr modules.
+
+   Every flag API used to read its own latched registers, one transaction each, and any read of
+   a flag byte cleared it for every other reader. LatchedFlagCollector wraps the reader of a
+   module and reads each latched flag region in a single transaction. The flags read are
+   accumulated, per register read of the region, until that read consumes them: each flag API
+   sees every latched event once, whichever API caused the hardware read. The number of times
+   each flag was found set is kept in sticky counters.
+
+   Modules summarizing their flags in an interrupt indication are polled through it: while it
+   shows that no flag is latched, the regions are not read and their flags are all clear.
+"""
+
+import threading
+import time
+
+# Pending flags collected less than this many seconds ago are served without reading the module
+DEFAULT_MAX_AGE = 1.0
+
+class LatchedFlagRegion(object):
+    """
+    Latched flag bytes read in one transaction, and the flags collected from them
+    """
+    def __init__(self, offset, size):
+        self.offset = offset
+        self.size = size
+        # (offset, size) of each register read in the region -> flags not yet returned to it,
+        # None once returned
+        self.pending = {}
+        # content and time.monotonic() of the last read of the region
+        self.data = None
+        self.timestamp = None
+        # times each bit was found set, indexed by byte * 8 + bit
+        self.counters = [0] * (size * 8)
+
+    def contains(self, offset, size):
+        return self.offset <= offset and offset + size <= self.offset + self.size
+
+    def merge(self, data):
+        """
+        Add the flags of data, the content of the whole region, to every pending register read
+        """
+        self.data = bytes(data)
+        self.timestamp = time.monotonic()
+        for key, pending in self.pending.items():
+            begin = key[0] - self.offset
+            flags = data[begin:begin + key[1]]
+            if pending is None:
+                self.pending[key] = bytearray(flags)
+            else:
+                for i, value in enumerate(flags):
+                    pending[i] |= value
+        counters = self.counters
+        for i, value in enumerate(data):
+            while value:
+                bit = (value & -value).bit_length() - 1
+                counters[i * 8 + bit] += 1
+                value &= value - 1
+
+class LatchedFlagCollector(object):
+    """
+    Reader wrapper serving reads of latched flag registers from the flags collected.
+
+    Args:
+        reader: the module reader, as passed to XcvrEeprom
+        regions: (offset, size) of the latched flag areas, each read in one transaction
+        max_age: seconds during which flags collected for a region are served without reading
+                 the module again. Older pending flags are completed by a new read.
+        summary: (offset, quiet_mask) of the byte summarizing the flags, whose quiet_mask bits
+                 are all set when no flag is latched, None to always read the regions
+    """
+    def __init__(self, reader, regions, max_age=DEFAULT_MAX_AGE, summary=None):
+        self._reader = reader
+        self.regions = [LatchedFlagRegion(offset, size) for offset, size in regions]
+        self.max_age = max_age
+        self.summary = summary
+        self._lock = threading.Lock()
+
+    def _find_region(self, offset, size):
+        for region in self.regions:
+            if region.contains(offset, size):
+                return region
+        return None
+
+    def _collect_summary(self):
+        """
+        Read the summary and clear the flags of every region if it shows that none is latched
+
+        Returns:
+            Boolean, True if the regions do not need to be read
+        """
+        summary = self.summary
+        if summary is None:
+            return False
+        offset, quiet_mask = summary
+        data = self._reader(offset, 1)
+        if data is None or len(data) != 1 or data[0] & quiet_mask != quiet_mask:
+            return False
+        for region in self.regions:
+            region.merge(bytes(region.size))
+        return True
+
+    def _collect_region(self, region):
+        data = self._reader(region.offset, region.size)
+        if data is None or len(data) != region.size:
+            return False
+        region.merge(data)
+        return True
+
+    def _collect(self, region):
+        return self._collect_summary() or self._collect_region(region)
+
+    def collect(self):
+        """
+        Read every region, or only the summary if it shows that no flag is latched, e.g.
+        once per polling cycle ahead of the flag APIs
+
+        Returns:
+            Boolean, True if all the regions were read
+        """
+        with self._lock:
+            if self._collect_summary():
+                return True
+            return all([self._collect_region(region) for region in self.regions])
+
+    def reader(self, offset, size):
+        region = self._find_region(offset, size)
+        if region is None:
+            data = self._reader(offset, size)
+            if data is not None:
+                # Reads covering a whole region clear its flags, keep them for the other readers
+                with self._lock:
+                    for region in self.regions:
+                        begin = region.offset - offset
+                        if begin >= 0 and region.offset + region.size <= offset + len(data):
+                            region.merge(data[begin:begin + region.size])
+            return data
+
+        key = (offset, size)
+        with self._lock:
+            fresh = region.timestamp is not None and time.monotonic() - region.timestamp <= self.max_age
+            if key not in region.pending and fresh:
+                # First read of this register, served from the last read of the region
+                begin = offset - region.offset
+                region.pending[key] = bytearray(region.data[begin:begin + size])
+            pending = region.pending.get(key)
+            if pending is None or not fresh:
+                region.pending.setdefault(key, None)
+                if not self._collect(region):
+                    return None
+                pending = region.pending[key]
+            region.pending[key] = None
+        return pending
+
+    def get_counters(self):
+        """
+        Return: {(address, bit): number of reads the flag was found set}, for the flags
+        found set at least once
+        """
+        with self._lock:
+            return {(region.offset + index // 8, index % 8): count
+                    for region in self.regions
+                    for index, count in enumerate(region.counters) if count}
+
+    def reset_counters(self):
+        with self._lock:
+            for region in self.regions:
+                region.counters = [0] * (region.size * 8)
+
+def install_flag_collector(xcvr_eeprom, regions, summary=None):
+    """
+    Wrap the reader of xcvr_eeprom in a LatchedFlagCollector, unless it already is
+
+    Returns:
+        The LatchedFlagCollector reading the module
+    """
+    collector = getattr(xcvr_eeprom.reader, '__self__', None)
+    if isinstance(collector, LatchedFlagCollector):
+        return collector
+    collector = LatchedFlagCollector(xcvr_eeprom.reader, regions, summary=summary)
+    xcvr_eeprom.reader = collector.reader
+    return collector
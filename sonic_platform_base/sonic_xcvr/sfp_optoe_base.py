@@ -6,14 +6,81 @@
 """
 
 from ..sfp_base import SfpBase
+from .dom_snapshot import DomSnapshotReader
 
 SFP_OPTOE_PAGE_SELECT_OFFSET = 127
 SFP_OPTOE_UPPER_PAGE0_OFFSET = 128
 SFP_OPTOE_PAGE_SIZE = 128
 
 class SfpOptoeBase(SfpBase):
+    # Default age, in seconds, up to which the snapshots enabled by enable_dom_snapshot() are used
+    DOM_SNAPSHOT_MAX_AGE = 5.0
+
     def __init__(self):
         SfpBase.__init__(self)
+        self._dom_snapshot_reader = None
+        self._optoe_write_max = None
+
+    def enable_dom_snapshot(self, path, max_age=None):
+        """
+        Serves the monitoring values of this SFP from the snapshot file published at path by
+        the process polling the modules (see DomSnapshotPublisher), while they are at most
+        max_age seconds old (DOM_SNAPSHOT_MAX_AGE if None), and reads them from the module
+        otherwise. Called by the processes only reading the values (CLI, telemetry), never by
+        the publishing one.
+
+        The values go through JSON: tuples come back as lists and dictionary keys as strings.
+        The APIs published by default (SNAPSHOT_APIS) return dictionaries keyed by strings with
+        scalar values, which come back unchanged.
+        """
+        self.disable_dom_snapshot()
+        self._dom_snapshot_max_age = self.DOM_SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self._dom_snapshot_reader = DomSnapshotReader(path)
+
+    def disable_dom_snapshot(self):
+        """
+        Reads the monitoring values from the module again
+        """
+        reader = getattr(self, '_dom_snapshot_reader', None)
+        self._dom_snapshot_reader = None
+        if reader is not None:
+            reader.close()
+
+    def get_dom_snapshot_index(self):
+        """
+        Retrieves the slot of this SFP in the DOM snapshot file
+
+        Returns:
+            An integer, the 0-based slot index, or None if unknown
+        """
+        try:
+            position = self.get_position_in_parent()
+        except NotImplementedError:
+            return None
+        return position - 1 if position > 0 else None
+
+    def get_dom_snapshot(self):
+        """
+        Retrieves the snapshot published for this SFP
+
+        Returns:
+            A DomSnapshot no older than the max_age given to enable_dom_snapshot(), None if
+            there is none or snapshots are not enabled
+        """
+        reader = getattr(self, '_dom_snapshot_reader', None)
+        if reader is None:
+            return None
+        index = self.get_dom_snapshot_index()
+        if index is None:
+            return None
+        return reader.read(index, self._dom_snapshot_max_age)
+
+    def _get_monitored(self, api_name):
+        snapshot = self.get_dom_snapshot()
+        if snapshot is not None and api_name in snapshot.data:
+            return snapshot.data[api_name]
+        api = self.get_xcvr_api()
+        return getattr(api, api_name)() if api is not None else None
 
     def get_model(self):
         api = self.get_xcvr_api()
@@ -32,24 +99,20 @@ class SfpOptoeBase(SfpBase):
         return api.get_transceiver_info_firmware_versions() if api is not None else None
 
     def get_transceiver_dom_real_value(self):
-        api = self.get_xcvr_api()
-        return api.get_transceiver_dom_real_value() if api is not None else None
+        return self._get_monitored('get_transceiver_dom_real_value')
 
     def get_transceiver_dom_flags(self):
-        api = self.get_xcvr_api()
-        return api.get_transceiver_dom_flags() if api is not None else None
+        return self._get_monitored('get_transceiver_dom_flags')
 
     def get_transceiver_threshold_info(self):
         api = self.get_xcvr_api()
         return api.get_transceiver_threshold_info() if api is not None else None
 
     def get_transceiver_status(self):
-        api = self.get_xcvr_api()
-        return api.get_transceiver_status() if api is not None else None
+        return self._get_monitored('get_transceiver_status')
 
     def get_transceiver_status_flags(self):
-        api = self.get_xcvr_api()
-        return api.get_transceiver_status_flags() if api is not None else None
+        return self._get_monitored('get_transceiver_status_flags')
 
     def get_transceiver_loopback(self):
         api = self.get_xcvr_api()
@@ -273,6 +336,16 @@ class SfpOptoeBase(SfpBase):
     def set_power(self, mode):
         raise NotImplementedError
 
+    def refresh_xcvr_api(self):
+        SfpBase.refresh_xcvr_api(self)
+        self._apply_optoe_write_max()
+
+    def _apply_optoe_write_max(self):
+        write_max = getattr(self, '_optoe_write_max', None)
+        api = getattr(self, '_xcvr_api', None)
+        if write_max is not None and hasattr(api, 'set_staged_control_write_max'):
+            api.set_staged_control_write_max(write_max)
+
     def set_optoe_write_max(self, write_max):
         sys_path = self.get_eeprom_path()
         sys_path = sys_path.replace("eeprom", "write_max")
@@ -280,7 +353,10 @@ class SfpOptoeBase(SfpBase):
             with open(sys_path, mode='w') as f:
                 f.write(str(write_max))
         except (OSError, IOError):
-            pass
+            return
+        # Staged control registers are then committed in writes of up to write_max bytes
+        self._optoe_write_max = write_max
+        self._apply_optoe_write_max()
 
     def get_optoe_current_page(self):
         return self.read_eeprom(SFP_OPTOE_PAGE_SELECT_OFFSET, 1)[0]
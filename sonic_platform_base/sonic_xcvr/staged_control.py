@@ -0,0 +1,209 @@
+"""
+   staged_control.py
+
+   Coalesced writes of the Staged Control Set registers of CMIS modules.
+
+   Selecting the application and the signal integrity settings of the lanes of a module used to
+   write one lane register at a time, re-reading each register holding bit fields before
+   writing it. StagedControlShadow wraps the reader/writer of a module and, while a transaction
+   is open, keeps the staged registers in a shadow buffer: they are read once, field writes are
+   merged in memory, and the bytes changed are written when the transaction is committed, in as
+   few contiguous writes as the write_max of the driver allows. Staged registers only take
+   effect once the Apply registers are written, and any write outside of the shadowed registers
+   flushes the pending ones first.
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+
+# The optoe driver writes a single byte per I2C transaction until its write_max is raised
+DEFAULT_WRITE_MAX = 1
+
+class StagedControlShadow(object):
+    """
+    Reader/writer pair buffering the writes to a range of staged registers.
+
+    Args:
+        reader, writer: the module accessors, as passed to XcvrEeprom
+        offset, size: the staged registers, Apply registers excluded
+        write_max: maximum number of bytes written to the module at once
+
+    Usage:
+        with shadow.transaction():
+            api.set_application(...)
+            api.stage_custom_si_settings(...)
+        api.scs_apply_datapath_init(...)
+    """
+    def __init__(self, reader, writer, offset, size, write_max=DEFAULT_WRITE_MAX):
+        self._reader = reader
+        self._writer = writer
+        self.offset = offset
+        self.size = size
+        self.write_max = write_max
+        # Held by the thread owning the open transaction
+        self._lock = threading.RLock()
+        self._depth = 0
+        # Content of the registers in the module, None until read
+        self._module = None
+        # Index in the registers -> byte to write
+        self._pending = {}
+
+    def _contains(self, offset, size):
+        return self.offset <= offset and offset + size <= self.offset + self.size
+
+    def _overlaps(self, offset, size):
+        return offset < self.offset + self.size and self.offset < offset + size
+
+    def _get_runs(self):
+        """
+        Return: [(begin, end)] index ranges to write, each as long as write_max at most and
+        starting and ending with a changed byte
+        """
+        module = self._module
+        changed = sorted(i for i, value in self._pending.items()
+                         if module is None or module[i] != value)
+        write_max = max(1, self.write_max)
+        runs = []
+        for i in changed:
+            if runs:
+                begin, end = runs[-1]
+                # Unchanged bytes in between are rewritten if known, to save a transaction
+                if i - begin < write_max and (i == end or module is not None):
+                    runs[-1] = (begin, i + 1)
+                    continue
+            runs.append((i, i + 1))
+        return runs
+
+    def _flush(self):
+        pending = self._pending
+        if not pending:
+            return True
+        runs = self._get_runs()
+        self._pending = {}
+        for begin, end in runs:
+            data = bytearray(pending[i] if i in pending else self._module[i] for i in range(begin, end))
+            if not self._writer(self.offset + begin, end - begin, data):
+                self._module = None
+                return False
+        if self._module is not None:
+            for i, value in pending.items():
+                self._module[i] = value
+        return True
+
+    def begin(self):
+        """
+        Open a transaction, or nest into the one open in this thread. Other threads accessing
+        the staged registers wait until it is committed or discarded.
+        """
+        self._lock.acquire()
+        self._depth += 1
+
+    def _end(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._module = None
+            self._pending = {}
+        self._lock.release()
+
+    def commit(self):
+        """
+        Close the transaction, writing the pending registers if it is the outermost one
+
+        Returns:
+            Boolean, True if the registers were written
+        """
+        try:
+            return self._depth > 1 or self._flush()
+        finally:
+            self._end()
+
+    def discard(self):
+        """
+        Close the transaction, dropping the pending registers if it is the outermost one
+        """
+        if self._depth == 1:
+            self._pending = {}
+        self._end()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager committing on exit, or discarding if an exception is raised
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.discard()
+            raise
+        self.commit()
+
+    def reader(self, offset, size):
+        if self._depth == 0 or not self._overlaps(offset, size):
+            return self._reader(offset, size)
+        with self._lock:
+            if self._depth == 0:
+                return self._reader(offset, size)
+            if not self._contains(offset, size):
+                return self._reader(offset, size) if self._flush() else None
+            if self._module is None:
+                data = self._reader(self.offset, self.size)
+                if data is None or len(data) != self.size:
+                    return None
+                self._module = bytearray(data)
+            begin = offset - self.offset
+            data = self._module[begin:begin + size]
+            for i in range(size):
+                data[i] = self._pending.get(begin + i, data[i])
+            return data
+
+    def writer(self, offset, size, write_buffer):
+        if self._depth == 0:
+            return self._writer(offset, size, write_buffer)
+        with self._lock:
+            if self._depth == 0:
+                return self._writer(offset, size, write_buffer)
+            if not self._contains(offset, size):
+                # e.g. the Apply registers, which act on the staged ones
+                return self._flush() and self._writer(offset, size, write_buffer)
+            begin = offset - self.offset
+            for i in range(size):
+                self._pending[begin + i] = write_buffer[i]
+            return True
+
+def install_staged_control(xcvr_eeprom, offset, size):
+    """
+    Wrap the reader and writer of xcvr_eeprom in a StagedControlShadow, unless they already are
+
+    Returns:
+        The StagedControlShadow accessing the module
+    """
+    shadow = getattr(xcvr_eeprom.writer, '__self__', None)
+    if isinstance(shadow, StagedControlShadow):
+        return shadow
+    shadow = StagedControlShadow(xcvr_eeprom.reader, xcvr_eeprom.writer, offset, size)
+    xcvr_eeprom.reader = shadow.reader
+    xcvr_eeprom.writer = shadow.writer
+    return shadow
+
+def staged_control_transaction(func):
+    """
+    Run an XcvrApi method within a transaction of its staged_control shadow, if any.
+    The method returns False if the staged registers could not be written.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        shadow = getattr(self, 'staged_control', None)
+        if shadow is None:
+            return func(self, *args, **kwargs)
+        shadow.begin()
+        try:
+            result = func(self, *args, **kwargs)
+        except BaseException:
+            shadow.discard()
+            raise
+        if not shadow.commit():
+            return False
+        return result
+    return wrapper
@@ -0,0 +1,247 @@
+"""
+   static_page_cache.py
+
+   Persistent cache of the static EEPROM areas of xcvr modules.
+
+   The static pages of a module (vendor info, advertisements, thresholds, VDM descriptors) never
+   change while the same module runs the same firmware, yet are re-read over I2C each time an
+   XcvrApi is created, e.g. on every xcvrd restart. StaticPageCache wraps the reader/writer of a
+   module and serves reads falling into its static regions from memory, backed by one small file
+   per module identity (vendor, part number, serial number, firmware revision) in a cache
+   directory. The identity is re-read from the module when the cache is validated, so a swapped
+   module or a new firmware is never served stale data.
+
+   Regions read from the module are saved in batches: once all the static regions of the module
+   are cached, or on the next access SAVE_DELAY seconds after the first region not saved yet.
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+
+PAGE_SIZE = 128
+
+def upper_page(page, begin=128, end=256):
+    """
+    Return: (offset, size) of bytes begin to end - 1 of an upper page in linear addressing
+    """
+    return (page * PAGE_SIZE + begin, end - begin)
+
+# Identifier, revision and memory model; active firmware revision; vendor name to serial number
+CMIS_IDENTITY_REGIONS = [(0, 3), (39, 2), upper_page(0x0, 129, 182)]
+
+# Page 00h; page 01h except the inactive firmware revision; thresholds; VDM descriptors
+CMIS_STATIC_REGIONS = [upper_page(0x0), upper_page(0x1, 130), upper_page(0x2)] + \
+                      [upper_page(page) for page in range(0x20, 0x24)]
+CMIS_FLAT_STATIC_REGIONS = [upper_page(0x0)]
+
+# Writes at or above this address (CDB command and payload pages) may switch the running
+# firmware, after which the module identity has to be read again
+CMIS_CDB_ADDR = 0x9f * PAGE_SIZE + 128
+
+# Seconds for which regions newly read from the module may wait to be saved with the next ones
+SAVE_DELAY = 10.0
+
+class StaticPageStore(object):
+    """
+    Directory of static page images, one file per module identity.
+
+    File format, big endian:
+        magic 'XSPC', version (1 byte), identity length (2 bytes), identity,
+        region count (2 bytes), then per region: offset (4 bytes), size (2 bytes), data
+    """
+    MAGIC = b'XSPC'
+    VERSION = 1
+    HEADER = struct.Struct('>4sBH')
+    COUNT = struct.Struct('>H')
+    REGION = struct.Struct('>IH')
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, identity):
+        return os.path.join(self.directory, hashlib.sha1(identity).hexdigest() + '.bin')
+
+    def load(self, identity):
+        """
+        Return: {offset: bytes} of the regions stored for identity, empty if none or invalid
+        """
+        try:
+            with open(self._path(identity), 'rb') as f:
+                data = f.read()
+        except (OSError, IOError):
+            return {}
+
+        regions = {}
+        try:
+            magic, version, identity_len = self.HEADER.unpack_from(data, 0)
+            pos = self.HEADER.size
+            if magic != self.MAGIC or version != self.VERSION or \
+                    data[pos:pos + identity_len] != identity:
+                return {}
+            pos += identity_len
+            count, = self.COUNT.unpack_from(data, pos)
+            pos += self.COUNT.size
+            for _ in range(count):
+                offset, size = self.REGION.unpack_from(data, pos)
+                pos += self.REGION.size
+                if pos + size > len(data):
+                    return {}
+                regions[offset] = data[pos:pos + size]
+                pos += size
+        except struct.error:
+            return {}
+        return regions
+
+    def save(self, identity, regions):
+        """
+        Atomically replace the regions stored for identity
+
+        Returns:
+            Boolean, True if the file was written
+        """
+        regions = sorted(regions.items())
+        chunks = [self.HEADER.pack(self.MAGIC, self.VERSION, len(identity)), identity,
+                  self.COUNT.pack(len(regions))]
+        for offset, data in regions:
+            chunks.append(self.REGION.pack(offset, len(data)))
+            chunks.append(bytes(data))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(b''.join(chunks))
+                os.replace(tmp_path, self._path(identity))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except (OSError, IOError):
+            return False
+        return True
+
+class StaticPageCache(object):
+    """
+    Reader/writer pair serving the static regions of a module from a StaticPageStore. The pair
+    may be used from several threads, the module reads being made out of the lock.
+
+    Args:
+        reader, writer: the module accessors, as passed to XcvrEeprom
+        store: StaticPageStore holding the images
+        static_regions: (offset, size) of the areas that only change with the module identity
+        identity_regions: (offset, size) of the areas identifying the module and its firmware
+        stale_write_addr: writes at or above this address invalidate the identity, None if no
+                          write can change it
+    """
+    def __init__(self, reader, writer, store, static_regions, identity_regions, stale_write_addr=None):
+        self._reader = reader
+        self._writer = writer
+        self.store = store
+        self.static_regions = sorted(static_regions)
+        self.identity_regions = identity_regions
+        self.stale_write_addr = stale_write_addr
+        self.identity = None
+        self.regions = {}
+        self._stale = True
+        # time.monotonic() of the first region not saved yet, None if all are saved
+        self._unsaved_since = None
+        self._lock = threading.RLock()
+
+    def validate(self):
+        """
+        Read the module identity and load the images stored for it if it changed
+
+        Returns:
+            Boolean, True if static reads can be served from the cache
+        """
+        self._stale = False
+        chunks = []
+        for offset, size in self.identity_regions:
+            data = self._reader(offset, size)
+            if data is None or len(data) != size:
+                with self._lock:
+                    self.flush()
+                    self.identity = None
+                    self.regions = {}
+                return False
+            chunks.append(bytes(data))
+        identity = b''.join(chunks)
+        with self._lock:
+            if identity != self.identity:
+                self.flush()
+                self.identity = identity
+                self.regions = {offset: data for offset, data in self.store.load(identity).items()
+                                if (offset, len(data)) in self.static_regions}
+        return True
+
+    def invalidate(self):
+        """
+        Drop the cached images of the module, in memory and on disk
+        """
+        with self._lock:
+            self.regions = {}
+            self._save()
+
+    def flush(self):
+        """
+        Save the regions read from the module and not saved yet
+        """
+        with self._lock:
+            if self._unsaved_since is not None:
+                self._save()
+
+    def _save(self):
+        self._unsaved_since = None
+        if self.identity is not None:
+            self.store.save(self.identity, dict(self.regions))
+
+    def _find_region(self, offset, size):
+        for begin, length in self.static_regions:
+            if begin <= offset and offset + size <= begin + length:
+                return begin, length
+            if begin > offset:
+                break
+        return None
+
+    def reader(self, offset, size):
+        if self._unsaved_since is not None and time.monotonic() - self._unsaved_since >= SAVE_DELAY:
+            self.flush()
+        region = self._find_region(offset, size)
+        if region is None:
+            return self._reader(offset, size)
+        if self._stale and not self.validate():
+            return self._reader(offset, size)
+
+        begin, length = region
+        data = self.regions.get(begin)
+        if data is None:
+            identity = self.identity
+            data = self._reader(begin, length)
+            if data is None or len(data) != length:
+                return self._reader(offset, size)
+            data = bytes(data)
+            with self._lock:
+                # Not kept if the module identity changed meanwhile
+                if identity == self.identity:
+                    self.regions[begin] = data
+                    if len(self.regions) == len(self.static_regions):
+                        self._save()
+                    elif self._unsaved_since is None:
+                        self._unsaved_since = time.monotonic()
+        return bytearray(data[offset - begin:offset - begin + size])
+
+    def writer(self, offset, size, write_buffer):
+        with self._lock:
+            dropped = False
+            for begin, length in self.static_regions:
+                if offset < begin + length and begin < offset + size:
+                    dropped = self.regions.pop(begin, None) is not None or dropped
+            # Saved at once, the stored image must not outlive the data written
+            if dropped:
+                self._save()
+        if self.stale_write_addr is not None and offset + size > self.stale_write_addr:
+            self._stale = True
+        return self._writer(offset, size, write_buffer)
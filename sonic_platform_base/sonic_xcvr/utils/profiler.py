@@ -0,0 +1,209 @@
+"""
+   profiler.py
+
+   Opt-in I2C transaction profiler for XcvrApi objects.
+
+   XcvrProfiler.instrument(api) wraps the reader/writer of the api's XcvrEeprom, its field
+   accessors and the public methods of the api, so that each EEPROM transaction is attributed
+   to the outermost XcvrApi method being executed and to the field being accessed. Nothing is
+   changed on objects that are not instrumented, and remove() restores the api.
+"""
+
+from bisect import bisect_left
+import inspect
+import threading
+import time
+
+# Upper bounds, in microseconds, of the latency histogram buckets. Slower transactions are
+# counted in a last, unbounded bucket.
+LATENCY_BUCKETS_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000)
+
+# Method and field names of transactions issued outside of any api method or field access
+UNATTRIBUTED = '<none>'
+RAW_READ = '<read_raw>'
+RAW_WRITE = '<write_raw>'
+
+class XcvrProfilerStats(object):
+    """
+    Accumulated cost of the transactions of one (method, field, operation)
+    """
+    __slots__ = ('count', 'bytes', 'latency', 'duplicates', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.latency = 0.0
+        self.duplicates = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_US) + 1)
+
+    def add(self, size, latency):
+        self.count += 1
+        self.bytes += size
+        self.latency += latency
+        self.histogram[bisect_left(LATENCY_BUCKETS_US, latency * 1e6)] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'bytes': self.bytes,
+            'latency': self.latency,
+            'duplicates': self.duplicates,
+            'histogram': list(self.histogram),
+        }
+
+class _CallContext(threading.local):
+    def __init__(self):
+        # Names of the api methods being executed, outermost first
+        self.methods = []
+        # Fields being accessed, innermost last
+        self.fields = []
+        # (offset, size) of the reads issued by the outermost method so far
+        self.reads = set()
+
+class XcvrProfiler(object):
+    """
+    Records the EEPROM transactions of one or more instrumented XcvrApi objects.
+
+    Usage:
+        profiler = XcvrProfiler()
+        profiler.instrument(api)
+        api.get_transceiver_info()
+        profiler.to_dict()
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._context = _CallContext()
+        self._instrumented = []
+        self.reset()
+
+    def reset(self):
+        """
+        Drop the transactions recorded so far
+        """
+        with self._lock:
+            # (outermost method, field, 'read' or 'write') -> XcvrProfilerStats
+            self.stats = {}
+            # (method stack..., field, operation) -> seconds
+            self.stacks = {}
+
+    def _record(self, op, offset, size, latency):
+        ctx = self._context
+        method = ctx.methods[0] if ctx.methods else UNATTRIBUTED
+        field = ctx.fields[-1] if ctx.fields else (RAW_READ if op == 'read' else RAW_WRITE)
+        key = (method, field, op)
+        stack = tuple(ctx.methods) + (field, op)
+        duplicate = False
+        if op == 'read' and ctx.methods:
+            duplicate = (offset, size) in ctx.reads
+            ctx.reads.add((offset, size))
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = XcvrProfilerStats()
+            stats.add(size, latency)
+            if duplicate:
+                stats.duplicates += 1
+            self.stacks[stack] = self.stacks.get(stack, 0.0) + latency
+
+    def _wrap_reader(self, reader):
+        def profiled_reader(offset, size):
+            start = time.perf_counter()
+            try:
+                return reader(offset, size)
+            finally:
+                self._record('read', offset, size, time.perf_counter() - start)
+        return profiled_reader
+
+    def _wrap_writer(self, writer):
+        def profiled_writer(offset, size, write_buffer):
+            start = time.perf_counter()
+            try:
+                return writer(offset, size, write_buffer)
+            finally:
+                self._record('write', offset, size, time.perf_counter() - start)
+        return profiled_writer
+
+    def _wrap_field_access(self, access):
+        def profiled_access(field_name, *args, **kwargs):
+            fields = self._context.fields
+            fields.append(field_name)
+            try:
+                return access(field_name, *args, **kwargs)
+            finally:
+                fields.pop()
+        return profiled_access
+
+    def _wrap_method(self, name, method):
+        def profiled_method(*args, **kwargs):
+            ctx = self._context
+            ctx.methods.append(name)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                ctx.methods.pop()
+                if not ctx.methods:
+                    ctx.reads.clear()
+        profiled_method.__name__ = name
+        profiled_method.__doc__ = method.__doc__
+        return profiled_method
+
+    def instrument(self, api):
+        """
+        Start profiling the EEPROM transactions of api. The reader and writer are wrapped on the
+        XcvrEeprom object of api, so sub-APIs sharing it (e.g. VDM and CDB of CMIS modules) are
+        profiled too and their transactions attributed to the api method calling them.
+        """
+        eeprom = api.xcvr_eeprom
+        saved_eeprom = {'reader': eeprom.reader, 'writer': eeprom.writer}
+        eeprom.reader = self._wrap_reader(eeprom.reader)
+        eeprom.writer = self._wrap_writer(eeprom.writer)
+        eeprom.read = self._wrap_field_access(eeprom.read)
+        eeprom.write = self._wrap_field_access(eeprom.write)
+
+        methods = []
+        for name, _ in inspect.getmembers(type(api), inspect.isfunction):
+            if name.startswith('_') or name in api.__dict__:
+                continue
+            setattr(api, name, self._wrap_method(name, getattr(api, name)))
+            methods.append(name)
+        self._instrumented.append((api, saved_eeprom, methods))
+        return api
+
+    def remove(self, api=None):
+        """
+        Stop profiling api, or every instrumented api if None
+        """
+        remaining = []
+        for entry in self._instrumented:
+            instrumented_api, saved_eeprom, methods = entry
+            if api is not None and instrumented_api is not api:
+                remaining.append(entry)
+                continue
+            eeprom = instrumented_api.xcvr_eeprom
+            eeprom.__dict__.update(saved_eeprom)
+            del eeprom.read
+            del eeprom.write
+            for name in methods:
+                delattr(instrumented_api, name)
+        self._instrumented = remaining
+
+    def to_dict(self):
+        """
+        Return: {method: {field: {'read'|'write': {'count', 'bytes', 'latency', 'duplicates',
+        'histogram'}}}}, latency in seconds and histogram counts per LATENCY_BUCKETS_US bucket
+        """
+        result = {}
+        with self._lock:
+            for (method, field, op), stats in self.stats.items():
+                result.setdefault(method, {}).setdefault(field, {})[op] = stats.to_dict()
+        return result
+
+    def to_folded(self):
+        """
+        Return: the recorded time in the folded stack format read by flamegraph.pl and
+        speedscope, one 'method;...;field;operation microseconds' line per call path
+        """
+        with self._lock:
+            stacks = sorted(self.stacks.items())
+        return '\n'.join("%s %d" % (';'.join(stack), round(latency * 1e6))
+                         for stack, latency in stacks)
@@ -6,37 +6,7 @@
 """
 
 from .xcvr_eeprom import XcvrEeprom
-# TODO: remove the following imports
-from .codes.public.cmis import CmisCodes
-from .api.public.cmis import CmisApi
-from .api.public.c_cmis import CCmisApi
-from .mem_maps.public.cmis import CmisMemMap
-from .mem_maps.public.c_cmis import CCmisMemMap
-from .mem_maps.public.cdb import CdbMemMap
-from .cdb.cdb_fw import CdbFwHandler as CdbFw
-from .codes.public.cdb import CdbCodes
-
-from .codes.credo.aec_800g import CmisAec800gCodes
-from .api.credo.aec_800g import CmisAec800gApi
-from .mem_maps.credo.aec_800g import CmisAec800gMemMap
-
-from .api.innolight.fr_800g import CmisFr800gApi
-
-from .api.amphenol.backplane import AmphBackplaneImpl
-from .mem_maps.amphenol.backplane import AmphBackplaneMemMap
-from .codes.amphenol.backplane import AmphBackplaneCodes
-
-from .codes.public.sff8436 import Sff8436Codes
-from .api.public.sff8436 import Sff8436Api
-from .mem_maps.public.sff8436 import Sff8436MemMap
-
-from .codes.public.sff8636 import Sff8636Codes
-from .api.public.sff8636 import Sff8636Api
-from .mem_maps.public.sff8636 import Sff8636MemMap
-
-from .codes.public.sff8472 import Sff8472Codes
-from .api.public.sff8472 import Sff8472Api
-from .mem_maps.public.sff8472 import Sff8472MemMap
+from .xcvr_api_registry import XcvrApiBundle, XcvrApiRegistry
 
 VENDOR_NAME_OFFSET = 129
 VENDOR_PART_NUM_OFFSET = 148
@@ -47,10 +17,56 @@ CREDO_800G_AEC_VENDOR_PN_LIST = ["CAC81X321M2MC1MS", "CAC815321M2MC1MS", "CAC82X
 INL_800G_VENDOR_PN_LIST = ["T-DL8CNT-NCI", "T-DH8CNT-NCI", "T-DH8CNT-N00", "T-DP4CNH-NCI", "T-DP8CNT-NNO", "T-DP8CNH-NNO", "T-DC8CNT-NNO", "T-DP8CNL-NNO", "T-OL8CNT-N00", "T-OH8CNH-N00"]
 EOP_800G_VENDOR_PN_LIST = ["EOLD-168HG-02-41", "EOLD-138HG-02-41"]
 
+# Implementations are imported by the first transceiver needing them
+CMIS_API_BUNDLE = XcvrApiBundle('.codes.public.cmis:CmisCodes', '.mem_maps.public.cmis:CmisMemMap',
+                                '.api.public.cmis:CmisApi')
+C_CMIS_API_BUNDLE = XcvrApiBundle('.codes.public.cmis:CmisCodes', '.mem_maps.public.c_cmis:CCmisMemMap',
+                                  '.api.public.c_cmis:CCmisApi')
+CDB_FW_BUNDLE = XcvrApiBundle('.codes.public.cdb:CdbCodes', '.mem_maps.public.cdb:CdbMemMap',
+                              '.cdb.cdb_fw:CdbFwHandler')
+CREDO_AEC_800G_API_BUNDLE = XcvrApiBundle('.codes.credo.aec_800g:CmisAec800gCodes',
+                                          '.mem_maps.credo.aec_800g:CmisAec800gMemMap',
+                                          '.api.credo.aec_800g:CmisAec800gApi')
+FR_800G_API_BUNDLE = XcvrApiBundle('.codes.public.cmis:CmisCodes', '.mem_maps.public.cmis:CmisMemMap',
+                                   '.api.innolight.fr_800g:CmisFr800gApi')
+SFF8436_API_BUNDLE = XcvrApiBundle('.codes.public.sff8436:Sff8436Codes', '.mem_maps.public.sff8436:Sff8436MemMap',
+                                   '.api.public.sff8436:Sff8436Api')
+SFF8636_API_BUNDLE = XcvrApiBundle('.codes.public.sff8636:Sff8636Codes', '.mem_maps.public.sff8636:Sff8636MemMap',
+                                   '.api.public.sff8636:Sff8636Api')
+SFF8472_API_BUNDLE = XcvrApiBundle('.codes.public.sff8472:Sff8472Codes', '.mem_maps.public.sff8472:Sff8472MemMap',
+                                   '.api.public.sff8472:Sff8472Api')
+AMPH_BACKPLANE_API_BUNDLE = XcvrApiBundle('.codes.amphenol.backplane:AmphBackplaneCodes',
+                                          '.mem_maps.amphenol.backplane:AmphBackplaneMemMap',
+                                          '.api.amphenol.backplane:AmphBackplaneImpl')
+
+def create_default_registry():
+    """
+    Return: XcvrApiRegistry of the implementations of this tree
+    """
+    registry = XcvrApiRegistry()
+    # Optics implementations per their ID as per SFF8024
+    registry.register_id(0x03, SFF8472_API_BUNDLE)
+    registry.register_id(0x0D, '_create_qsfp_api')
+    registry.register_id(0x11, SFF8636_API_BUNDLE)
+    for identifier in (0x18, 0x19, 0x1b, 0x1e):
+        registry.register_id(identifier, '_create_cmis_api')
+    registry.register_id(0x7e, AMPH_BACKPLANE_API_BUNDLE)
+
+    registry.register_vendor('Credo', CREDO_800G_AEC_VENDOR_PN_LIST, CREDO_AEC_800G_API_BUNDLE)
+    registry.register_vendor('*INNOLIGHT*', INL_800G_VENDOR_PN_LIST, FR_800G_API_BUNDLE)
+    registry.register_vendor('*EOPTOLINK*', EOP_800G_VENDOR_PN_LIST, FR_800G_API_BUNDLE)
+    return registry
+
+xcvr_api_registry = create_default_registry()
+
 class XcvrApiFactory(object):
-    def __init__(self, reader, writer):
+    def __init__(self, reader, writer, static_cache_dir=None, registry=None):
         self.reader = reader
         self.writer = writer
+        # Directory of the persistent static page cache of CMIS modules, None to disable it
+        self.static_cache_dir = static_cache_dir
+        # XcvrApiRegistry of the implementations to choose from
+        self.registry = registry if registry is not None else xcvr_api_registry
 
     def _get_id(self):
         id_byte_raw = self.reader(0, 1)
@@ -78,24 +94,47 @@ class XcvrApiFactory(object):
        vendor_pn = part_num.decode()
        return vendor_pn.strip()
 
+    def _get_cmis_accessors(self):
+        """
+        Return: (reader, writer) of a CMIS module, going through the static page cache if enabled
+        """
+        if self.static_cache_dir is None:
+            return self.reader, self.writer
+        from .static_page_cache import (
+            CMIS_CDB_ADDR,
+            CMIS_FLAT_STATIC_REGIONS,
+            CMIS_IDENTITY_REGIONS,
+            CMIS_STATIC_REGIONS,
+            StaticPageCache,
+            StaticPageStore,
+        )
+        mem_model = self.reader(2, 1)
+        if mem_model is None:
+            return self.reader, self.writer
+        flat_mem = bool(mem_model[0] & 0x80)
+        cache = StaticPageCache(self.reader, self.writer, StaticPageStore(self.static_cache_dir),
+                                CMIS_FLAT_STATIC_REGIONS if flat_mem else CMIS_STATIC_REGIONS,
+                                CMIS_IDENTITY_REGIONS, CMIS_CDB_ADDR)
+        if not cache.validate():
+            return self.reader, self.writer
+        return cache.reader, cache.writer
+
     def _create_cmis_api(self):
         api = None
         vendor_name = self._get_vendor_name()
         vendor_pn = self._get_vendor_part_num()
+        reader, writer = self._get_cmis_accessors()
 
-        if vendor_name == 'Credo' and vendor_pn in CREDO_800G_AEC_VENDOR_PN_LIST:
-            api = self._create_api(CmisAec800gCodes, CmisAec800gMemMap, CmisAec800gApi)
-        elif ('INNOLIGHT' in vendor_name and vendor_pn in INL_800G_VENDOR_PN_LIST) or \
-             ('EOPTOLINK' in vendor_name and vendor_pn in EOP_800G_VENDOR_PN_LIST):
-            api = self._create_api(CmisCodes, CmisMemMap, CmisFr800gApi)
+        bundle = self.registry.match_vendor(vendor_name, vendor_pn)
+        if bundle is not None:
+            api = self._create_bundle_api(bundle, reader, writer)
         else:
-            cdb_mem_map = CdbMemMap(CdbCodes)
-            cdb_fw = CdbFw(self.reader, self.writer, cdb_mem_map)
-            xcvr_eeprom = XcvrEeprom(self.reader, self.writer, CmisMemMap(CmisCodes))
-            api = CmisApi(xcvr_eeprom, cdb_fw)
+            # The CDB memory map is not shared, its commands being built per request
+            cdb_codes, cdb_mem_map_class, cdb_fw_class = CDB_FW_BUNDLE.load()
+            cdb_fw = cdb_fw_class(reader, writer, cdb_mem_map_class(cdb_codes))
+            api = self._create_bundle_api(CMIS_API_BUNDLE, reader, writer, cdb_fw)
             if api.is_coherent_module():
-                xcvr_eeprom = XcvrEeprom(self.reader, self.writer, CCmisMemMap(CmisCodes))
-                api = CCmisApi(xcvr_eeprom, cdb_fw)
+                api = self._create_bundle_api(C_CMIS_API_BUNDLE, reader, writer, cdb_fw)
         return api
 
     def _create_qsfp_api(self):
@@ -104,39 +143,32 @@ class XcvrApiFactory(object):
         """
         revision_compliance = self._get_revision_compliance()
         if revision_compliance >= 3:
-            return self._create_api(Sff8636Codes, Sff8636MemMap, Sff8636Api)
+            return self._create_bundle_api(SFF8636_API_BUNDLE)
         else:
-            return self._create_api(Sff8436Codes, Sff8436MemMap, Sff8436Api)
+            return self._create_bundle_api(SFF8436_API_BUNDLE)
 
-    def _create_api(self, codes_class, mem_map_class, api_class):
+    def _create_api(self, codes_class, mem_map_class, api_class, reader=None, writer=None):
         codes = codes_class
         mem_map = mem_map_class(codes)
-        xcvr_eeprom = XcvrEeprom(self.reader, self.writer, mem_map)
+        xcvr_eeprom = XcvrEeprom(reader or self.reader, writer or self.writer, mem_map)
         return api_class(xcvr_eeprom)
 
+    def _create_bundle_api(self, bundle, reader=None, writer=None, cdb_fw=None):
+        xcvr_eeprom = XcvrEeprom(reader or self.reader, writer or self.writer, bundle.get_mem_map())
+        if cdb_fw is not None:
+            return bundle.get_api_class()(xcvr_eeprom, cdb_fw)
+        return bundle.get_api_class()(xcvr_eeprom)
+
     def create_xcvr_api(self):
         id = self._get_id()
 
-        # Instantiate various Optics implementation based upon their respective ID as per SFF8024
-        id_mapping = {
-            0x03: (self._create_api, (Sff8472Codes, Sff8472MemMap, Sff8472Api)),
-            0x0D: (self._create_qsfp_api, ()),
-            0x11: (self._create_api, (Sff8636Codes, Sff8636MemMap, Sff8636Api)),
-            0x18: (self._create_cmis_api, ()),
-            0x19: (self._create_cmis_api, ()),
-            0x1b: (self._create_cmis_api, ()),
-            0x1e: (self._create_cmis_api, ()),
-            0x7e: (self._create_api, (AmphBackplaneCodes,
-                                     AmphBackplaneMemMap, AmphBackplaneImpl)),
-        }
-
-        # Check if the ID exists in the mapping
-        if id in id_mapping:
-            func, args = id_mapping[id]
-            if isinstance(args, tuple):
-                try:
-                    return func(*args)
-                except Exception as e:
-                    print(f"Error creating API: {e}")
-                    return None
-        return None
+        handler = self.registry.get_id_handler(id)
+        if handler is None:
+            return None
+        try:
+            if isinstance(handler, XcvrApiBundle):
+                return self._create_bundle_api(handler)
+            return getattr(self, handler)()
+        except Exception as e:
+            print(f"Error creating API: {e}")
+            return None
@@ -0,0 +1,157 @@
+"""
+    xcvr_api_registry.py
+
+    Registry of the XcvrApi implementations selected by XcvrApiFactory.
+
+    Module types are registered by their SFF-8024 identifier and vendor specific implementations
+    by vendor name and part number, each with an XcvrApiBundle naming its codes, memory map and
+    API classes. The modules of a bundle are only imported the first time a transceiver needs it,
+    so that importing the factory does not import every implementation.
+
+    Implementations maintained out of this tree register themselves through the entry point group
+    ENTRY_POINT_GROUP, whose entry points are callables taking the registry, e.g. in setup.py:
+
+        entry_points={
+            'sonic_platform_base.xcvr_api': ['acme = acme_xcvr.registry:register'],
+        }
+
+    with:
+
+        def register(registry):
+            registry.register_vendor('ACME', ['ACME-800G-DR8'],
+                                     XcvrApiBundle('acme_xcvr.codes:AcmeCodes',
+                                                   'acme_xcvr.mem_map:AcmeMemMap',
+                                                   'acme_xcvr.api:AcmeApi'))
+"""
+
+import importlib
+import sys
+from fnmatch import fnmatchcase
+
+ENTRY_POINT_GROUP = 'sonic_platform_base.xcvr_api'
+
+# Package against which the relative class paths of bundles are resolved
+BUNDLE_PACKAGE = 'sonic_platform_base.sonic_xcvr'
+
+# Characters making a part number a pattern rather than an exact part number
+PATTERN_CHARS = '*?['
+
+def resolve_class(path):
+    """
+    Return: class named by path, 'module:name' with module relative to BUNDLE_PACKAGE if
+    starting with a dot, path itself if already a class
+    """
+    if not isinstance(path, str):
+        return path
+    module_name, _, name = path.partition(':')
+    module = importlib.import_module(module_name, BUNDLE_PACKAGE if module_name.startswith('.') else None)
+    return getattr(module, name)
+
+class XcvrApiBundle(object):
+    """
+    Codes, memory map and API classes of a transceiver implementation, imported on first use.
+    The memory map only describes the fields, so a single one is shared by all the ports.
+
+    Args:
+        codes, mem_map, api: class, or its path as 'module:name'
+    """
+    def __init__(self, codes, mem_map, api):
+        self._paths = (codes, mem_map, api)
+        self._classes = None
+        self._mem_map = None
+
+    def load(self):
+        """
+        Return: (codes, mem_map, api) classes
+        """
+        if self._classes is None:
+            self._classes = tuple(resolve_class(path) for path in self._paths)
+        return self._classes
+
+    def get_mem_map(self):
+        """
+        Return: memory map instance of the bundle
+        """
+        if self._mem_map is None:
+            codes, mem_map_class, _ = self.load()
+            self._mem_map = mem_map_class(codes)
+        return self._mem_map
+
+    def get_api_class(self):
+        return self.load()[2]
+
+class XcvrApiRegistry(object):
+    """
+    Transceiver implementations by SFF-8024 identifier and by vendor name and part number.
+
+    Identifiers map to an XcvrApiBundle, or to the name of the XcvrApiFactory method creating
+    the API when the choice depends on more than the identifier. Vendor entries are looked up
+    by exact part number, then by part number pattern; registering again overrides the entries
+    registered before, so that out of tree implementations take precedence.
+    """
+    def __init__(self, load_entry_points=True):
+        # identifier -> XcvrApiBundle or XcvrApiFactory method name
+        self._ids = {}
+        # part number -> [(vendor name pattern, XcvrApiBundle)], last registered first
+        self._part_numbers = {}
+        # [(vendor name pattern, part number pattern, XcvrApiBundle)], last registered first
+        self._patterns = []
+        self._entry_points_loaded = not load_entry_points
+
+    def register_id(self, identifier, handler):
+        self._ids[identifier] = handler
+
+    def register_vendor(self, vendor_name, part_numbers, bundle):
+        """
+        Register bundle for the modules of vendor_name (fnmatch pattern, e.g. '*INNOLIGHT*')
+        whose part number is one of part_numbers (exact part numbers or fnmatch patterns)
+        """
+        for part_number in part_numbers:
+            if any(char in part_number for char in PATTERN_CHARS):
+                self._patterns.insert(0, (vendor_name, part_number, bundle))
+            else:
+                self._part_numbers.setdefault(part_number, []).insert(0, (vendor_name, bundle))
+
+    def load_entry_points(self):
+        """
+        Let the implementations installed out of this tree register themselves
+        """
+        self._entry_points_loaded = True
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:
+            return
+        eps = entry_points()
+        if hasattr(eps, 'select'):
+            eps = eps.select(group=ENTRY_POINT_GROUP)
+        else:
+            eps = eps.get(ENTRY_POINT_GROUP, [])
+        for ep in eps:
+            try:
+                ep.load()(self)
+            except Exception as e:
+                print("Error registering xcvr API {}: {}".format(ep.name, e), file=sys.stderr)
+
+    def get_id_handler(self, identifier):
+        """
+        Return: XcvrApiBundle or XcvrApiFactory method name for identifier, None if unsupported
+        """
+        if not self._entry_points_loaded:
+            self.load_entry_points()
+        return self._ids.get(identifier)
+
+    def match_vendor(self, vendor_name, part_number):
+        """
+        Return: XcvrApiBundle registered for vendor_name and part_number, None if none
+        """
+        if not self._entry_points_loaded:
+            self.load_entry_points()
+        if vendor_name is None or part_number is None:
+            return None
+        for vendor_pattern, bundle in self._part_numbers.get(part_number, ()):
+            if fnmatchcase(vendor_name, vendor_pattern):
+                return bundle
+        for vendor_pattern, part_number_pattern, bundle in self._patterns:
+            if fnmatchcase(part_number, part_number_pattern) and fnmatchcase(vendor_name, vendor_pattern):
+                return bundle
+        return None
@@ -6,6 +6,15 @@
 
 import struct
 
+# struct.Struct objects unpacking a run of unsigned bytes, keyed by length
+BYTE_RUN_STRUCTS = {}
+
+def get_byte_run_struct(size):
+   byte_run_struct = BYTE_RUN_STRUCTS.get(size)
+   if byte_run_struct is None:
+      byte_run_struct = BYTE_RUN_STRUCTS[size] = struct.Struct("%dB" % size)
+   return byte_run_struct
+
 class XcvrEeprom(object):
    def __init__(self, reader, writer, mem_map):
       self.reader = reader
@@ -49,9 +58,9 @@ class XcvrEeprom(object):
          return raw_data
       else:
          if size == 1:
-            data = struct.unpack("%dB" %size, raw_data)[0]
+            data = get_byte_run_struct(size).unpack(raw_data)[0]
          else:
-            data = struct.unpack("%dB" %size, raw_data)
+            data = get_byte_run_struct(size).unpack(raw_data)
       return data
 
    def write(self, field_name, value):
@@ -225,6 +225,17 @@ def enable_debug_print(flag):
     ENABLE_DBG_PRINT = flag
 
 
+# Whether LOG_DEBUG messages are built and passed to the logger, which filters them on its
+# own priority. The logger does not expose its priority: a process running it above debug
+# priority can turn this off to skip formatting the debug messages.
+ENABLE_DEBUG_LOG = True
+
+
+def enable_debug_log(flag):
+    global ENABLE_DEBUG_LOG
+    ENABLE_DEBUG_LOG = flag
+
+
 def debug_print(log_msg):
     if ENABLE_DBG_PRINT:
         curr_timestamp = datetime.utcnow()
@@ -232,6 +243,92 @@ def debug_print(log_msg):
         print("({}) {} : {}".format(threading.currentThread().getName(), cur_tstr, log_msg))
     return None
 
+#
+# Ring buffer of cable command steps
+#
+
+CMD_TRACE_SIZE = 64
+
+
+class CableCmdTrace(object):
+    """
+    Per-port ring buffer of the steps of the cable commands. Steps are recorded as the
+    time.monotonic_ns() integer, a constant message and an optional argument; the text
+    is only built when render() is called.
+
+    The buffer may be shared by several threads: a command appends its steps as
+    (monotonic ns, step, arg) tuples to a list of its own, then adds them to the buffer
+    of the port with extend(), so that the steps of concurrent commands do not interleave.
+    """
+
+    def __init__(self, size=CMD_TRACE_SIZE):
+        self.size = size
+        self.timestamps = [0] * size
+        self.steps = [None] * size
+        self.args = [None] * size
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, step, arg=None):
+        """
+        Records a step, step being a message with an optional '{}' placeholder for arg.
+        Returns the position of the step, to be passed to entries() or render().
+        """
+        ns = time.monotonic_ns()
+        with self.lock:
+            return self.__add(ns, step, arg)
+
+    def extend(self, entries):
+        """
+        Adds the (monotonic ns, step, arg) of entries in a row.
+        Returns the position of the first of them.
+        """
+        with self.lock:
+            pos = self.count
+            for ns, step, arg in entries:
+                self.__add(ns, step, arg)
+            return pos
+
+    def __add(self, ns, step, arg):
+        pos = self.count
+        i = pos % self.size
+        self.timestamps[i] = ns
+        self.steps[i] = step
+        self.args[i] = arg
+        self.count = pos + 1
+        return pos
+
+    def entries(self, since=0):
+        """
+        Returns the (monotonic ns, step, arg) still in the buffer recorded at or after position since
+        """
+        size = self.size
+        with self.lock:
+            first = max(self.count - size, since)
+            return [(self.timestamps[i % size], self.steps[i % size], self.args[i % size])
+                    for i in range(first, self.count)]
+
+    def render(self, since=0):
+        """
+        Returns the text of the steps recorded at or after position since, one line per step
+        with the time elapsed since the first of them and since the previous step
+        """
+        return self.render_entries(self.entries(since))
+
+    @staticmethod
+    def render_entries(entries):
+        """
+        Returns the text of the (monotonic ns, step, arg) of entries, see render()
+        """
+        lines = []
+        if entries:
+            first = prev = entries[0][0]
+            for ns, step, arg in entries:
+                lines.append("{:.3f}ms (+{:.3f}ms) : {}".format((ns - first) / 1e6, (ns - prev) / 1e6,
+                                                              step if arg is None else step.format(arg)))
+                prev = ns
+        return "\n".join(lines)
+
 #
 # Lock for port access for thread safe
 #
@@ -663,6 +760,7 @@ class YCable(YCableBase):
         self.debug_dump_list = {}
         self.sfp = None
         self.lock = PortLock(port)
+        self.cmd_trace = CableCmdTrace()
         self.fp_lock = PortLock(port)
         self.dl_lock = PortLock(port)
         self.ev_lock = PortLock(port)
@@ -806,21 +904,39 @@ class YCable(YCableBase):
             self.CONSOLE_PRINT = True
             if self.logger is not None:
                 self.logger.set_min_log_priority(9)
+                enable_debug_log(True)
             print("Logging enabled...")
         else:
             self.CONSOLE_PRINT = False
             if self.logger is not None:
                 self.logger.set_min_log_priority(7)
+                enable_debug_log(True)
             print("Logging disabled...")
 
     def __get_pid_str(self):
         pid_str = "[{},{}] BCM_YCABLE Port-{} : ".format(os.getpid(), threading.currentThread().getName(), self.port)
         return pid_str
 
+    def is_debug_log_enabled(self):
+        """
+        Returns True if debug messages go to the logger or the console, so that callers
+        can skip formatting them otherwise, see enable_debug_log()
+        """
+        return self.CONSOLE_PRINT or ENABLE_DEBUG_LOG
+
+    def get_cmd_trace(self, since=0):
+        """
+        Returns the text of the cable command steps recorded for this port, see CableCmdTrace.render()
+        """
+        return self.cmd_trace.render(since)
+
     def log_timestamp(self, last_timestamp, log_msg):
+        # last_timestamp is None for the first step, not timed when debug logs are disabled
+        if not self.is_debug_log_enabled():
+            return last_timestamp
         curr_timestamp = datetime.utcnow()
         cur_tstr = curr_timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-        difftime = curr_timestamp - last_timestamp
+        difftime = curr_timestamp - (last_timestamp or curr_timestamp)
 
         tstr = "({}s {}ms)".format(difftime.seconds, difftime.microseconds//1000)
         ret_str = cur_tstr + tstr
@@ -830,6 +946,9 @@ class YCable(YCableBase):
 
     def log(self, level, msg, also_print_to_console=False):
 
+        if level == self.LOG_DEBUG and not also_print_to_console and not self.is_debug_log_enabled():
+            return
+
         msg = self.__get_pid_str() + msg
         also_print_to_console = True if self.CONSOLE_PRINT else also_print_to_console
 
@@ -980,6 +1099,41 @@ class YCable(YCableBase):
         """
             Internal function, sends command request to MCU and returns the response from MCU
 
+            The steps of the command are recorded, then added to self.cmd_trace once it
+            completes. Their timings are logged if the command fails, or at debug level if enabled.
+
+            Args:
+                command_id:
+                    Command ID
+                cmd_hdr
+                    command header containing details of the command
+                cmd_req_body
+                    command request payload, to be sent to MCU
+
+            Returns:
+                an integer,  0 if transaction is successful
+                          , -N for failure
+                byte array, cmd_rsp_body containing command response
+        """
+
+        steps = [(time.monotonic_ns(), "command {} start", command_id)]
+        ret_val, cmd_rsp_body = self.__cable_cmd_send(command_id, cmd_hdr, cmd_req_body, steps)
+        steps.append((time.monotonic_ns(), "__cable_cmd_execute() completed", None))
+        self.cmd_trace.extend(steps)
+
+        if ret_val != 0:
+            self.log(self.LOG_ERROR, "command {} failed with {}, steps:\n{}".format(
+                command_id, ret_val, CableCmdTrace.render_entries(steps)))
+        elif self.is_debug_log_enabled():
+            self.log(self.LOG_DEBUG, "command {} steps:\n{}".format(
+                command_id, CableCmdTrace.render_entries(steps)))
+
+        return ret_val, cmd_rsp_body
+
+    def __cable_cmd_send(self, command_id, cmd_hdr, cmd_req_body, steps):
+        """
+            Internal function, runs the steps of __cable_cmd_execute()
+
             Args:
                 command_id:
                     Command ID
@@ -987,6 +1141,8 @@ class YCable(YCableBase):
                     command header containing details of the command
                 cmd_req_body
                     command request payload, to be sent to MCU
+                steps
+                    list to which the (monotonic ns, step, arg) of the command are appended
 
             Returns:
                 an integer,  0 if transaction is successful
@@ -994,8 +1150,6 @@ class YCable(YCableBase):
                 byte array, cmd_rsp_body containing command response
         """
 
-        start_ts = datetime.utcnow()
-        ts = datetime.utcnow()
         curr_offset = None
         cmd_rsp_body = None
         ret_val = 0
@@ -1005,7 +1159,7 @@ class YCable(YCableBase):
             debug_print("Trying for the lock")
             with self.lock.acquire_timeout(self.PORT_LOCK_TIMEOUT) as result:
                 if result:
-                    ts = self.log_timestamp(ts, "lock acquired")
+                    steps.append((time.monotonic_ns(), "lock acquired", None))
                     # read cable command and status offsets
                     curr_offset = self.QSFP_BRCM_CABLE_CMD
                     result = self.platform_chassis.get_sfp(self.port).read_eeprom(curr_offset, 2)
@@ -1015,7 +1169,7 @@ class YCable(YCableBase):
 
                     cmd_req = result[0]
                     cmd_sts = result[1]
-                    ts = self.log_timestamp(ts, "read cmd/sts done")
+                    steps.append((time.monotonic_ns(), "read cmd/sts done", None))
 
                     # if command request and status both are 1,
                     #    write 0 to cmd req and
@@ -1045,8 +1199,7 @@ class YCable(YCableBase):
                         else:
                             self.log(self.LOG_ERROR, "CMD_REQ/STS both are stuck at 1")
                             return self.ERROR_CMD_STS_CHECK_FAILED, None
-                        ts = self.log_timestamp(ts, "resetting cmd to 0 done (error logic)")
-                    self.log(self.LOG_DEBUG, "Currently processing COMMAND ID is {}".format(command_id))
+                        steps.append((time.monotonic_ns(), "resetting cmd to 0 done (error logic)", None))
                     # check if any command is currently being executed
                     if ((cmd_req & 0x01) == 0) and ((cmd_sts & 0x01) == 0):
                         #
@@ -1066,7 +1219,7 @@ class YCable(YCableBase):
                             if result is False:
                                 self.log(self.LOG_ERROR, "write_eeprom() failed")
                                 return self.ERROR_WRITE_EEPROM_FAILED, None
-                            ts = self.log_timestamp(ts, "writing of cmd_hdr 5 bytes done")
+                            steps.append((time.monotonic_ns(), "writing of cmd_hdr 5 bytes done", None))
                         else:
                             curr_offset = self.QSFP_VEN_FE_130_BRCM_DATA_LENGHT_LSB + 1
                             cmd_rsp_len = cmd_hdr[1]
@@ -1075,7 +1228,7 @@ class YCable(YCableBase):
                             if result is False:
                                 self.log(self.LOG_ERROR, "write_eeprom() failed")
                                 return self.ERROR_WRITE_EEPROM_FAILED, None
-                            ts = self.log_timestamp(ts, "writing of cmd_hdr (only rsp_len) 1 byte done")
+                            steps.append((time.monotonic_ns(), "writing of cmd_hdr (only rsp_len) 1 byte done", None))
 
                         # write request data
                         wr_len = cmd_hdr[0]
@@ -1085,7 +1238,7 @@ class YCable(YCableBase):
                                 self.port).write_eeprom(curr_offset, wr_len, cmd_req_body)
                             if result is False:
                                 return self.ERROR_WR_EEPROM_FAILED, None
-                        ts = self.log_timestamp(ts, "write request data done - bytes {}".format(wr_len))
+                        steps.append((time.monotonic_ns(), "write request data done - bytes {}", wr_len))
 
                         # write the command request byte now
                         cmd_req = 1
@@ -1096,7 +1249,7 @@ class YCable(YCableBase):
                         if result is False:
                             return self.ERROR_WR_EEPROM_FAILED, None
                         rd = False
-                        ts = self.log_timestamp(ts, "write command request to 1 done")
+                        steps.append((time.monotonic_ns(), "write command request to 1 done", None))
 
                         error = 0
                         start = time.monotonic_ns()
@@ -1123,7 +1276,7 @@ class YCable(YCableBase):
                         else:
                             self.log(self.LOG_ERROR, "CMD_STS never read as 0x11 or 0x31. reg_value: {}".format(hex(sta)))
                             ret_val = self.ERROR_CMD_PROCESSING_FAILED
-                        ts = self.log_timestamp(ts, "polling for status done")
+                        steps.append((time.monotonic_ns(), "polling for status done", None))
 
                         # read response data
                         if rd is True:
@@ -1133,7 +1286,7 @@ class YCable(YCableBase):
                                 cmd_rsp_body = self.platform_chassis.get_sfp(self.port).read_eeprom(curr_offset, rd_len)
                                 if cmd_rsp_body is None:
                                     return self.EEPROM_ERROR, None
-                            ts = self.log_timestamp(ts, "read cmd response bytes {} done".format(rd_len))
+                            steps.append((time.monotonic_ns(), "read cmd response bytes {} done", rd_len))
 
                         # set the command request to idle state
                         cmd_req = 0
@@ -1143,7 +1296,7 @@ class YCable(YCableBase):
                         if result is False:
                             self.log(self.LOG_ERROR, "write eeprom failed for CMD_req")
                             return self.ERROR_WRITE_EEPROM_FAILED, None
-                        ts = self.log_timestamp(ts, "write command request to 0 done")
+                        steps.append((time.monotonic_ns(), "write command request to 0 done", None))
 
                         # wait  for MCU response to be pulled down
                         start = time.monotonic_ns()
@@ -1161,7 +1314,7 @@ class YCable(YCableBase):
                             ms_elapsed = (time.monotonic_ns()//1000000) - (start//1000000)
                         else:
                             ret_val = self.ERROR_MCU_NOT_RELEASED
-                        self.log_timestamp(ts, "poll for MCU response to be puled down - done")
+                        steps.append((time.monotonic_ns(), "poll for MCU response to be puled down - done", None))
 
                         if error:
                             return -1, None
@@ -1176,7 +1329,6 @@ class YCable(YCableBase):
             self.log(self.LOG_ERROR, "platform_chassis is not loaded, failed to check if link is Active on TOR B side")
             return self.ERROR_PLATFORM_NOT_LOADED, None
 
-        self.log_timestamp(start_ts, "__cable_cmd_execute() completed")
         return ret_val, cmd_rsp_body
 
     def __validate_read_data(self, result, size, message):
@@ -1379,8 +1531,7 @@ class YCable(YCableBase):
                 TARGET_UNKNOWN, if mux direction API fails.
         """
 
-        start_ts = datetime.utcnow()
-        ts = self.log_timestamp(start_ts, "get_mux_direction() start")
+        ts = self.log_timestamp(None, "get_mux_direction() start")
 
         mux_dir = self.platform_chassis.get_sfp(self.port).read_eeprom(105, 1)
         if mux_dir is None:
@@ -1452,8 +1603,7 @@ class YCable(YCableBase):
             a Boolean, True if the toggle succeeded and False if it did not succeed.
         """
 
-        start_ts = datetime.utcnow()
-        ts = self.log_timestamp(start_ts, "toggle_mux_to_tor_a() start")
+        ts = self.log_timestamp(None, "toggle_mux_to_tor_a() start")
 
         fast_command = bytearray(30)
         with self.fp_lock.acquire_timeout(self.PORT_LOCK_TIMEOUT) as result:
@@ -1508,8 +1658,7 @@ class YCable(YCableBase):
             a Boolean, True if the toggle succeeded and False if it did not succeed.
         """
 
-        start_ts = datetime.utcnow()
-        ts = self.log_timestamp(start_ts, "toggle_mux_to_tor_b() start")
+        ts = self.log_timestamp(None, "toggle_mux_to_tor_b() start")
 
         fast_command = bytearray(30)
         with self.fp_lock.acquire_timeout(self.PORT_LOCK_TIMEOUT) as result:
@@ -5,10 +5,11 @@ test server simulating the physical y-cable.
 
 Mux simulator documentation: https://github.com/Azure/sonic-mgmt/blob/master/ansible/roles/vm_set/files/mux_simulator.md
 """
+import http.client
 import json
 import os
-import urllib.request
-import urllib.error
+import threading
+import urllib.parse
 import time
 
 from sonic_py_common import device_info
@@ -17,6 +18,152 @@ from natsort import natsorted
 from sonic_y_cable.y_cable_base import YCableBase
 
 
+class MuxSimulatorHTTPError(Exception):
+    """HTTP error status returned by the mux simulator"""
+
+    def __init__(self, status, reason, body):
+        super(MuxSimulatorHTTPError, self).__init__('HTTP Error {}: {}'.format(status, reason))
+        self.status = status
+        self.body = body
+
+
+class MuxSimulatorClient(object):
+    """Client of a mux simulator endpoint shared by all simulated y-cables using it
+
+    Requests are sent over a small pool of keep-alive HTTP connections. The status of all the
+    muxes of a vm_set is fetched with a single request and cached for a short time, so polling
+    every port within one cycle costs one round-trip to the mux simulator.
+    """
+
+    MAX_IDLE_CONNECTIONS = 4
+    STATUS_TTL = 1.0
+
+    _clients = {}
+    _clients_lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, host, port, timeout):
+        with cls._clients_lock:
+            key = (host, int(port))
+            if key not in cls._clients:
+                cls._clients[key] = cls(host, port, timeout)
+            return cls._clients[key]
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self._idle = []
+        self._idle_lock = threading.Lock()
+        self._status = {}
+        self._status_lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+
+    def _acquire(self):
+        with self._idle_lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def _release(self, conn):
+        with self._idle_lock:
+            if len(self._idle) < self.MAX_IDLE_CONNECTIONS:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def request(self, method, path, data=None):
+        """Send a request and return the decoded JSON response
+
+        Args:
+            method: HTTP method
+            path: Request path on the mux simulator
+            data: Object sent as JSON body, None for no body
+
+        Returns:
+            The decoded JSON response
+        """
+        body = None
+        headers = {'Accept': 'application/json'}
+        if data is not None:
+            body = json.dumps(data).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                content = resp.read()
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                if reused:
+                    # Idle connection was closed by the server, retry on a new one
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            break
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        if resp.status >= 400:
+            raise MuxSimulatorHTTPError(resp.status, resp.reason, content)
+        return json.loads(content.decode('utf-8'))
+
+    def get_mux_status(self, vmset_path, port_index, ttl=STATUS_TTL):
+        """Get the status of one mux from the cached status of its vm_set
+
+        Args:
+            vmset_path: Path of the vm_set on the mux simulator
+            port_index: Index of the mux port in the vm_set
+            ttl: Maximum age in seconds of the cached vm_set status
+
+        Returns:
+            The status dict of the mux, None if the vm_set has no such port
+        """
+        status = self._get_cached_status(vmset_path, ttl)
+        if status is None:
+            with self._fetch_lock:
+                # Another thread may have refreshed it while we waited
+                status = self._get_cached_status(vmset_path, ttl)
+                if status is None:
+                    status = {}
+                    for mux in self.request('GET', vmset_path).values():
+                        if isinstance(mux, dict) and 'port_index' in mux:
+                            status[int(mux['port_index'])] = mux
+                    with self._status_lock:
+                        self._status[vmset_path] = (time.monotonic(), status)
+        return status.get(port_index)
+
+    def _get_cached_status(self, vmset_path, ttl):
+        with self._status_lock:
+            cached = self._status.get(vmset_path)
+        if cached is None or time.monotonic() - cached[0] > ttl:
+            return None
+        return cached[1]
+
+    def update_mux_status(self, vmset_path, port_index, mux_status):
+        with self._status_lock:
+            cached = self._status.get(vmset_path)
+            if cached is not None:
+                cached[1][port_index] = mux_status
+
+    def invalidate_status(self, vmset_path):
+        with self._status_lock:
+            self._status.pop(vmset_path, None)
+
+
 class YCable(YCableBase):
 
     EEPROM_ERROR = -1
@@ -36,6 +183,7 @@ class YCable(YCableBase):
     POLL_TIMEOUT = 30
     POLL_INTERVAL = 1
     URLOPEN_TIMEOUT = 5
+    STATUS_TTL = MuxSimulatorClient.STATUS_TTL
 
     def __init__(self, port, logger):
         YCableBase.__init__(self, port, logger)
@@ -43,6 +191,7 @@ class YCable(YCableBase):
             self.log_error('Missing {}, unable to initialize simulated y-cable.'.format(self.MUX_SIMULATOR_CONFIG_FILE))
 
         self._initialized = False
+        self._client = None
 
         self.switching_mode = self.SWITCHING_MODE_MANUAL
         self.debug_mode = False
@@ -54,6 +203,11 @@ class YCable(YCableBase):
                 mux_simulator['server_port'],
                 mux_simulator['vm_set'])
             self._url = '{}/{}'.format(self._vmset_url, self.port_index)
+            self._vmset_path = urllib.parse.urlsplit(self._vmset_url).path
+            self._client = MuxSimulatorClient.get_client(
+                mux_simulator['server_ip'],
+                mux_simulator['server_port'],
+                self.URLOPEN_TIMEOUT)
             self.side = mux_simulator['side']  # Either "upper_tor" or "lower_tor"
             self._initialized = True
             self.log_notice('Initialized simulated y_cable driver, port={}, index={}'.format(self.port, self.port_index))
@@ -81,6 +235,16 @@ class YCable(YCableBase):
         if self.port_index is None:
             self.log_error('Failed to find index of physical port {}, ports={}'.format(self.port, json.dumps(ports)))
 
+    def _fetch(self, url):
+        if url:
+            return self._client.request('GET', urllib.parse.urlsplit(url).path)
+
+        # Serve the status of this port from the status of the whole vm_set
+        status = self._client.get_mux_status(self._vmset_path, self.port_index, self.STATUS_TTL)
+        if status is None:
+            status = self._client.request('GET', urllib.parse.urlsplit(self._url).path)
+        return status
+
     def _get(self, url=None):
         if not self._initialized:
             return None
@@ -95,17 +259,15 @@ class YCable(YCableBase):
         while True:
             try:
                 try:
-                    req = urllib.request.Request(get_url)
-                    with urllib.request.urlopen(req, timeout=self.URLOPEN_TIMEOUT) as resp:
-                        return json.loads(resp.read().decode('utf-8'))
-                except urllib.error.HTTPError as e:
+                    return self._fetch(url)
+                except MuxSimulatorHTTPError as e:
                     self.log_warning('attempt={}, GET {} for physical_port {} failed with {}, detail: {}'.format(
                         attempt,
                         get_url,
                         self.port,
                         repr(e),
-                        e.read()))
-            except (urllib.error.URLError, json.decoder.JSONDecodeError, Exception) as e:
+                        e.body))
+            except (json.decoder.JSONDecodeError, Exception) as e:
                 self.log_warning('attempt={}, GET {} for physical_port {} failed with {}'.format(
                     attempt,
                     get_url,
@@ -141,30 +303,24 @@ class YCable(YCableBase):
         else:
             post_url = self._url
 
-        if data is not None:
-            post_data = json.dumps(data).encode('utf-8')
-        else:
-            post_data = None
+        post_data = data
 
         start_time = time.time()
         attempt = 1
         while True:
             try:
                 try:
-                    headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
-                    req = urllib.request.Request(post_url, post_data, headers, method='POST')
-                    with urllib.request.urlopen(req, timeout=self.URLOPEN_TIMEOUT) as resp:
-                        return json.loads(resp.read().decode('utf-8'))
-                except urllib.error.HTTPError as e:
+                    return self._client.request('POST', urllib.parse.urlsplit(post_url).path, data)
+                except MuxSimulatorHTTPError as e:
                     self.log_warning('attempt={}, POST {} with data {} for physical_port {} failed with {}, detail: {}'.format(
                         attempt,
                         post_url,
                         post_data,
                         self.port,
                         repr(e),
-                        e.read()
+                        e.body
                     ))
-            except (urllib.error.URLError, json.decoder.JSONDecodeError, Exception) as e:
+            except (json.decoder.JSONDecodeError, Exception) as e:
                 self.log_warning('attempt={}, POST {} with data {} for physical_port {} failed with {}'.format(
                         attempt,
                         post_url,
@@ -204,6 +360,10 @@ class YCable(YCableBase):
             self.log_warning('Get {} failed, exception: {}'.format(self._url, repr(e)))
             return None
 
+    def _invalidate_status(self):
+        if self._client is not None:
+            self._client.invalidate_status(self._vmset_path)
+
     def _toggle_to(self, target):
         """
         Helper function for toggling active side of physical_port to target side.
@@ -216,7 +376,9 @@ class YCable(YCableBase):
         self.log_notice("Toggle active side of physical_port {} to {}".format(self.port, target))
         status = self._post(data={"active_side": target})  # mux simulator returns latest mux status
         if not status:
+            self._invalidate_status()
             return False
+        self._client.update_mux_status(self._vmset_path, self.port_index, status)
         if 'active_side' in status and status['active_side'] == target:
             return True
         else:
@@ -226,6 +388,7 @@ class YCable(YCableBase):
         if self.port_index is not None:
             self._post(url="{}/clear_flap_counter".format(self._vmset_url),
                     data={'port_to_clear': str(self.port_index)})
+            self._invalidate_status()
 
     def toggle_mux_to_tor_a(self):
         """
@@ -789,7 +952,9 @@ class YCable(YCableBase):
             a boolean, True if the cable is target reset
                      , False if the cable target is not reset
         """
-        return False if self._post('{}/reset'.format(self._url)) is None else True
+        result = self._post('{}/reset'.format(self._url))
+        self._invalidate_status()
+        return False if result is None else True
 
     def create_port(self, speed, fec_mode_tor=YCableBase.FEC_MODE_NONE, fec_mode_nic=YCableBase.FEC_MODE_NONE, anlt_tor=False, anlt_nic=False):
         """
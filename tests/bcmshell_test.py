@@ -0,0 +1,188 @@
+import os
+import socket
+import tempfile
+import threading
+from array import array
+
+import pytest
+
+from sonic_platform_base.sonic_sfp.bcmshell import bcmshell
+
+PROMPT = b'drivshell> '
+
+
+class DiagShellStandIn(object):
+    """Minimal stand-in for the BCM diag shell socket exported by switchd.
+    Every received line is answered with its canned output followed by the
+    prompt.  Responses are written in small chunks to exercise incremental
+    prompt detection."""
+
+    def __init__(self, path, responses, chunk=7):
+        self.path = path
+        self.responses = responses
+        self.chunk = chunk
+        self.commands = []
+        self.recv_calls = 0
+        self.connections = 0
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(1)
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self.handle(conn)
+
+    def handle(self, conn):
+        pending = b''
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(4096)
+                except OSError:
+                    return
+                if not data:
+                    return
+                self.recv_calls += 1
+                pending += data
+                while b'\n' in pending:
+                    line, pending = pending.split(b'\n', 1)
+                    cmd = line.decode()
+                    self.commands.append(cmd)
+                    if cmd == 'echo bcmshell':
+                        reply = b'bcmshell\r\n' + PROMPT
+                    else:
+                        reply = self.responses.get(cmd, b'Unknown command: ' + line + b'\n') + PROMPT
+                    try:
+                        for i in range(0, len(reply), self.chunk):
+                            conn.sendall(reply[i:i + self.chunk])
+                    except OSError:
+                        return
+
+    def close(self):
+        self.server.close()
+
+
+@pytest.fixture
+def socketname():
+    tmpdir = tempfile.mkdtemp()
+    yield os.path.join(tmpdir, 'sswsyncd.socket')
+
+
+class TestBcmShell(object):
+
+    def test_run(self, socketname):
+        standin = DiagShellStandIn(socketname, {'ps': b'port xe0 up\nport xe1 down\n'})
+        shell = bcmshell(keepopen=True, timeout=5, socketname=socketname)
+        assert shell.run('ps') == 'port xe0 up\nport xe1 down\n'
+        assert isinstance(shell.buffer, bytearray)
+        shell.close()
+        standin.close()
+
+    def test_run_many(self, socketname):
+        responses = {
+            'cmd0': b'zero\n',
+            'cmd1': b'',
+            'cmd2': b'two\n' * 1000,
+        }
+        standin = DiagShellStandIn(socketname, responses, chunk=1000)
+        shell = bcmshell(keepopen=True, timeout=5, socketname=socketname)
+        outputs = shell.run_many(['cmd0', 'cmd1', 'cmd2'])
+        assert outputs == ['zero\n', '', 'two\n' * 1000]
+        assert standin.commands == ['echo bcmshell', 'cmd0', 'cmd1', 'cmd2']
+        shell.close()
+        standin.close()
+
+    def test_run_invalid_cmd(self, socketname):
+        standin = DiagShellStandIn(socketname, {})
+        shell = bcmshell(keepopen=True, timeout=5, socketname=socketname)
+        with pytest.raises(TypeError):
+            shell.run(1)
+        with pytest.raises(ValueError):
+            shell.run_many(['ps', 'ps\nps'])
+        with pytest.raises(ValueError):
+            shell.cmd('bogus')
+        shell.close()
+        standin.close()
+
+    def test_gettable(self, socketname):
+        responses = {
+            'dump all raw egr_ing_port': b'EGR_ING_PORT.ipipe0[0]: <0x00000001 0x00000002>\n'
+                                         b'EGR_ING_PORT.ipipe0[1]: <0x00000003 0x00000000>\n',
+            'dump all egr_ing_port': b'EGR_ING_PORT.ipipe0[0]: <HIGIG2=1,PORT_TYPE=0>\n',
+        }
+        standin = DiagShellStandIn(socketname, responses)
+        shell = bcmshell(keepopen=True, timeout=5, socketname=socketname)
+        assert shell.gettable('egr_ing_port') == [(2 << 32) | 1, 3]
+        assert shell.gettable('egr_ing_port', True) == [{'HIGIG2': 1, 'PORT_TYPE': 0}]
+        shell.close()
+        standin.close()
+
+    def test_iter_table(self, socketname):
+        rows = b''.join([b'EGR_ING_PORT.ipipe0[%d]: <0x%08x 0x%08x>\n' % (i, i, i + 1)
+                         for i in range(5000)])
+        responses = {
+            'dump all raw egr_ing_port': rows,
+            # wide entry wrapped onto a continuation line
+            'dump all raw wide_table 0 1': b'WIDE_TABLE.ipipe0[0]: <0x00000001 0x00000002 \n'
+                                           b'    0x00000003>\n',
+        }
+        standin = DiagShellStandIn(socketname, responses, chunk=4093)
+        shell = bcmshell(keepopen=True, timeout=5, socketname=socketname)
+
+        values = array('Q')
+        count = 0
+        for i, entry in enumerate(shell.iter_table('egr_ing_port', into=values)):
+            assert entry == ((i + 1) << 32) | i
+            count += 1
+        assert count == 5000
+        assert len(values) == 5000
+        assert values[4999] == (5000 << 32) | 4999
+
+        values = array('Q')
+        assert list(shell.iter_table('wide_table', start=0, entries=1, into=values)) == \
+            [(3 << 64) | (2 << 32) | 1]
+        assert list(values) == [(2 << 32) | 1, 3]
+        assert standin.connections == 1
+        shell.close()
+        standin.close()
+
+    def test_iter_table_errors(self, socketname):
+        responses = {
+            'dump all raw bogus': b'Unknown option or memory: bogus\n',
+            'dump all raw egr_ing_port 100 1': b'Index 100 out of range\n',
+        }
+        standin = DiagShellStandIn(socketname, responses)
+        shell = bcmshell(keepopen=True, timeout=5, socketname=socketname)
+        with pytest.raises(RuntimeError):
+            shell.gettable('bogus')
+        with pytest.raises(IndexError):
+            list(shell.iter_table('egr_ing_port', start=100, entries=1))
+        with pytest.raises(ValueError):
+            list(shell.iter_table('egr_ing_port', fields=True, into=array('Q')))
+        with pytest.raises(TypeError):
+            list(shell.iter_table('egr_ing_port', into=[]))
+        shell.close()
+        standin.close()
+
+    def test_iter_table_abandoned(self, socketname):
+        rows = b''.join([b'EGR_ING_PORT.ipipe0[%d]: <0x%08x>\n' % (i, i) for i in range(1000)])
+        standin = DiagShellStandIn(socketname, {'dump all raw egr_ing_port': rows, 'ps': b'ok\n'})
+        shell = bcmshell(keepopen=True, timeout=5, socketname=socketname)
+        entries = shell.iter_table('egr_ing_port')
+        assert next(entries) == 0
+        entries.close()
+
+        # unread output is dropped along with the connection
+        assert shell.socketobj is None
+        assert shell.run('ps') == 'ok\n'
+        assert standin.connections == 2
+        shell.close()
+        standin.close()
@@ -0,0 +1,33 @@
+"""
+   benchmark_eeprom_checksum.py
+
+   Throughput of the EepromDecoder checksum algorithms on a board EEPROM sized buffer.
+   Not collected by pytest; run it directly:
+
+       python -m tests.benchmark_eeprom_checksum [size] [iterations]
+"""
+
+import os
+import sys
+import time
+
+from sonic_platform_base.sonic_eeprom.eeprom_base import CHECKSUM_ALGORITHMS
+
+def measure(algorithm, data, size, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        algorithm(data, size)
+    return (time.perf_counter() - start) / iterations
+
+def main(argv):
+    length = int(argv[1]) if len(argv) > 1 else 64 * 1024
+    iterations = int(argv[2]) if len(argv) > 2 else 10
+    data = bytearray(os.urandom(length))
+    for name in sorted(CHECKSUM_ALGORITHMS):
+        for size in ((1, 2, 4) if name == '2s-complement' else (4,)):
+            elapsed = measure(CHECKSUM_ALGORITHMS[name], data, size, iterations)
+            print("%-14s size %d: %8.3f ms per %d bytes, %7.1f MB/s"
+                  % (name, size, elapsed * 1e3, length, length / elapsed / 1e6))
+
+if __name__ == '__main__':
+    main(sys.argv)
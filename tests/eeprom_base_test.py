@@ -200,6 +200,65 @@ class TestEepromDecoder(object):
         mock_print.assert_called_with("Error: invalid field '0x20'")
         assert e.value.code == 1
 
+    @pytest.mark.parametrize("checksum_type, expected", [
+        ('crc32', 0xCBF43926),
+        ('dell-crc', 0xFEE8),
+        ('crc16-ccitt', 0x29B1),
+        ('crc8', 0xF4),
+    ])
+    def test_calculate_checksum(self, checksum_type, expected):
+        eeprom = eeprom_base.EepromDecoder('path', 'format', 'start', 'status', 'readonly')
+        with patch.object(eeprom, 'checksum_type', MagicMock(return_value=checksum_type)):
+            assert eeprom.calculate_checksum(b'123456789') == expected
+
+    def test_compute_dell_crc(self):
+        def bitwise_dell_crc(message):
+            reg = 0
+            for byte in bytearray(message) + bytearray(2):
+                for bit in range(7, -1, -1):
+                    reg = (reg << 1) | ((byte >> bit) & 1)
+                    if reg > 0xffff:
+                        reg = (reg & 0xffff) ^ 0x8005
+            return reg
+
+        eeprom = eeprom_base.EepromDecoder('path', 'format', 'start', 'status', 'readonly')
+        message = bytearray(range(256)) * 3
+        assert eeprom.compute_dell_crc(message) == bitwise_dell_crc(message)
+        # the message is not modified
+        assert len(message) == 768
+
+    def test_compute_2s_complement(self):
+        eeprom = eeprom_base.EepromDecoder('path', 'format', 'start', 'status', 'readonly')
+        assert eeprom.compute_2s_complement(b'\x01\x02\x03', 1) == 0xfa
+        assert eeprom.compute_2s_complement(bytearray(b'\x00\x01\x00\x02'), 2) == 0xfffd
+        assert eeprom.compute_2s_complement(b'\x00\x00\x00\x01\x00\x00\x00\x02', 4) == 0xfffffffd
+        # trailing partial word
+        assert eeprom.compute_2s_complement(b'\x00\x01\x00\x02\x00\x00\x00', 3) == (1 << 24) - 0x020100
+        assert eeprom.compute_2s_complement(b'', 1) == 0
+
+    def test_checksum_methods_overridden(self):
+        class Decoder(eeprom_base.EepromDecoder):
+            def compute_2s_complement(self, e, size):
+                return ('2s-complement', size)
+
+            def compute_dell_crc(self, message):
+                return 'dell-crc'
+
+        eeprom = Decoder('path', 'format', 'start', 'status', 'readonly')
+        with patch.object(eeprom, 'checksum_type', MagicMock(return_value='2s-complement')):
+            assert eeprom.calculate_checksum(b'data') == ('2s-complement', 4)
+        with patch.object(eeprom, 'checksum_type', MagicMock(return_value='dell-crc')):
+            assert eeprom.calculate_checksum(b'data') == 'dell-crc'
+
+    def test_register_checksum(self):
+        eeprom = eeprom_base.EepromDecoder('path', 'format', 'start', 'status', 'readonly')
+        eeprom_base.register_checksum('xor', lambda data, size: size)
+        try:
+            with patch.object(eeprom, 'checksum_type', MagicMock(return_value='xor')):
+                assert eeprom.calculate_checksum(b'data') == 4
+        finally:
+            del eeprom_base.CHECKSUM_ALGORITHMS['xor']
+
     def teardown(self):
         print("TEAR DOWN")
 
@@ -0,0 +1,78 @@
+import os
+from unittest import mock
+
+import pytest
+
+from sonic_platform_base.sonic_eeprom import eeprom_dts
+
+
+def make_node(root, path, **properties):
+    node = os.path.join(str(root), path)
+    os.makedirs(node, exist_ok=True)
+    for name, value in properties.items():
+        with open(os.path.join(node, name.replace('_', '-')), 'wb') as f:
+            f.write(value)
+    return node
+
+
+@pytest.fixture
+def device_tree(tmp_path):
+    root = tmp_path / 'device-tree'
+    make_node(root, 'soc/i2c@3000/sfp_eeprom@50', reg=b'\x00\x00\x00\x50', label=b'sfp1_eeprom\0')
+    make_node(root, 'soc/i2c@3100/mux@70/i2c@0/qsfp@50', reg=b'\x00\x00\x00\x50')
+    make_node(root, 'soc/i2c@3100/mux@70/i2c@1/eeprom@51', reg=b'\x00\x00\x00\x51',
+              label=b'sfp2_eeprom\0', read_only=b'')
+    make_node(root, 'soc/i2c@3100/board_eeprom@54', reg=b'\x00\x00\x00\x54', label=b'board_eeprom\0')
+    make_node(root, 'localbus/flash@0/partition@3', label=b'board_eeprom\0', read_only=b'')
+    make_node(root, 'localbus/flash@0/partition@4', label=b'u-boot\0')
+    make_node(root, '__symbols__/i2c@9/eeprom@50', reg=b'\x00\x00\x00\x50')
+    eeprom_dts.clear_eeprom_nodes_cache()
+    with mock.patch.object(eeprom_dts, 'dts_root', str(root) + '/'):
+        yield str(root)
+    eeprom_dts.clear_eeprom_nodes_cache()
+
+
+class TestEepromDts(object):
+
+    def test_get_eeprom_nodes(self, device_tree):
+        nodes = eeprom_dts.get_eeprom_nodes()
+        assert [(os.path.relpath(n.path, device_tree), n.type, n.dev_id, n.reg, n.ro, n.instance)
+                for n in nodes] == [
+            ('soc/i2c@3000/sfp_eeprom@50', 'i2c', 0, '50', False, 'sfp1'),
+            ('soc/i2c@3100/board_eeprom@54', 'i2c', 1, '54', False, 'board'),
+            ('soc/i2c@3100/mux@70/i2c@1/eeprom@51', 'i2c', 3, '51', True, 'sfp2'),
+            ('localbus/flash@0/partition@3', 'mtd', '3', None, True, 'board'),
+        ]
+
+    def test_get_dev_attr_from_dtb(self, device_tree):
+        eep_dict = eeprom_dts.get_dev_attr_from_dtb(['sfp'])
+        assert eep_dict == {
+            os.path.join(device_tree, 'soc/i2c@3000/sfp_eeprom@50'):
+                {'type': 'i2c', 'dev-id': 0, 'reg': '50', 'ro': False},
+            os.path.join(device_tree, 'soc/i2c@3100/mux@70/i2c@1/eeprom@51'):
+                {'type': 'i2c', 'dev-id': 3, 'reg': '51', 'ro': True},
+        }
+        assert [eeprom_dts.dev_attr_to_path(attrs) for _, attrs in sorted(eep_dict.items())] == [
+            '/sys/class/i2c-adapter/i2c-0/0-0050/eeprom',
+            '/sys/class/i2c-adapter/i2c-3/3-0051/eeprom',
+        ]
+
+        eep_dict = eeprom_dts.get_dev_attr_from_dtb(['board'])
+        assert eep_dict[os.path.join(device_tree, 'localbus/flash@0/partition@3')] == \
+            {'type': 'mtd', 'dev-id': '3', 'ro': True}
+        assert eeprom_dts.dev_attr_to_path({'type': 'mtd', 'dev-id': '3', 'ro': True}) == '/dev/mtd3'
+        assert len(eep_dict) == 2
+
+    def test_discovery_cached(self, device_tree):
+        nodes = eeprom_dts.get_eeprom_nodes()
+        with mock.patch('os.scandir') as mock_scandir:
+            assert eeprom_dts.get_eeprom_nodes() is nodes
+            assert len(eeprom_dts.get_dev_attr_from_dtb(['sfp'])) == 2
+            mock_scandir.assert_not_called()
+        eeprom_dts.clear_eeprom_nodes_cache()
+        assert eeprom_dts.get_eeprom_nodes() == nodes
+
+    def test_missing_device_tree(self, tmp_path):
+        with mock.patch.object(eeprom_dts, 'dts_root', str(tmp_path / 'missing')):
+            with pytest.raises(OSError):
+                eeprom_dts.get_dev_attr_from_dtb(['sfp'])
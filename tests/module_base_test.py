@@ -1,4 +1,4 @@
-from sonic_platform_base.module_base import ModuleBase
+from sonic_platform_base.module_base import ModuleBase, SensordRestartCoordinator
 import pytest
 import json
 import os
@@ -6,6 +6,9 @@ import fcntl
 from unittest.mock import patch, MagicMock, call
 from io import StringIO
 import shutil
+import subprocess
+import sys
+import threading
 
 class MockFile:
     def __init__(self, data=None):
@@ -31,6 +34,55 @@ class MockFile:
         return 123
 
 
+class FakeStateDB:
+    """In-memory stand-in for a STATE_DB connector and its pipeline"""
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+
+class FakeRedisPipeline:
+    def __init__(self, db):
+        self.db = db
+        self.queue = []
+
+    def flush(self):
+        if self.queue:
+            self.db.round_trips += 1
+        for op in self.queue:
+            op()
+        self.queue = []
+
+
+class FakeTable:
+    def __init__(self, pipeline, table_name, buffered):
+        self.pipeline = pipeline
+        self.table_name = table_name
+        assert buffered
+
+    def _key(self, key):
+        return self.table_name + "|" + key
+
+    def set(self, key, fvs):
+        data = self.pipeline.db.data
+        self.pipeline.queue.append(lambda: data.setdefault(self._key(key), {}).update(fvs))
+
+    def _del(self, key):
+        data = self.pipeline.db.data
+        self.pipeline.queue.append(lambda: data.pop(self._key(key), None))
+
+    def flush(self):
+        self.pipeline.flush()
+
+
+def fake_swsscommon():
+    module = MagicMock()
+    module.swsscommon.RedisPipeline = FakeRedisPipeline
+    module.swsscommon.Table = FakeTable
+    module.swsscommon.FieldValuePairs = dict
+    return module
+
+
 class TestModuleBase:
 
     def test_module_base(self):
@@ -87,6 +139,31 @@ class TestModuleBase:
         mock_connector.hset.side_effect = Exception("DB Error")
         module.pci_entry_state_db("0000:00:00.0", "detaching")
 
+    def test_pci_entries_state_db(self):
+        module = ModuleBase()
+        db = FakeStateDB()
+        module.state_db_connector = db
+        buses = ["0000:00:00.{}".format(i) for i in range(8)]
+
+        with patch.dict(sys.modules, {'swsscommon': fake_swsscommon()}):
+            module.pci_entries_state_db(buses, "detaching")
+            assert db.round_trips == 1
+            assert len(db.data) == 8
+            assert db.data["PCIE_DETACH_INFO|0000:00:00.3"] == {
+                "bus_info": "0000:00:00.3", "dpu_state": "detaching"}
+
+            module.pci_entries_state_db(buses, "attaching")
+            assert db.round_trips == 2
+            assert db.data == {}
+
+            module.pci_entries_state_db([], "detaching")
+            assert db.round_trips == 2
+
+        with patch.dict(sys.modules, {'swsscommon': fake_swsscommon()}), \
+             patch.object(FakeTable, 'flush', side_effect=Exception("DB Error")):
+            module.pci_entries_state_db(buses, "detaching")
+            assert db.data == {}
+
     def test_file_operation_lock(self):
         module = ModuleBase()
         mock_file = MockFile()
@@ -144,12 +221,12 @@ class TestModuleBase:
         module = ModuleBase()
 
         with patch.object(module, 'get_pci_bus_info', return_value=["0000:00:00.0"]), \
-             patch.object(module, 'pci_entry_state_db') as mock_db, \
+             patch.object(module, 'pci_entries_state_db') as mock_db, \
              patch.object(module, 'pci_detach', return_value=True), \
              patch.object(module, '_pci_operation_lock') as mock_lock, \
              patch.object(module, 'get_name', return_value="DPU0"):
             assert module.handle_pci_removal() is True
-            mock_db.assert_called_with("0000:00:00.0", "detaching")
+            mock_db.assert_called_once_with(["0000:00:00.0"], "detaching")
             mock_lock.assert_called_once()
 
         with patch.object(module, 'get_pci_bus_info', side_effect=Exception()):
@@ -159,12 +236,12 @@ class TestModuleBase:
         module = ModuleBase()
 
         with patch.object(module, 'get_pci_bus_info', return_value=["0000:00:00.0"]), \
-             patch.object(module, 'pci_entry_state_db') as mock_db, \
+             patch.object(module, 'pci_entries_state_db') as mock_db, \
              patch.object(module, 'pci_reattach', return_value=True), \
              patch.object(module, '_pci_operation_lock') as mock_lock, \
              patch.object(module, 'get_name', return_value="DPU0"):
             assert module.handle_pci_rescan() is True
-            mock_db.assert_called_with("0000:00:00.0", "attaching")
+            mock_db.assert_called_once_with(["0000:00:00.0"], "attaching")
             mock_lock.assert_called_once()
 
         with patch.object(module, 'get_pci_bus_info', side_effect=Exception()):
@@ -176,23 +253,28 @@ class TestModuleBase:
         with patch.object(module, 'get_name', return_value="DPU0"), \
              patch('os.path.exists', return_value=True), \
              patch('shutil.copy2') as mock_copy, \
-             patch('os.system') as mock_system, \
-             patch.object(module, '_sensord_operation_lock') as mock_lock:
+             patch.object(module, 'request_sensord_restart') as mock_restart:
+            mock_restart.return_value.wait.return_value = True
             assert module.handle_sensor_removal() is True
             mock_copy.assert_called_once_with("/usr/share/sonic/platform/module_sensors_ignore_conf/ignore_sensors_DPU0.conf",
                                              "/etc/sensors.d/ignore_sensors_DPU0.conf")
-            mock_system.assert_called_once_with("service sensord restart")
-            mock_lock.assert_called_once()
+            mock_restart.assert_called_once()
+            mock_restart.return_value.wait.assert_called_once()
+
+        with patch.object(module, 'get_name', return_value="DPU0"), \
+             patch('os.path.exists', return_value=True), \
+             patch('shutil.copy2') as mock_copy, \
+             patch.object(module, 'request_sensord_restart') as mock_restart:
+            mock_restart.return_value.wait.return_value = False
+            assert module.handle_sensor_removal() is False
 
         with patch.object(module, 'get_name', return_value="DPU0"), \
              patch('os.path.exists', return_value=False), \
              patch('shutil.copy2') as mock_copy, \
-             patch('os.system') as mock_system, \
-             patch.object(module, '_sensord_operation_lock') as mock_lock:
+             patch.object(module, 'request_sensord_restart') as mock_restart:
             assert module.handle_sensor_removal() is True
             mock_copy.assert_not_called()
-            mock_system.assert_not_called()
-            mock_lock.assert_not_called()
+            mock_restart.assert_not_called()
 
         with patch.object(module, 'get_name', return_value="DPU0"), \
              patch('os.path.exists', return_value=True), \
@@ -205,28 +287,82 @@ class TestModuleBase:
         with patch.object(module, 'get_name', return_value="DPU0"), \
              patch('os.path.exists', return_value=True), \
              patch('os.remove') as mock_remove, \
-             patch('os.system') as mock_system, \
-             patch.object(module, '_sensord_operation_lock') as mock_lock:
+             patch.object(module, 'request_sensord_restart') as mock_restart:
+            mock_restart.return_value.wait.return_value = True
             assert module.handle_sensor_addition() is True
             mock_remove.assert_called_once_with("/etc/sensors.d/ignore_sensors_DPU0.conf")
-            mock_system.assert_called_once_with("service sensord restart")
-            mock_lock.assert_called_once()
+            mock_restart.assert_called_once()
+            mock_restart.return_value.wait.assert_called_once()
 
         with patch.object(module, 'get_name', return_value="DPU0"), \
              patch('os.path.exists', return_value=False), \
              patch('os.remove') as mock_remove, \
-             patch('os.system') as mock_system, \
-             patch.object(module, '_sensord_operation_lock') as mock_lock:
+             patch.object(module, 'request_sensord_restart') as mock_restart:
             assert module.handle_sensor_addition() is True
             mock_remove.assert_not_called()
-            mock_system.assert_not_called()
-            mock_lock.assert_not_called()
+            mock_restart.assert_not_called()
 
         with patch.object(module, 'get_name', return_value="DPU0"), \
              patch('os.path.exists', return_value=True), \
              patch('os.remove', side_effect=Exception("Remove failed")):
             assert module.handle_sensor_addition() is False
 
+    def test_sensord_restart_coordinator_coalesces(self):
+        mock_lock = MagicMock()
+        coordinator = SensordRestartCoordinator(lock_factory=mock_lock, debounce_secs=0.05)
+        results = []
+
+        def request():
+            results.append(coordinator.request_restart().wait(timeout=5))
+
+        with patch('subprocess.run') as mock_run:
+            mock_run.return_value.returncode = 0
+            threads = [threading.Thread(target=request) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            mock_run.assert_called_once_with(["service", "sensord", "restart"],
+                                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            mock_lock.assert_called_once()
+            assert results == [True] * 4
+
+            # A request made after the batch completed starts a new batch
+            assert coordinator.request_restart().wait(timeout=5) is True
+            assert mock_run.call_count == 2
+
+    def test_sensord_restart_coordinator_flush(self):
+        coordinator = SensordRestartCoordinator(debounce_secs=60)
+
+        with patch('subprocess.run') as mock_run:
+            mock_run.return_value.returncode = 1
+            batch = coordinator.request_restart()
+            assert coordinator.request_restart() is batch
+            assert batch.requests == 2
+            assert batch.wait(timeout=0) is False
+            coordinator.flush()
+            assert batch.wait() is False
+            mock_run.assert_called_once()
+
+        with patch('subprocess.run', side_effect=OSError("no service")):
+            batch = coordinator.request_restart()
+            coordinator.flush()
+            assert batch.wait() is False
+
+        # Nothing pending
+        with patch('subprocess.run') as mock_run:
+            coordinator.flush()
+            mock_run.assert_not_called()
+
+    def test_request_sensord_restart_shared(self):
+        module1 = ModuleBase()
+        module2 = ModuleBase()
+        with patch.object(ModuleBase, '_sensord_restart_coordinator', None):
+            coordinator = module1._get_sensord_restart_coordinator()
+            assert module2._get_sensord_restart_coordinator() is coordinator
+            with patch.object(coordinator, 'request_restart') as mock_request:
+                assert module2.request_sensord_restart() is mock_request.return_value
+
     def test_module_pre_shutdown(self):
         module = ModuleBase()
 
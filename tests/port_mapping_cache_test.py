@@ -0,0 +1,107 @@
+'''
+Test port_mapping_cache module
+'''
+
+import os
+
+from sonic_platform_base.sonic_sfp.port_mapping_cache import (
+    LogicalPortIndex,
+    PortMappingCache,
+    PortMappings,
+)
+
+def make_mappings():
+    mappings = PortMappings()
+    mappings.add('Ethernet0', 1, 0, 'xe0')
+    mappings.add('Ethernet2', 1, 0, 'xe1')
+    mappings.add('Ethernet4', 1.5, 1, 'xe2')
+    return mappings
+
+class TestPortMappingCache:
+    '''
+    Collection of PortMappingCache test methods
+    '''
+
+    def test_mappings(self):
+        mappings = make_mappings()
+        assert mappings.logical == ['Ethernet0', 'Ethernet2', 'Ethernet4']
+        assert mappings.physical_to_logical == {1: ['Ethernet0', 'Ethernet2'], 1.5: ['Ethernet4']}
+        assert mappings.logical_to_physical['Ethernet4'] == [1.5]
+        assert mappings.logical_to_asic['Ethernet4'] == 1
+
+        restored = PortMappings.from_dict(mappings.to_dict())
+        for name in ('logical', 'logical_to_physical', 'physical_to_logical', 'logical_to_bcm',
+                     'logical_to_asic'):
+            assert getattr(restored, name) == getattr(mappings, name)
+
+    def test_cache(self, tmp_path):
+        source = tmp_path / 'port_config.ini'
+        source.write_text('# name lanes alias index\n')
+        key = ['porttab', str(source), 0]
+        compiled = []
+        def compile_mappings():
+            compiled.append(1)
+            return make_mappings()
+
+        cache = PortMappingCache(str(tmp_path / 'cache'))
+        mappings = cache.get(key, [str(source)], compile_mappings)
+        assert len(compiled) == 1
+        # Physical port keys keep their type through the cache file
+        cached = PortMappingCache(str(tmp_path / 'cache')).get(key, [str(source)], compile_mappings)
+        assert len(compiled) == 1
+        assert list(cached.physical_to_logical.items()) == list(mappings.physical_to_logical.items())
+
+        # Another key is compiled on its own
+        cache.get(key + [1], [str(source)], compile_mappings)
+        assert len(compiled) == 2
+
+        st = os.stat(str(source))
+        os.utime(str(source), ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+        cache.get(key, [str(source)], compile_mappings)
+        assert len(compiled) == 3
+        cache.get(key, [str(source)], compile_mappings)
+        assert len(compiled) == 3
+
+    def test_cache_unusable(self, tmp_path):
+        cache = PortMappingCache(str(tmp_path))
+        key = ['porttab']
+        assert cache.save(key, [], make_mappings())
+        with open(cache._path(key), 'w') as f:
+            f.write('{corrupted')
+        assert cache.load(key, []) is None
+        assert cache.get(key, [], make_mappings).logical == make_mappings().logical
+
+        # A cache directory which cannot be created only disables the cache
+        (tmp_path / 'file').write_text('')
+        cache = PortMappingCache(str(tmp_path / 'file' / 'cache'))
+        assert not cache.save(key, [], make_mappings())
+        assert cache.get(key, [], make_mappings).logical == make_mappings().logical
+
+    def test_cache_in_memory(self, tmp_path):
+        source = tmp_path / 'port_config.ini'
+        source.write_text('# name lanes alias index\n')
+        compiled = []
+        def compile_mappings():
+            compiled.append(1)
+            return make_mappings()
+
+        cache = PortMappingCache()
+        mappings = cache.get(['porttab'], [str(source)], compile_mappings)
+        assert cache.get(['porttab'], [str(source)], compile_mappings) is mappings
+        assert len(compiled) == 1
+        assert os.listdir(str(tmp_path)) == ['port_config.ini']
+        # No ports are compiled again next time
+        assert cache.get(['empty'], [str(source)], lambda: None) is None
+        assert cache.get(['empty'], [str(source)], compile_mappings) is not None
+
+    def test_logical_port_index(self):
+        index = LogicalPortIndex()
+        logical = ['Ethernet0']
+        assert 'Ethernet0' in index.get(logical)
+        # A list changed in place is indexed again once updated
+        logical[0] = 'Ethernet4'
+        index.update(logical)
+        assert 'Ethernet4' in index.get(logical)
+        assert 'Ethernet0' not in index.get(logical)
+        assert 'Ethernet0' not in index.get(['Ethernet8'])
+        assert 'Ethernet8' in index.get(['Ethernet8'])
@@ -0,0 +1,99 @@
+'''
+Test presence_watcher module
+'''
+
+import select
+from unittest import mock
+
+from sonic_platform_base.presence_watcher import (
+    PresenceSource,
+    PresenceWatcher,
+    SfpPresenceSource,
+    SysfsPresenceSource,
+)
+
+def make_sysfs(tmp_path, values):
+    paths = []
+    for name, value in values.items():
+        path = tmp_path / name
+        path.write_text(value + '\n')
+        paths.append(str(path))
+    return paths
+
+class TestPresenceWatcher:
+    '''
+    Collection of PresenceWatcher test methods
+    '''
+
+    def test_sysfs_port_attributes(self, tmp_path):
+        paths = make_sysfs(tmp_path, {'port0': '1', 'port1': '0', 'port2': '0'})
+        source = SysfsPresenceSource([(path, port, 1) for port, path in enumerate(paths)],
+                                     poll_interval=0.001)
+        watcher = PresenceWatcher(source)
+        assert watcher.get_change_event(timeout=5) == (True, {'sfp': {}})
+        assert watcher.bitmap == 0x1
+
+        (tmp_path / 'port0').write_text('0\n')
+        (tmp_path / 'port2').write_text('1\n')
+        assert watcher.get_change_event(timeout=5) == (True, {'sfp': {'0': '0', '2': '1'}})
+        assert watcher.get_transceiver_change_event(timeout=5) == (True, {})
+        # The attributes stay open from one read to the next
+        assert len(source._fds) == 3
+        source.close()
+        assert not source._fds
+
+    def test_sysfs_bitmap_attribute(self, tmp_path):
+        paths = make_sysfs(tmp_path, {'present_0_15': '0xfffe', 'present_16_31': '0xffff'})
+        source = SysfsPresenceSource([(paths[0], 0, 16), (paths[1], 16, 16)], active_low=True,
+                                     poll_interval=0.001)
+        watcher = PresenceWatcher(source, index_base=1)
+        watcher.get_change_event(timeout=1)
+        assert watcher.bitmap == 0x1
+
+        (tmp_path / 'present_16_31').write_text('0x7fff\n')
+        assert watcher.get_change_event(timeout=5) == (True, {'sfp': {'32': '1'}})
+
+    def test_sysfs_failure(self, tmp_path):
+        paths = make_sysfs(tmp_path, {'port0': '1'})
+        watcher = PresenceWatcher(SysfsPresenceSource([(paths[0], 0, 1)], poll_interval=0.001))
+        watcher.get_change_event(timeout=1)
+        (tmp_path / 'port0').write_text('garbage\n')
+        assert watcher.get_change_event(timeout=1) == (False, {'sfp': {}})
+        assert watcher.get_transceiver_change_event(timeout=1) == (False, {})
+        (tmp_path / 'port0').write_text('0\n')
+        assert watcher.get_change_event(timeout=1) == (True, {'sfp': {'0': '0'}})
+
+    def test_sysfs_notify(self, tmp_path):
+        paths = make_sysfs(tmp_path, {'port0': '0', 'port1': '0'})
+        source = SysfsPresenceSource([(path, port, 1) for port, path in enumerate(paths)], notify=True)
+        watcher = PresenceWatcher(source)
+        poller = mock.MagicMock()
+        def notify(timeout):
+            # The driver notifies an insertion without waiting for the poll interval
+            assert timeout == 10000
+            (tmp_path / 'port1').write_text('1\n')
+            return [(source._fds[paths[1]], select.POLLPRI)]
+        poller.poll.side_effect = notify
+        with mock.patch('select.poll', return_value=poller):
+            assert watcher.get_change_event() == (True, {'sfp': {'1': '1'}})
+        registered = [call[0] for call in poller.register.call_args_list]
+        assert registered == [(fd, select.POLLPRI | select.POLLERR) for fd in source._fds.values()]
+
+    def test_blocking_hook(self):
+        bitmaps = iter([0x0, 0x0, 0x0, 0x4])
+        source = PresenceSource(lambda: next(bitmaps), poll_interval=0.5)
+        watcher = PresenceWatcher(source)
+        with mock.patch('time.sleep') as mock_sleep:
+            assert watcher.get_change_event(0) == (True, {'sfp': {'2': '1'}})
+        assert mock_sleep.call_args_list == [mock.call(0.5)] * 3
+
+    def test_sfp_source(self):
+        sfps = [mock.MagicMock() for _ in range(4)]
+        for sfp in sfps:
+            sfp.get_presence.return_value = False
+        watcher = PresenceWatcher(SfpPresenceSource(sfps, poll_interval=0.001))
+        assert watcher.get_transceiver_change_event(timeout=1) == (True, {})
+        sfps[3].get_presence.return_value = True
+        assert watcher.get_transceiver_change_event(timeout=1) == (True, {'3': '1'})
+        watcher.reset()
+        assert watcher.get_transceiver_change_event(timeout=1) == (True, {})
@@ -0,0 +1,88 @@
+import builtins
+import threading
+from unittest import mock
+
+from sonic_platform_base.sonic_sfp.sfputilbase import SfpUtilBase
+
+EEPROM_DATA = bytes(range(256))
+
+class SfpUtil(SfpUtilBase):
+    port_start = 0
+    port_end = 2
+    qsfp_ports = []
+
+    def __init__(self, eeprom_paths):
+        SfpUtilBase.__init__(self)
+        self._eeprom_paths = eeprom_paths
+
+    @property
+    def port_to_eeprom_mapping(self):
+        return self._eeprom_paths
+
+def make_sfputil(tmp_path):
+    paths = {}
+    for port in range(2):
+        path = tmp_path / 'eeprom{}'.format(port)
+        path.write_bytes(EEPROM_DATA)
+        paths[port] = str(path)
+    paths[2] = str(tmp_path / 'missing' / 'eeprom')
+    return SfpUtil(paths)
+
+class TestSfpUtilBaseEepromCache(object):
+
+    def test_cache_hit(self, tmp_path):
+        sfputil = make_sfputil(tmp_path)
+        with mock.patch('builtins.open', wraps=builtins.open) as mock_open:
+            for _ in range(3):
+                assert sfputil.get_eeprom_raw(0, 4) == ['00', '01', '02', '03']
+            assert sfputil._read_eeprom_devid(0, sfputil.IDENTITY_EEPROM_ADDR, 128, 2) == ['80', '81']
+        assert mock_open.call_count == 1
+        assert sfputil.get_eeprom_raw(2) is None
+        # The missing EEPROM is looked up again next time
+        assert (2, sfputil.IDENTITY_EEPROM_ADDR) not in sfputil._eeprom_path_cache
+
+    def test_concurrent_reads(self, tmp_path):
+        sfputil = make_sfputil(tmp_path)
+        errors = []
+        def read(offset):
+            for _ in range(200):
+                if sfputil._read_eeprom_devid(0, sfputil.IDENTITY_EEPROM_ADDR, offset, 2) != \
+                        ['%02x' % offset, '%02x' % (offset + 1)]:
+                    errors.append(offset)
+        threads = [threading.Thread(target=read, args=(offset,)) for offset in (0, 64, 128, 200)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+
+    def test_failed_read(self, tmp_path):
+        sfputil = make_sfputil(tmp_path)
+        key = (0, sfputil.IDENTITY_EEPROM_ADDR)
+        assert sfputil.get_eeprom_raw(0, 1) == ['00']
+        with mock.patch('os.pread', side_effect=OSError(110, 'Connection timed out')):
+            assert sfputil.get_eeprom_raw(0, 1) is None
+        assert key not in sfputil._eeprom_file_cache
+        assert key not in sfputil._eeprom_path_cache
+        assert sfputil.get_eeprom_raw(0, 1) == ['00']
+
+    def test_invalidate(self, tmp_path):
+        sfputil = make_sfputil(tmp_path)
+        sfputil.get_eeprom_raw(0, 1)
+        sfputil.get_eeprom_raw(1, 1)
+        port0_file = sfputil._eeprom_file_cache[(0, sfputil.IDENTITY_EEPROM_ADDR)]
+        sfputil.invalidate_eeprom_cache(0)
+        assert port0_file.closed
+        assert [key[0] for key in sfputil._eeprom_file_cache] == [1]
+        assert [key[0] for key in sfputil._eeprom_path_cache] == [1]
+        sfputil.invalidate_eeprom_cache()
+        assert not sfputil._eeprom_file_cache
+        assert not sfputil._eeprom_path_cache
+
+    def test_write(self, tmp_path):
+        sfputil = make_sfputil(tmp_path)
+        assert sfputil._write_eeprom_devid(0, sfputil.IDENTITY_EEPROM_ADDR, 1, 1, bytearray([0xab])) is True
+        assert sfputil.get_eeprom_raw(0, 2) == ['00', 'ab']
+        assert sfputil._write_eeprom_devid(2, sfputil.IDENTITY_EEPROM_ADDR, 0, 1, bytearray([0])) is False
+        with mock.patch.object(sfputil, '_resolve_port_eeprom_path', return_value=None):
+            assert sfputil._write_eeprom_devid(1, sfputil.IDENTITY_EEPROM_ADDR, 0, 1, bytearray([0])) is False
@@ -146,6 +146,43 @@ class TestSfpUtilHelper(object):
 
         assert len(logical_port_list) == len(PORT_FILTERED_LIST)
 
+    @mock.patch('portconfig.db_connect_configdb', mock.MagicMock(return_value=None))
+    def test_read_port_mappings_cached(self, tmp_path):
+        port_config_file = tmp_path / 'port_config.ini'
+        with open(self.port_config_file) as f:
+            port_config_file.write_text(f.read())
+
+        sfputil_helper = sfputilhelper.SfpUtilHelper()
+        sfputil_helper.logical = []
+        sfputil_helper.logical_to_physical = {}
+        sfputil_helper.physical_to_logical = {}
+        with mock.patch('sonic_platform_base.sonic_sfp.sfputilhelper.get_port_config',
+                        wraps=sfputilhelper.get_port_config) as mock_get_port_config:
+            for _ in range(2):
+                sfputil_helper.read_porttab_mappings(str(port_config_file), 0)
+            assert mock_get_port_config.call_count == 1
+            assert sfputil_helper.logical == PORT_LIST
+            assert sfputil_helper.is_logical_port('Ethernet48')
+
+            # A changed file is read again
+            port_config_file.write_text(''.join(port_config_file.read_text().splitlines(True)[:-1]))
+            st = os.stat(str(port_config_file))
+            os.utime(str(port_config_file), ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+            sfputil_helper.logical = []
+            sfputil_helper.read_porttab_mappings(str(port_config_file), 0)
+            assert mock_get_port_config.call_count == 2
+            assert sfputil_helper.logical == PORT_LIST[:-1]
+            assert not sfputil_helper.is_logical_port('Ethernet48')
+
+        # Ports in CONFIG_DB are not cached
+        config_db = mock.MagicMock()
+        config_db.get_table.return_value = {'Ethernet0': {'index': '1'}, 'Ethernet4': {'index': '2'}}
+        sfputil_helper.logical = []
+        with mock.patch('portconfig.db_connect_configdb', mock.MagicMock(return_value=config_db)):
+            sfputil_helper.read_porttab_mappings(str(port_config_file), 0)
+        assert sfputil_helper.logical == ['Ethernet0', 'Ethernet4']
+        assert not sfputil_helper.is_logical_port('Ethernet8')
+
     def test_set_power(self):
         sfpbase = SfpBase()
         mode = 1
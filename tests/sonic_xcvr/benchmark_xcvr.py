@@ -0,0 +1,117 @@
+"""
+   benchmark_xcvr.py
+
+   Management interface benchmark for the sonic_xcvr public APIs.
+
+   Runs each public API against a VirtualXcvr of every supported module type and reports, per
+   call, the bus transactions, bytes read and written, the simulated bus time and the wall time
+   spent in Python. The first call on a fresh API object is reported separately from the
+   steady state, since CMIS APIs cache static data and VDM layouts after the first call.
+   time.sleep is redirected to the virtual clock, so CDB polling costs no wall time.
+   Not collected by pytest; run it directly:
+
+       python -m tests.sonic_xcvr.benchmark_xcvr [iterations] [module_type ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+
+from .virtual_xcvr import MODULE_IMAGES, make_virtual_xcvr
+
+FW_IMAGE_SIZE = 32 * 1024
+
+def _fw_download(api, imagepath):
+    feature = api.get_module_fw_mgmt_feature()['feature']
+    status, _ = api.module_fw_download(*feature, imagepath)
+    assert status
+    return status
+
+# (name, function(api, imagepath), APIs that must be implemented for it to run)
+BENCHMARKS = [
+    ('info', lambda api, _: api.get_transceiver_info(), 'get_transceiver_info'),
+    ('dom', lambda api, _: api.get_transceiver_dom_real_value(), 'get_transceiver_dom_real_value'),
+    ('thresholds', lambda api, _: api.get_transceiver_threshold_info(), 'get_transceiver_threshold_info'),
+    ('vdm', lambda api, _: api.get_transceiver_vdm_real_value(), 'get_transceiver_vdm_real_value'),
+    ('vdm_thresholds', lambda api, _: api.get_transceiver_vdm_thresholds(), 'get_transceiver_vdm_thresholds'),
+    ('vdm_flags', lambda api, _: api.get_transceiver_vdm_flags(), 'get_transceiver_vdm_flags'),
+    ('pm', lambda api, _: api.get_transceiver_pm(), 'get_transceiver_pm'),
+    ('fw_download', _fw_download, 'module_fw_download'),
+]
+
+def _supported(api, method):
+    """
+    Return: True if the API class overrides the XcvrApi placeholder of method
+    """
+    for cls in type(api).__mro__:
+        if method in cls.__dict__:
+            return cls.__name__ != 'XcvrApi'
+    return False
+
+def _run(vx, func, api, imagepath, iterations):
+    vx.reset_stats()
+    start = time.perf_counter()
+    with mock.patch('time.sleep', vx.sleep):
+        for _ in range(iterations):
+            result = func(api, imagepath)
+    elapsed = time.perf_counter() - start
+    stats = vx.get_stats()
+    per_call = {key: value / iterations for key, value in stats.items()}
+    per_call['wall_time'] = elapsed / iterations
+    return per_call, result
+
+def run_benchmarks(iterations=10, module_types=None, bus=None):
+    """
+    Return: list of dicts, one per (module type, benchmark) pair, holding the per call cost of
+    the first call ('first') and of the following iterations ('steady')
+    """
+    results = []
+    fd, imagepath = tempfile.mkstemp(suffix='.bin')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(bytes(range(256)) * (FW_IMAGE_SIZE // 256))
+        for module_type in module_types or MODULE_IMAGES:
+            for name, func, method in BENCHMARKS:
+                vx = make_virtual_xcvr(module_type, bus=bus)
+                with mock.patch('time.sleep', vx.sleep):
+                    api = XcvrApiFactory(vx.reader, vx.writer).create_xcvr_api()
+                if not _supported(api, method):
+                    continue
+                first, result = _run(vx, func, api, imagepath, 1)
+                assert result, "%s returned %r on %s" % (name, result, module_type)
+                # Firmware downloads are long, the first one is representative
+                steady, _ = _run(vx, func, api, imagepath, 1 if name == 'fw_download' else iterations)
+                results.append({
+                    'module_type': module_type,
+                    'api': type(api).__name__,
+                    'benchmark': name,
+                    'first': first,
+                    'steady': steady,
+                })
+    finally:
+        os.remove(imagepath)
+    return results
+
+def format_results(results):
+    lines = ["%-8s %-14s %-7s %8s %8s %8s %10s %10s" % ('module', 'benchmark', 'call', 'txns',
+             'rd bytes', 'wr bytes', 'bus ms', 'wall ms')]
+    for entry in results:
+        for call in ('first', 'steady'):
+            cost = entry[call]
+            lines.append("%-8s %-14s %-7s %8.1f %8.1f %8.1f %10.3f %10.3f" % (
+                entry['module_type'], entry['benchmark'], call, cost['transactions'],
+                cost['bytes_read'], cost['bytes_written'], cost['bus_time'] * 1e3,
+                cost['wall_time'] * 1e3))
+    return '\n'.join(lines)
+
+def main(argv):
+    iterations = int(argv[1]) if len(argv) > 1 else 10
+    module_types = argv[2:] or None
+    print(format_results(run_benchmarks(iterations, module_types)))
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,94 @@
+"""
+   benchmark_xcvr_decode.py
+
+   Allocation benchmark for the xcvr field decode pipeline.
+
+   Decodes the CMIS transceiver info from an in-memory EEPROM image and reports, for
+   get_transceiver_info and for the RegGroupField.decode of its largest group (ADMIN_INFO),
+   the peak memory traced by tracemalloc during a call and the time a call takes without
+   tracing (best of several rounds). Not collected by pytest; run it directly:
+
+       python -m tests.sonic_xcvr.benchmark_xcvr_decode [iterations]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from sonic_platform_base.sonic_xcvr.api.public.cmis import CmisApi
+from sonic_platform_base.sonic_xcvr.codes.public.cmis import CmisCodes
+from sonic_platform_base.sonic_xcvr.fields import consts
+from sonic_platform_base.sonic_xcvr.mem_maps.public.cmis import CmisMemMap
+from sonic_platform_base.sonic_xcvr.xcvr_eeprom import XcvrEeprom
+
+PAGE_SIZE = 128
+ROUNDS = 5
+
+def make_cmis_image():
+    """
+    Return: bytearray holding the lower memory and pages 00h-02h, 11h of a 400G-ZR like module
+    """
+    image = bytearray(PAGE_SIZE * 0x12)
+    image[0] = 0x18                                   # QSFP-DD
+    image[1] = 0x50                                   # CMIS 5.0
+    image[85] = 0x02                                  # SMF media type
+    # Application advertisement: 400GAUI-8 C2M / 400ZR, 8 host lanes, 1 media lane
+    image[86:90] = bytes([0x11, 0x3e, 0x81, 0x01])
+    image[90:94] = bytes([0xff, 0x00, 0x00, 0x00])
+    page0 = PAGE_SIZE
+    image[page0 + 129:page0 + 145] = b'VENDOR          '
+    image[page0 + 148:page0 + 164] = b'PART-NUMBER     '
+    image[page0 + 164:page0 + 166] = b'A '
+    image[page0 + 166:page0 + 182] = b'SERIAL          '
+    image[page0 + 182:page0 + 190] = b'21102000'
+    image[page0 + 200] = 0xe0                         # power class 8
+    image[page0 + 201] = 0x50                         # 20W
+    image[page0 + 203] = 0x07                         # LC connector
+    return image
+
+def make_api(image):
+    def reader(offset, size):
+        # Mirrors the optoe reader, which returns a new bytearray per read
+        return image[offset:offset + size]
+
+    CmisApi.set_cache_enabled(False)
+    eeprom = XcvrEeprom(reader, None, CmisMemMap(CmisCodes))
+    return CmisApi(eeprom)
+
+def measure(func, iterations):
+    """
+    Return: (peak bytes traced during a call, seconds per call) of func
+    """
+    func()
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = (time.perf_counter() - start) / iterations
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    peak = 0
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return peak, best
+
+def main(argv):
+    iterations = int(argv[1]) if len(argv) > 1 else 200
+    image = make_cmis_image()
+    api = make_api(image)
+    field = api.xcvr_eeprom.mem_map.get_field(consts.ADMIN_INFO_FIELD)
+    data = image[field.get_offset():field.get_offset() + field.get_size()]
+    decode_deps = {dep: api.xcvr_eeprom.read(dep) for dep in field.get_deps()}
+    for name, func in (('get_transceiver_info', api.get_transceiver_info),
+                       ('ADMIN_INFO decode', lambda: field.decode(data, **decode_deps))):
+        peak, elapsed = measure(func, iterations)
+        print("%-22s peak %6.1f KB, %7.1f us per call" % (name, peak / 1024.0, elapsed * 1e6))
+
+if __name__ == '__main__':
+    main(sys.argv)
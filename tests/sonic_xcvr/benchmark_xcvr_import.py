@@ -0,0 +1,73 @@
+"""
+   benchmark_xcvr_import.py
+
+   Import time and API selection benchmark for XcvrApiFactory.
+
+   Imports the factory in fresh interpreters and reports the median import time and the number
+   of sonic_xcvr modules it loads, then the time create_xcvr_api takes per port for each
+   module type, the first call (importing the implementation) apart from the following ones.
+   Not collected by pytest; run it directly:
+
+       python -m tests.sonic_xcvr.benchmark_xcvr_import [runs] [iterations]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from .virtual_xcvr import MODULE_IMAGES, make_virtual_xcvr
+
+IMPORT_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import sonic_platform_base.sonic_xcvr.xcvr_api_factory
+elapsed = time.perf_counter() - start
+print(elapsed, len([name for name in sys.modules if name.startswith('sonic_platform_base.sonic_xcvr.')]))
+'''
+
+def measure_import(runs):
+    """
+    Return: (median seconds, sonic_xcvr modules loaded) of importing the factory
+    """
+    times = []
+    modules = 0
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT])
+        elapsed, modules = output.split()
+        times.append(float(elapsed))
+    return statistics.median(times), int(modules)
+
+def measure_factory(iterations):
+    """
+    Return: {module type: (first call seconds, steady call seconds)} of create_xcvr_api
+    """
+    from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+
+    results = {}
+    for module_type in MODULE_IMAGES:
+        vx = make_virtual_xcvr(module_type)
+        factory = XcvrApiFactory(vx.reader, vx.writer)
+        with mock.patch('time.sleep', vx.sleep):
+            start = time.perf_counter()
+            factory.create_xcvr_api()
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(iterations):
+                factory.create_xcvr_api()
+            steady = (time.perf_counter() - start) / iterations
+        results[module_type] = (first, steady)
+    return results
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 20
+    iterations = int(argv[2]) if len(argv) > 2 else 200
+    elapsed, modules = measure_import(runs)
+    print("import xcvr_api_factory: %.3f ms, %d sonic_xcvr modules" % (elapsed * 1e3, modules))
+    print("%-8s %12s %12s" % ('module', 'first ms', 'steady ms'))
+    for module_type, (first, steady) in measure_factory(iterations).items():
+        print("%-8s %12.3f %12.3f" % (module_type, first * 1e3, steady * 1e3))
+
+if __name__ == '__main__':
+    main(sys.argv)
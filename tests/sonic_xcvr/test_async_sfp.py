@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from sonic_platform_base.sonic_xcvr import async_sfp
+from sonic_platform_base.sonic_xcvr.async_sfp import AsyncSfp, AsyncSfpRunner
+from sonic_platform_base.sonic_xcvr.sfp_optoe_base import SfpOptoeBase
+
+from .virtual_xcvr import make_virtual_xcvr
+
+class VirtualSfp(SfpOptoeBase):
+    def __init__(self, vx, adapter=5):
+        SfpOptoeBase.__init__(self)
+        self.vx = vx
+        self.adapter = adapter
+
+    def get_eeprom_path(self):
+        return '/sys/bus/i2c/devices/{}-0050/eeprom'.format(self.adapter)
+
+    def read_eeprom(self, offset, num_bytes):
+        return self.vx.reader(offset, num_bytes)
+
+    def write_eeprom(self, offset, num_bytes, write_buffer):
+        return self.vx.writer(offset, num_bytes, write_buffer)
+
+class ConcurrencyProbe(object):
+    """
+    Blocking operation recording how many of its calls run at once, overall and per bus
+    """
+    def __init__(self, duration=0.02):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.running = {}
+        self.max_bus = 0
+        self.total = 0
+        self.max_total = 0
+
+    def __call__(self, bus):
+        with self.lock:
+            self.running[bus] = self.running.get(bus, 0) + 1
+            self.total += 1
+            self.max_bus = max(self.max_bus, self.running[bus])
+            self.max_total = max(self.max_total, self.total)
+        time.sleep(self.duration)
+        with self.lock:
+            self.running[bus] -= 1
+            self.total -= 1
+        return bus
+
+class TestAsyncSfp(object):
+
+    def test_info(self):
+        sfp = VirtualSfp(make_virtual_xcvr('cmis'))
+        asfp = AsyncSfp(sfp)
+        assert asfp.bus == '5'
+        expected = sfp.get_transceiver_info()
+        async def read():
+            return await asyncio.gather(asfp.get_transceiver_info(), asfp.get_transceiver_dom_real_value())
+        info, dom = asyncio.run(read())
+        asfp.runner.shutdown()
+        assert info == expected
+        assert dom is not None
+
+    def test_buses(self):
+        probe = ConcurrencyProbe()
+        runner = AsyncSfpRunner()
+        async def run_all():
+            return await asyncio.gather(*(runner.run(bus, probe, bus) for bus in range(4) for _ in range(3)))
+        assert asyncio.run(run_all()) == [bus for bus in range(4) for _ in range(3)]
+        runner.shutdown()
+        # Serialized on each bus, overlapping across buses
+        assert probe.max_bus == 1
+        assert probe.max_total > 1
+
+    def test_max_pending(self):
+        probe = ConcurrencyProbe(duration=0.002)
+        runner = AsyncSfpRunner(max_pending=2)
+        async def run_all():
+            await asyncio.gather(*(runner.run(bus, probe, bus) for bus in range(200)))
+        asyncio.run(run_all())
+        runner.shutdown()
+        assert probe.max_total <= 2
+
+    def test_cancel(self):
+        runner = AsyncSfpRunner()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        def blocking():
+            started.set()
+            release.wait(5)
+            return 'first'
+
+        async def scenario():
+            first = asyncio.ensure_future(runner.run(0, blocking))
+            second = asyncio.ensure_future(runner.run(0, calls.append, 'second'))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            second.cancel()
+            release.set()
+            assert await first == 'first'
+            # The bus is free for the next operations
+            await runner.run(0, calls.append, 'third')
+            return second.cancelled()
+
+        assert asyncio.run(scenario())
+        runner.shutdown()
+        assert calls == ['third']
+
+    def test_set_lpmode(self):
+        sfp = SfpOptoeBase()
+        api = mock.MagicMock()
+        api.set_lpmode.return_value = True
+        api.get_module_pwr_up_duration.return_value = 10000
+        api.get_module_state.side_effect = ['ModuleLowPwr', 'ModulePwrUp', 'ModuleReady']
+        sfp._xcvr_api = api
+        asfp = AsyncSfp(sfp)
+        assert asfp.bus is sfp
+        with mock.patch.object(async_sfp, 'LPMODE_POLL_INTERVAL', 0.001), \
+             mock.patch('time.sleep', side_effect=AssertionError('blocking sleep')):
+            assert asyncio.run(asfp.set_lpmode(False))
+        api.set_lpmode.assert_called_once_with(False, wait_state_change=False)
+        assert api.get_module_state.call_count == 3
+
+        api.get_lpmode.return_value = False
+        api.get_module_pwr_down_duration.return_value = 10
+        with mock.patch.object(async_sfp, 'LPMODE_POLL_INTERVAL', 0.001):
+            assert not asyncio.run(asfp.set_lpmode(True))
+
+        # Platform implementations are used as they are
+        class PlatformSfp(SfpOptoeBase):
+            def set_lpmode(self, lpmode):
+                return 'platform'
+        platform_sfp = PlatformSfp()
+        platform_sfp._xcvr_api = api
+        assert asyncio.run(AsyncSfp(platform_sfp).set_lpmode(True)) == 'platform'
+        asfp.runner.shutdown()
+
+    def test_module_fw_download(self, tmp_path):
+        vx = make_virtual_xcvr('cmis')
+        imagepath = tmp_path / 'image.bin'
+        imagepath.write_bytes(bytes(range(256)) * 16)
+        asfp = AsyncSfp(VirtualSfp(vx))
+        with mock.patch('time.sleep', vx.sleep):
+            status, _ = asyncio.run(asfp.module_fw_download(str(imagepath)))
+        asfp.runner.shutdown()
+        assert status
@@ -1,10 +1,11 @@
-from unittest.mock import patch
+from unittest.mock import call, patch
 from mock import MagicMock
 import pytest
 import traceback
 import random
 from sonic_platform_base.sonic_xcvr.api.public.cmis import CmisApi, CMIS_VDM_KEY_TO_DB_PREFIX_KEY_MAP, THRESHOLD_TYPE_STR_MAP
 from sonic_platform_base.sonic_xcvr.api.public.cmis import FLAG_TYPE_STR_MAP, CMIS_XCVR_INFO_DEFAULT_DICT
+from sonic_platform_base.sonic_xcvr.api.public.cmis import VDM_THRESHOLD_SUBTYPES
 from sonic_platform_base.sonic_xcvr.mem_maps.public.cmis import CmisMemMap
 from sonic_platform_base.sonic_xcvr.xcvr_eeprom import XcvrEeprom
 from sonic_platform_base.sonic_xcvr.codes.public.cmis import CmisCodes
@@ -1489,6 +1490,39 @@ class TestCmis(object):
         result = self.api.get_vdm()
         assert result == expected
 
+    def test_get_vdm_layout_firmware(self):
+        self.api.vdm = MagicMock()
+        self.api.vdm.vdm_layout_firmware = None
+        with patch.object(self.api, '_read_active_firmware_rev', side_effect=[b'\x01\x02', b'\x01\x03']):
+            self.api.get_vdm()
+            self.api.get_vdm()
+        # The active firmware is checked on each poll
+        assert self.api.vdm.set_vdm_layout_firmware.call_args_list == [call(b'\x01\x02'), call(b'\x01\x03')]
+
+    def test_read_active_firmware_rev(self):
+        self.api.xcvr_eeprom.read_raw = MagicMock(return_value=bytearray([1, 2]))
+        assert self.api._read_active_firmware_rev() == b'\x01\x02'
+        self.api.xcvr_eeprom.read_raw.assert_called_once_with(39, 2, return_raw=True)
+        self.api.xcvr_eeprom.read_raw.return_value = None
+        assert self.api._read_active_firmware_rev() is None
+
+    def test_module_fw_invalidates_vdm_layout(self):
+        # Running or committing firmware drops the descriptor layout
+        self.api.vdm = MagicMock()
+        self.api.cdb = MagicMock()
+        self.api.cdb.run_fw_image.return_value = 1
+        self.api.cdb.commit_fw_image.return_value = 1
+        self.api.module_fw_run()
+        self.api.module_fw_commit()
+        assert self.api.vdm.invalidate_vdm_layout.call_count == 2
+
+    def test_get_vdm_db_keys(self):
+        db_keys = self.api._get_vdm_db_keys(VDM_THRESHOLD_SUBTYPES)
+        assert self.api._get_vdm_db_keys(VDM_THRESHOLD_SUBTYPES) is db_keys
+        assert len(db_keys) == len(CMIS_VDM_KEY_TO_DB_PREFIX_KEY_MAP) * 8 * 4
+        assert db_keys[0] == ('laser_temperature_media_halarm1', 'Laser Temperature [C]', 1, 1)
+        assert db_keys[3] == ('laser_temperature_media_lwarn1', 'Laser Temperature [C]', 1, 4)
+
     @pytest.mark.parametrize("mock_response, expected", [
         (1, (False, False, True))
     ])
@@ -1,7 +1,8 @@
+import time
 from unittest.mock import patch
 from mock import MagicMock
 import pytest
-from sonic_platform_base.sonic_xcvr.api.public.cmisTargetFWUpgrade import TARGET_E0_VALUE, TARGET_LIST, CmisTargetFWUpgradeAPI
+from sonic_platform_base.sonic_xcvr.api.public.cmisTargetFWUpgrade import FIRMWARE_VERSIONS_CACHE_TTL, TARGET_E0_VALUE, TARGET_LIST, CmisTargetFWUpgradeAPI
 from sonic_platform_base.sonic_xcvr.codes.public.cmisTargetFWUpgrade import CmisTargetFWUpgradeCodes
 from sonic_platform_base.sonic_xcvr.mem_maps.public.cmisTargetFWUpgrade import CmisTargetFWUpgradeMemMap
 from sonic_platform_base.sonic_xcvr.xcvr_eeprom import XcvrEeprom
@@ -80,11 +81,73 @@ class TestCmis(object):
         with patch('sonic_platform_base.sonic_xcvr.api.public.cmis.CmisApi.get_transceiver_info_firmware_versions', side_effect=fw_info_dict):
             with patch('sonic_platform_base.sonic_xcvr.api.public.cmisTargetFWUpgrade.CmisTargetFWUpgradeAPI._get_server_firmware_version', side_effect=server_fw_info_dict):
                 self.api.set_firmware_download_target_end = MagicMock(return_value=True)
+                self.api.invalidate_firmware_versions_cache()
 
                 result = self.api.get_transceiver_info_firmware_versions()
                 assert result == expected_output
                 assert self.api.set_firmware_download_target_end.call_count == len(TARGET_LIST) + 1
 
+    def test_get_transceiver_info_firmware_versions_cache(self):
+        fw_info = {'active_firmware': '1.1.1', 'inactive_firmware': '1.0.0'}
+        # E0 and E2 are read, E1 is not accessible yet
+        set_target_results = {0: True, 1: False, 2: True}
+        self.api.set_firmware_download_target_end = MagicMock(side_effect=lambda target: set_target_results[target])
+        local_rev = [b'\x01\x01']
+        self.api.invalidate_firmware_versions_cache()
+        with patch('sonic_platform_base.sonic_xcvr.api.public.cmis.CmisApi.get_transceiver_info_firmware_versions',
+                   side_effect=lambda: dict(fw_info)) as mock_fw_versions, \
+             patch('sonic_platform_base.sonic_xcvr.api.public.cmisTargetFWUpgrade.CmisTargetFWUpgradeAPI._get_server_firmware_version',
+                   return_value={'server_firmware': '1.5.0.1421'}), \
+             patch.object(self.api, '_read_active_firmware_rev', side_effect=lambda: local_rev[0]):
+            result = self.api.get_transceiver_info_firmware_versions()
+            assert result['e2_active_firmware'] == '1.1.1'
+            assert result['e1_active_firmware'] == 'N/A'
+            assert mock_fw_versions.call_count == 2
+
+            # Only the target not read yet is switched to, then back to E0
+            set_target_results[1] = True
+            self.api.set_firmware_download_target_end.reset_mock()
+            result = self.api.get_transceiver_info_firmware_versions()
+            assert result['e1_active_firmware'] == '1.1.1'
+            assert result['e2_server_firmware'] == '1.5.0.1421'
+            assert [call[0][0] for call in self.api.set_firmware_download_target_end.call_args_list] == [1, TARGET_E0_VALUE]
+            assert mock_fw_versions.call_count == 3
+
+            # No target switch once all the targets are read
+            self.api.set_firmware_download_target_end.reset_mock()
+            assert self.api.get_transceiver_info_firmware_versions() == result
+            self.api.set_firmware_download_target_end.assert_not_called()
+            assert mock_fw_versions.call_count == 3
+
+            # Activating a firmware drops the versions read
+            with patch('sonic_platform_base.sonic_xcvr.api.public.cmis.CmisApi.module_fw_run', return_value=(True, '')):
+                self.api.module_fw_run(mode=0x01)
+            fw_info['active_firmware'] = '2.0.0'
+            result = self.api.get_transceiver_info_firmware_versions()
+            assert result['active_firmware'] == result['e1_active_firmware'] == '2.0.0'
+            assert self.api.set_firmware_download_target_end.call_count == len(TARGET_LIST) + 1
+
+            # So does a change of the local active firmware made elsewhere
+            self.api.set_firmware_download_target_end.reset_mock()
+            local_rev[0] = b'\x02\x00'
+            self.api.get_transceiver_info_firmware_versions()
+            assert self.api.set_firmware_download_target_end.call_count == len(TARGET_LIST) + 1
+
+            # or the local revision not being readable
+            self.api.set_firmware_download_target_end.reset_mock()
+            local_rev[0] = None
+            self.api.get_transceiver_info_firmware_versions()
+            self.api.get_transceiver_info_firmware_versions()
+            assert self.api.set_firmware_download_target_end.call_count == 2 * (len(TARGET_LIST) + 1)
+
+            # and the versions kept expire, remote targets being upgradable on their own
+            local_rev[0] = b'\x02\x00'
+            self.api.get_transceiver_info_firmware_versions()
+            self.api.set_firmware_download_target_end.reset_mock()
+            with patch('time.monotonic', return_value=time.monotonic() + FIRMWARE_VERSIONS_CACHE_TTL):
+                self.api.get_transceiver_info_firmware_versions()
+            assert self.api.set_firmware_download_target_end.call_count == len(TARGET_LIST) + 1
+
     @pytest.mark.parametrize("module_type, expected_result", [
         ('Unknown', False),
         ('QSFP+ or later with CMIS', True)
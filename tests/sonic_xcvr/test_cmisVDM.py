@@ -34,15 +34,9 @@ class TestVDM(object):
                     0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,
                     0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,
                 ),
-                
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
-                bytearray(b'\x00\x00'), bytearray(b'\x00\x00\x00\x00\x00\x00\x00\x00'),
+
+                bytearray(128),     # VDM sample page
+                bytearray(128),     # VDM threshold page
             ],
             {
                 'Pre-FEC BER Minimum Media Input': {1: [0, 0, 0, 0, 0, False, False, False, False]},
@@ -79,14 +73,7 @@ class TestVDM(object):
                     0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,
                 ),
 
-                None,
-                None,
-                None,
-                None,
-                None,
-                None,
-                None,
-                None,
+                None,               # VDM sample page
             ],
             {}
         )
@@ -160,3 +147,61 @@ class TestVDM(object):
         self.api.get_vdm_page.side_effect = mock_response[3:]
         result = self.api.get_vdm_allpage()
         assert result == expected
+
+    def test_get_vdm_page_decode(self):
+        descriptor = [0] * 128
+        descriptor[0:6] = [0x00, 4, 0x11, 5, 0x21, 9]   # S16, U16 and F16 observables
+        descriptor[6:8] = [0x00, 200]                   # unknown observable type
+        samples = bytearray(128)
+        samples[0:6] = b'\xfe\x00\x0a\x00\x92\x00'
+        thresholds = bytearray(128)
+        thresholds[0:8] = b'\x20\x00\xf0\x00\x10\x00\xf8\x00'
+        thresholds[8:16] = b'\x20\x00\x01\x00\x10\x00\x02\x00'
+        thresholds[16:24] = b'\x92\x00\x92\x01\x92\x02\x92\x03'
+        flags = [0] * 128
+        flags[0] = 0x21
+        flags[1] = 0x8
+
+        api = CmisVdmApi(XcvrEeprom(MagicMock(), MagicMock(), self.mem_map))
+        api.xcvr_eeprom.read_raw = MagicMock()
+        api.xcvr_eeprom.read_raw.side_effect = [tuple(descriptor), samples, thresholds]
+        result = api.get_vdm_page(0x20, flags)
+        assert result == {
+            'Laser Temperature [C]': {1: [-2.0, 32.0, -16.0, 16.0, -8.0, True, False, False, False]},
+            'eSNR Media Input [dB]': {2: [10.0, 32.0, 1.0, 16.0, 2.0, False, True, False, False]},
+            'Pre-FEC BER Minimum Media Input': {2: [
+                pytest.approx(0.000512), pytest.approx(0.000512), pytest.approx(0.000513),
+                pytest.approx(0.000514), pytest.approx(0.000515), False, False, False, True]},
+        }
+        # One transfer each for the descriptor, sample and threshold pages
+        assert api.xcvr_eeprom.read_raw.call_count == 3
+
+        # The parsed descriptor layout is reused
+        layout = api.get_vdm_layout(0x20, descriptor)
+        assert api.get_vdm_layout(0x20, descriptor) is layout
+        assert len(layout) == 3
+
+    def test_get_vdm_page_layout_firmware(self):
+        descriptor = [0] * 128
+        descriptor[0:2] = [0x00, 4]
+        api = CmisVdmApi(XcvrEeprom(MagicMock(), MagicMock(), self.mem_map))
+        api.xcvr_eeprom.read_raw = MagicMock()
+        api.xcvr_eeprom.read_raw.side_effect = [tuple(descriptor), bytearray(128), bytearray(128),
+                                                bytearray(128), bytearray(128)]
+        api.set_vdm_layout_firmware('1.0')
+        assert api.get_vdm_page(0x20, None) == api.get_vdm_page(0x20, None)
+        # The descriptor is read only once while the firmware version is bound
+        assert api.xcvr_eeprom.read_raw.call_count == 5
+
+        api.set_vdm_layout_firmware('1.0')
+        assert 0x20 in api._vdm_layout_cache
+        api.set_vdm_layout_firmware('2.0')
+        assert api._vdm_layout_cache == {}
+        api.get_vdm_layout(0x20, descriptor)
+        api.set_vdm_layout_firmware(None)
+        assert api._vdm_layout_cache == {}
+
+        api.get_vdm_layout(0x20, descriptor)
+        api.invalidate_vdm_layout()
+        assert api._vdm_layout_cache == {}
+        assert api.vdm_layout_firmware is None
@@ -0,0 +1,187 @@
+from unittest import mock
+
+from sonic_platform_base.sonic_xcvr.cmis_bringup import (
+    BRINGUP_STATE_CONFIG_WAIT,
+    BRINGUP_STATE_DP_INIT_WAIT,
+    BRINGUP_STATE_FAILED,
+    BRINGUP_STATE_MODULE_READY_WAIT,
+    BRINGUP_STATE_READY,
+    CmisBringupManager,
+    CmisBringupTask,
+)
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class FakeCmisModule(object):
+    """
+    CMIS module completing each state change after its advertised duration
+    """
+    NUM_CHANNELS = 8
+
+    def __init__(self, clock, pwr_up_ms=1000, dp_init_ms=2000, config='ConfigSuccess', lpmode=True):
+        self.clock = clock
+        self.pwr_up_ms = pwr_up_ms
+        self.dp_init_ms = dp_init_ms
+        self.config = config
+        self.ready_at = None if lpmode else 0.0
+        self.dp_state = 'DataPathActivated'
+        self.dp_change_at = 0.0
+        self.dp_next = self.dp_state
+        self.config_status = 'ConfigUndefined'
+        self.calls = []
+
+    def _dp_state(self):
+        if self.clock() >= self.dp_change_at:
+            self.dp_state = self.dp_next
+        return self.dp_state
+
+    def get_module_state(self):
+        if self.ready_at is not None and self.clock() >= self.ready_at:
+            return 'ModuleReady'
+        return 'ModuleLowPwr' if self.ready_at is None else 'ModulePwrUp'
+
+    def set_lpmode(self, lpmode, wait_state_change=True):
+        self.calls.append('set_lpmode')
+        self.ready_at = self.clock() + self.pwr_up_ms / 1000.0
+        return True
+
+    def get_module_pwr_up_duration(self):
+        return self.pwr_up_ms
+
+    def get_datapath_deinit_duration(self):
+        return 100
+
+    def get_datapath_init_duration(self):
+        return self.dp_init_ms
+
+    def get_datapath_tx_turnon_duration(self):
+        return 100
+
+    def _change_dp(self, state, delay_ms):
+        self.dp_next = state
+        self.dp_change_at = self.clock() + delay_ms / 1000.0
+
+    def tx_disable_channel(self, channel, disable):
+        self.calls.append('tx_disable' if disable else 'tx_enable')
+        if not disable:
+            self._change_dp('DataPathActivated', 50)
+        return True
+
+    def set_datapath_deinit(self, channel):
+        self.calls.append('set_datapath_deinit')
+        self._change_dp('DataPathDeactivated', 50)
+
+    def set_application(self, channel, appl_code, ec=0):
+        self.calls.append('set_application')
+
+    def stage_custom_si_settings(self, host_lanes_mask, optics_si_dict):
+        self.calls.append('stage_custom_si_settings')
+        return True
+
+    def scs_apply_datapath_init(self, channel):
+        self.calls.append('scs_apply_datapath_init')
+        self.config_status = self.config
+        return True
+
+    def set_datapath_init(self, channel):
+        self.calls.append('set_datapath_init')
+        self._change_dp('DataPathInitialized', self.dp_init_ms * 0.8)
+
+    def get_datapath_state(self):
+        state = self._dp_state()
+        return {'DP{}State'.format(lane): state for lane in range(1, 9)}
+
+    def get_config_datapath_hostlane_status(self):
+        return {'ConfigStatusLane{}'.format(lane): self.config_status for lane in range(1, 9)}
+
+def run_ticks(manager, clock, interval=0.1, limit=1000):
+    for _ in range(limit):
+        if manager.tick():
+            return
+        clock.sleep(interval)
+
+class TestCmisBringup(object):
+
+    def test_task(self):
+        clock = Clock()
+        module = FakeCmisModule(clock)
+        task = CmisBringupTask(module, 0x0f, 1, si_settings={'CDREnableTx': {}})
+        manager = CmisBringupManager(clock)
+        manager.add(0, task)
+        assert not manager.tick()
+        assert task.state == BRINGUP_STATE_MODULE_READY_WAIT
+        run_ticks(manager, clock)
+        assert task.state == BRINGUP_STATE_READY
+        assert module.calls == ['set_lpmode', 'tx_disable', 'set_datapath_deinit', 'set_application',
+                                'stage_custom_si_settings', 'scs_apply_datapath_init',
+                                'set_datapath_init', 'tx_enable']
+
+    def test_tx_off(self):
+        clock = Clock()
+        module = FakeCmisModule(clock, lpmode=False)
+        task = CmisBringupTask(module, 0xff, 1, tx_on=False)
+        manager = CmisBringupManager(clock)
+        manager.add(0, task)
+        run_ticks(manager, clock)
+        assert task.state == BRINGUP_STATE_READY
+        assert 'set_lpmode' not in module.calls
+        assert 'tx_enable' not in module.calls
+
+    def test_concurrent_ports(self):
+        clock = Clock()
+        manager = CmisBringupManager(clock)
+        for port in range(32):
+            module = FakeCmisModule(clock, pwr_up_ms=500 + 50 * port, dp_init_ms=1000 + 100 * port)
+            manager.add(port, CmisBringupTask(module, 0xff, 1))
+        run_ticks(manager, clock)
+        assert set(manager.get_states().values()) == {BRINGUP_STATE_READY}
+        # About the time of the slowest module, far from the sum over the ports
+        slowest = (500 + 50 * 31 + (1000 + 100 * 31) * 0.8) / 1000.0
+        assert slowest <= clock.now < slowest + 1.0
+
+    def test_config_rejected(self):
+        clock = Clock()
+        task = CmisBringupTask(FakeCmisModule(clock, config='ConfigRejectedInvalidAppSel'), 0xff, 1)
+        manager = CmisBringupManager(clock)
+        manager.add(0, task)
+        run_ticks(manager, clock)
+        assert task.state == BRINGUP_STATE_FAILED
+        assert task.error == 'ConfigRejectedInvalidAppSel'
+
+    def test_deadline(self):
+        clock = Clock()
+        module = FakeCmisModule(clock)
+        # The datapath takes longer to initialize than advertised
+        module.set_datapath_init = lambda channel: module._change_dp('DataPathInitialized', 5000)
+        task = CmisBringupTask(module, 0xff, 1)
+        manager = CmisBringupManager(clock)
+        manager.add(0, task)
+        while task.state != BRINGUP_STATE_DP_INIT_WAIT:
+            clock.sleep(0.1)
+            manager.tick()
+        # The advertised datapath init duration is the deadline
+        assert task.deadline == clock.now + 2.0
+        deadline = task.deadline
+        run_ticks(manager, clock)
+        assert task.state == BRINGUP_STATE_FAILED
+        assert task.error == 'datapath not initialized'
+        assert deadline <= clock.now < deadline + 0.1
+
+    def test_run(self):
+        clock = Clock()
+        manager = CmisBringupManager(clock)
+        manager.add(0, CmisBringupTask(FakeCmisModule(clock), 0xff, 1))
+        manager.add(1, CmisBringupTask(FakeCmisModule(clock, config='ConfigInProgress'), 0xff, 1))
+        with mock.patch('time.sleep', clock.sleep):
+            states = manager.run(timeout=3.0)
+        assert states == {0: BRINGUP_STATE_READY, 1: BRINGUP_STATE_CONFIG_WAIT}
+        assert manager.remove(1) is not None
+        assert manager.is_done()
@@ -0,0 +1,149 @@
+import struct
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from sonic_platform_base.sonic_xcvr.dom_snapshot import DomSnapshotPublisher, DomSnapshotReader
+from sonic_platform_base.sonic_xcvr.sfp_optoe_base import SfpOptoeBase
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+
+from .virtual_xcvr import MODULE_IMAGES, make_virtual_xcvr
+
+class TestDomSnapshot(object):
+
+    def test_publish_read(self, tmp_path):
+        path = str(tmp_path / 'dom')
+        publisher = DomSnapshotPublisher(path, 4, slot_size=1024)
+        reader = DomSnapshotReader(path)
+        assert reader.read(0) is None
+
+        publisher.publish(1, {'get_transceiver_dom_real_value': {'temperature': 40.0, 'rx1power': '-inf'}})
+        snapshot = reader.read(1)
+        assert snapshot.version == 1
+        assert snapshot.data == {'get_transceiver_dom_real_value': {'temperature': 40.0, 'rx1power': '-inf'}}
+        assert 0 <= snapshot.get_age() < 60
+        assert reader.read(0) is None
+        assert reader.read(4) is None
+
+        publisher.publish(1, {}, timestamp=snapshot.timestamp - 100)
+        assert reader.read(1).version == 2
+        assert reader.read(1, max_age=10) is None
+        publisher.close()
+        reader.close()
+
+    def test_slot_too_small(self, tmp_path):
+        publisher = DomSnapshotPublisher(str(tmp_path / 'dom'), 1, slot_size=32)
+        with pytest.raises(ValueError):
+            publisher.publish(0, {'data': 'x' * 32})
+        publisher.close()
+
+    def test_publisher_restart(self, tmp_path):
+        path = str(tmp_path / 'dom')
+        publisher = DomSnapshotPublisher(path, 2, slot_size=256)
+        publisher.publish(0, {'a': 1})
+        reader = DomSnapshotReader(path)
+        assert reader.read(0).data == {'a': 1}
+        publisher.close()
+
+        # same layout: the file and the sequence are reused
+        publisher = DomSnapshotPublisher(path, 2, slot_size=256)
+        publisher.publish(0, {'a': 2})
+        assert reader.read(0).version == 2
+        publisher.close()
+
+        # new layout: readers switch to the new file
+        publisher = DomSnapshotPublisher(path, 8, slot_size=512)
+        publisher.publish(6, {'a': 3})
+        assert reader.read(6).data == {'a': 3}
+        assert reader.num_ports == 8
+        publisher.close()
+
+    def test_interrupted_update(self, tmp_path):
+        path = str(tmp_path / 'dom')
+        publisher = DomSnapshotPublisher(path, 1, slot_size=256)
+        publisher.publish(0, {'a': 1})
+        # sequence left odd by a publisher killed while updating the slot
+        struct.pack_into('=I', publisher._mmap, publisher._slot_offset(0), 3)
+        assert DomSnapshotReader(path).read(0) is None
+        publisher.close()
+
+    def test_concurrent_readers(self, tmp_path):
+        path = str(tmp_path / 'dom')
+        publisher = DomSnapshotPublisher(path, 1, slot_size=4096)
+        publisher.publish(0, {'value': [0] * 100})
+        done = threading.Event()
+
+        def publish():
+            for i in range(1, 2000):
+                publisher.publish(0, {'value': [i] * (100 + i % 50)})
+            done.set()
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        reader = DomSnapshotReader(path)
+        reads = 0
+        while not done.is_set() or reads == 0:
+            snapshot = reader.read(0)
+            if snapshot is not None:
+                values = snapshot.data['value']
+                assert values == [values[0]] * (100 + values[0] % 50)
+                reads += 1
+        thread.join()
+        assert reader.read(0).data['value'][0] == 1999
+        publisher.close()
+
+class TestSfpOptoeBaseSnapshot(object):
+
+    def test_snapshot_and_fallback(self, tmp_path):
+        path = str(tmp_path / 'dom')
+        vx = make_virtual_xcvr('sff8472')
+        api = XcvrApiFactory(vx.reader, vx.writer).create_xcvr_api()
+        publisher = DomSnapshotPublisher(path, 4, slot_size=4096)
+        published = publisher.publish_api(2, api)
+
+        sfp = SfpOptoeBase()
+        sfp.get_position_in_parent = MagicMock(return_value=3)
+        sfp.get_xcvr_api = MagicMock(return_value=api)
+        # not used unless enabled, e.g. by the publishing process
+        assert sfp.get_dom_snapshot() is None
+        sfp.enable_dom_snapshot(path)
+        vx.reset_stats()
+        assert sfp.get_transceiver_dom_real_value() == published['get_transceiver_dom_real_value']
+        assert sfp.get_transceiver_status() == published['get_transceiver_status']
+        assert vx.reads == 0
+        sfp.get_xcvr_api.assert_not_called()
+
+        # stale snapshot
+        publisher.publish(2, {'get_transceiver_dom_real_value': {}}, timestamp=0)
+        assert sfp.get_transceiver_dom_real_value() == published['get_transceiver_dom_real_value']
+        sfp.get_xcvr_api.assert_called()
+        assert vx.reads > 0
+
+        # other SFPs are not affected
+        other = SfpOptoeBase()
+        other.get_position_in_parent = MagicMock(return_value=3)
+        assert other.get_dom_snapshot() is None
+
+        # unknown slot
+        sfp.get_position_in_parent = MagicMock(side_effect=NotImplementedError)
+        assert sfp.get_dom_snapshot() is None
+
+        publisher.publish(2, {'get_transceiver_status': {}})
+        sfp.get_position_in_parent = MagicMock(return_value=3)
+        sfp.enable_dom_snapshot(path, max_age=0)
+        assert sfp.get_dom_snapshot() is None
+        sfp.disable_dom_snapshot()
+        assert sfp.get_dom_snapshot() is None
+        publisher.close()
+
+    @pytest.mark.parametrize("module_type", sorted(MODULE_IMAGES))
+    def test_snapshot_values_unchanged(self, tmp_path, module_type):
+        path = str(tmp_path / 'dom')
+        vx = make_virtual_xcvr(module_type)
+        api = XcvrApiFactory(vx.reader, vx.writer).create_xcvr_api()
+        publisher = DomSnapshotPublisher(path, 1)
+        published = publisher.publish_api(0, api)
+        # the JSON round trip leaves the values of the published APIs as they are
+        assert DomSnapshotReader(path).read(0).data == published
+        publisher.close()
@@ -0,0 +1,200 @@
+from unittest import mock
+
+import pytest
+
+from sonic_platform_base.sonic_xcvr.api.public.cmis import CmisApi, CMIS_LANE_FLAG_REGION, CMIS_MODULE_FLAG_REGION
+from sonic_platform_base.sonic_xcvr.api.public.sff8636 import Sff8636Api, SFF8636_FLAG_REGION, SFF8636_FLAG_SUMMARY
+from sonic_platform_base.sonic_xcvr.codes.public.sff8636 import Sff8636Codes
+from sonic_platform_base.sonic_xcvr.latched_flags import LatchedFlagCollector
+from sonic_platform_base.sonic_xcvr.mem_maps.public.sff8636 import Sff8636MemMap
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+from sonic_platform_base.sonic_xcvr.xcvr_eeprom import XcvrEeprom
+
+from .virtual_xcvr import addr, make_virtual_xcvr
+
+class LatchedModule(object):
+    """
+    Module memory whose bytes 8 to 11 are cleared when read
+    """
+    def __init__(self):
+        self.memory = bytearray(16)
+        self.reads = []
+
+    def reader(self, offset, size):
+        self.reads.append((offset, size))
+        data = bytearray(self.memory[offset:offset + size])
+        for i in range(max(offset, 8), min(offset + size, 12)):
+            self.memory[i] = 0
+        return data
+
+class TestLatchedFlagCollector(object):
+
+    def test_flags_seen_by_each_reader(self):
+        module = LatchedModule()
+        collector = LatchedFlagCollector(module.reader, [(8, 4)])
+        module.memory[8:12] = b'\x01\x02\x00\x80'
+        assert collector.reader(8, 1) == bytearray(b'\x01')
+        assert collector.reader(9, 3) == bytearray(b'\x02\x00\x80')
+        # the region was read once, and the flags of byte 9 survived the read of byte 8
+        assert module.reads == [(8, 4)]
+
+        # a reader consuming its flags again reads the module
+        module.memory[9] = 0x04
+        assert collector.reader(8, 1) == bytearray(b'\x00')
+        assert module.reads == [(8, 4), (8, 4)]
+        # the flags of both reads are accumulated for the other reader
+        module.memory[9] = 0x10
+        assert collector.reader(9, 3) == bytearray(b'\x04\x00\x00')
+        assert collector.reader(9, 3) == bytearray(b'\x10\x00\x00')
+        assert collector.get_counters() == {(8, 0): 1, (9, 1): 1, (9, 2): 1, (9, 4): 1, (11, 7): 1}
+        collector.reset_counters()
+        assert collector.get_counters() == {}
+
+    def test_stale_flags_completed(self):
+        module = LatchedModule()
+        collector = LatchedFlagCollector(module.reader, [(8, 4)], max_age=1.0)
+        module.memory[8] = 0x01
+        with mock.patch('time.monotonic', return_value=100.0):
+            assert collector.reader(8, 1) == bytearray(b'\x01')
+            collector.reader(9, 1)
+        module.memory[8] = 0x02
+        with mock.patch('time.monotonic', return_value=100.5):
+            collector.reader(9, 1)
+        # the flags pending since 100.5 are completed by a new read
+        module.memory[8] = 0x04
+        with mock.patch('time.monotonic', return_value=102.0):
+            assert collector.reader(8, 1) == bytearray(b'\x06')
+        assert len(module.reads) == 3
+
+    def test_other_reads(self):
+        module = LatchedModule()
+        collector = LatchedFlagCollector(module.reader, [(8, 4)])
+        module.memory[0:12] = bytes(range(12))
+        # a read overlapping the region is not served from the flags
+        assert collector.reader(0, 9) == bytearray(range(9))
+        # a read covering the region keeps its flags for the register reads
+        module.memory[10] = 0x20
+        assert collector.reader(0, 16)[10] == 0x20
+        assert collector.reader(10, 1) == bytearray(b'\x20')
+        assert collector.collect()
+        assert module.reads == [(0, 9), (0, 16), (8, 4)]
+
+    def test_summary(self):
+        module = LatchedModule()
+        collector = LatchedFlagCollector(module.reader, [(8, 4)], summary=(3, 0x01))
+        module.memory[3] = 0x01
+        module.memory[9] = 0x04
+        # no flag latched according to the summary, the region is not read
+        assert collector.reader(9, 1) == bytearray(b'\x00')
+        assert collector.reader(8, 1) == bytearray(b'\x00')
+        assert module.reads == [(3, 1)]
+        module.memory[3] = 0x00
+        assert collector.collect()
+        assert module.reads == [(3, 1), (3, 1), (8, 4)]
+        assert collector.reader(9, 1) == bytearray(b'\x04')
+
+class TestXcvrApiLatchedFlags(object):
+
+    def make_api(self, module_type='cmis'):
+        vx = make_virtual_xcvr(module_type)
+        reads = []
+        def reader(offset, size):
+            reads.append((offset, size))
+            return vx.reader(offset, size)
+        with mock.patch('time.sleep', vx.sleep):
+            api = XcvrApiFactory(reader, vx.writer).create_xcvr_api()
+        return vx, api, reads
+
+    def test_flag_apis_share_reads(self):
+        vx, api, reads = self.make_api()
+        vx.eeprom[3] &= ~0x01                     # interrupt asserted
+        vx.eeprom[9] = 0x01                       # case temperature high alarm
+        vx.eeprom[addr(0x11, 135)] = 0x01         # Tx fault lane 1
+        vx.eeprom[addr(0x11, 147)] = 0x80         # Rx LOS lane 8
+        del reads[:]
+        dom_flags = api.get_transceiver_dom_flags()
+        status_flags = api.get_transceiver_status_flags()
+        assert dom_flags['tempHAlarm'] is True
+        assert status_flags['tx1fault'] is True
+        assert status_flags['rx8los'] is True
+        assert status_flags['rx1los'] is False
+        assert reads.count(CMIS_MODULE_FLAG_REGION) == 1
+        assert reads.count(CMIS_LANE_FLAG_REGION) == 1
+        module_flag_end = sum(CMIS_MODULE_FLAG_REGION)
+        lane_flag_begin, lane_flag_size = CMIS_LANE_FLAG_REGION
+        for offset, size in reads:
+            if (offset, size) in (CMIS_MODULE_FLAG_REGION, CMIS_LANE_FLAG_REGION):
+                continue
+            # no other read of the latched flags
+            assert offset + size <= CMIS_MODULE_FLAG_REGION[0] or offset >= module_flag_end
+            assert offset + size <= lane_flag_begin or offset >= lane_flag_begin + lane_flag_size
+
+        counters = api.get_latched_flag_counters()
+        assert counters['case_temp_high_alarm_flag'] == 1
+        assert counters['TxFault1'] == 1
+        assert counters['RxLOS8'] == 1
+        assert 'RxLOS1' not in counters
+
+    def test_cmis_summary_fast_path(self):
+        vx, api, reads = self.make_api()
+        api.set_flag_summary_enabled(True)
+        vx.eeprom[addr(0x11, 135)] = 0x01
+        del reads[:]
+        api.get_transceiver_dom_flags()
+        status_flags = api.get_transceiver_status_flags()
+        # the interrupt is deasserted, no flag register is read
+        assert status_flags['tx1fault'] is False
+        assert CMIS_MODULE_FLAG_REGION not in reads
+        assert CMIS_LANE_FLAG_REGION not in reads
+        assert reads.count((3, 1)) == 1
+
+        vx.eeprom[3] &= ~0x01
+        with mock.patch('time.monotonic', return_value=api.flag_collector.regions[0].timestamp + 2):
+            assert api.get_transceiver_status_flags()['tx1fault'] is True
+        assert CMIS_LANE_FLAG_REGION in reads
+
+    def test_sff8636_summary_fast_path(self):
+        vx, api, reads = self.make_api('sff8636')
+        assert isinstance(api, Sff8636Api)
+        api.set_flag_summary_enabled(True)
+        vx.eeprom[addr(0x0, 195)] |= 0x08         # Tx fault implemented
+        vx.eeprom[2] |= 0x02                      # IntL deasserted
+        vx.eeprom[4] = 0x02                       # Tx fault lane 2
+        del reads[:]
+        status_flags = api.get_transceiver_status_flags()
+        assert status_flags['tx2fault'] is False
+        assert reads.count((2, 1)) == 1
+        assert SFF8636_FLAG_REGION not in reads
+        assert not [read for read in reads if read[0] in (3, 4)]
+
+        vx.eeprom[2] &= ~0x02
+        with mock.patch('time.monotonic', return_value=api.flag_collector.regions[0].timestamp + 2):
+            status_flags = api.get_transceiver_status_flags()
+        assert status_flags['tx2fault'] is True
+        assert status_flags['rx2los'] is False
+        assert reads.count(SFF8636_FLAG_REGION) == 1
+
+    @pytest.mark.parametrize("module_type, api_class, region", [
+        ('cmis', CmisApi, CMIS_LANE_FLAG_REGION),
+        ('sff8636', Sff8636Api, SFF8636_FLAG_REGION),
+    ])
+    def test_summary_disabled(self, module_type, api_class, region):
+        vx, api, reads = self.make_api(module_type)
+        assert isinstance(api, api_class)
+        # Off by default, masked flags not being summarized
+        assert api.flag_collector.summary is None
+        del reads[:]
+        api.get_transceiver_status_flags()
+        assert region in reads
+
+        api.set_flag_summary_enabled(True)
+        assert api.flag_collector.summary is not None
+        # Only this module is changed
+        assert self.make_api(module_type)[1].flag_collector.summary is None
+        api.set_flag_summary_enabled(False)
+        assert api.flag_collector.summary is None
+
+    def test_summary_constructor(self):
+        vx = make_virtual_xcvr('sff8636')
+        api = Sff8636Api(XcvrEeprom(vx.reader, vx.writer, Sff8636MemMap(Sff8636Codes)), flag_summary=True)
+        assert api.flag_collector.summary == SFF8636_FLAG_SUMMARY
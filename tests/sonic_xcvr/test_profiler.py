@@ -0,0 +1,95 @@
+from unittest import mock
+
+from sonic_platform_base.sonic_xcvr.fields import consts
+from sonic_platform_base.sonic_xcvr.utils.profiler import (
+    LATENCY_BUCKETS_US,
+    RAW_READ,
+    UNATTRIBUTED,
+    XcvrProfiler,
+)
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+
+from .virtual_xcvr import make_virtual_xcvr
+
+def make_api(module_type):
+    vx = make_virtual_xcvr(module_type)
+    with mock.patch('time.sleep', vx.sleep):
+        return vx, XcvrApiFactory(vx.reader, vx.writer).create_xcvr_api()
+
+class TestXcvrProfiler(object):
+
+    def test_attribution(self):
+        vx, api = make_api('cmis')
+        profiler = XcvrProfiler()
+        profiler.instrument(api)
+        vx.reset_stats()
+        api.get_transceiver_dom_real_value()
+        api.get_module_temperature()
+        api.xcvr_eeprom.read_raw(0, 1)
+
+        result = profiler.to_dict()
+        assert set(result) == {'get_transceiver_dom_real_value', 'get_module_temperature', UNATTRIBUTED}
+        dom = result['get_transceiver_dom_real_value']
+        assert dom[consts.TEMPERATURE_FIELD]['read']['count'] == 1
+        assert dom[consts.TEMPERATURE_FIELD]['read']['bytes'] == 2
+        assert result['get_module_temperature'][consts.TEMPERATURE_FIELD]['read']['count'] == 1
+        assert result[UNATTRIBUTED][RAW_READ]['read']['count'] == 1
+
+        total = sum(op['count'] for fields in result.values() for ops in fields.values()
+                    for op in ops.values())
+        assert total == vx.reads
+        stats = dom[consts.TEMPERATURE_FIELD]['read']
+        assert len(stats['histogram']) == len(LATENCY_BUCKETS_US) + 1
+        assert sum(stats['histogram']) == stats['count']
+
+    def test_duplicates(self):
+        _, api = make_api('cmis')
+        profiler = XcvrProfiler()
+        profiler.instrument(api)
+        api.get_transceiver_dom_real_value()
+        result = profiler.to_dict()['get_transceiver_dom_real_value']
+        # the lane monitor support bits share one byte, read once per monitor
+        assert result[consts.TX_BIAS_SUPPORT_FIELD]['read']['duplicates'] == 0
+        assert result[consts.RX_POWER_SUPPORT_FIELD]['read']['duplicates'] == 1
+        assert result[consts.TX_POWER_SUPPORT_FIELD]['read']['duplicates'] == 1
+        assert result[consts.TEMPERATURE_FIELD]['read']['duplicates'] == 0
+
+        profiler.reset()
+        api.get_module_temperature()
+        api.get_module_temperature()
+        # separate calls do not count as duplicates
+        assert profiler.to_dict()['get_module_temperature'][consts.TEMPERATURE_FIELD]['read']['duplicates'] == 0
+
+    def test_writes(self):
+        vx, api = make_api('cmis')
+        profiler = XcvrProfiler()
+        profiler.instrument(api)
+        vx.reset_stats()
+        api.set_lpmode(True)
+        writes = [ops['write'] for ops in profiler.to_dict()['set_lpmode'].values() if 'write' in ops]
+        assert sum(write['count'] for write in writes) == vx.writes
+
+    def test_folded(self):
+        _, api = make_api('cmis')
+        profiler = XcvrProfiler()
+        profiler.instrument(api)
+        api.get_transceiver_dom_real_value()
+        lines = profiler.to_folded().splitlines()
+        assert 'get_transceiver_dom_real_value;get_module_temperature;%s;read' % consts.TEMPERATURE_FIELD in \
+            [line.rsplit(' ', 1)[0] for line in lines]
+        for line in lines:
+            assert int(line.rsplit(' ', 1)[1]) >= 0
+
+    def test_remove(self):
+        vx, api = make_api('sff8472')
+        eeprom = api.xcvr_eeprom
+        profiler = XcvrProfiler()
+        profiler.instrument(api)
+        assert eeprom.reader != vx.reader
+        profiler.remove(api)
+        assert eeprom.reader == vx.reader
+        assert eeprom.writer == vx.writer
+        assert 'read' not in eeprom.__dict__
+        assert 'get_transceiver_info' not in api.__dict__
+        api.get_transceiver_info()
+        assert profiler.to_dict() == {}
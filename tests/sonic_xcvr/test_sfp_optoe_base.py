@@ -145,6 +145,23 @@ class TestSfpOptoeBase(object):
 
         mock_open.assert_called()
 
+    @patch("builtins.open", new_callable=mock_open)
+    @patch.object(SfpOptoeBase, 'get_eeprom_path')
+    def test_set_optoe_write_max(self, mock_get_eeprom_path, mock_open):
+        mock_get_eeprom_path.return_value = "/sys/bus/i2c/devices/1-0050/eeprom"
+        sfp = SfpOptoeBase()
+        api = MagicMock()
+        sfp._xcvr_api_factory.create_xcvr_api = MagicMock(return_value=api)
+
+        sfp.set_optoe_write_max(32)
+        mock_open.assert_called_once_with("/sys/bus/i2c/devices/1-0050/write_max", mode='w')
+        sfp.refresh_xcvr_api()
+        api.set_staged_control_write_max.assert_called_once_with(32)
+
+        mock_open.side_effect = OSError
+        sfp.set_optoe_write_max(64)
+        assert api.set_staged_control_write_max.call_count == 1
+
     def test_set_power(self):
         mode = 1
         try:
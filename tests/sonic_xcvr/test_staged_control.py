@@ -0,0 +1,146 @@
+from unittest import mock
+
+import pytest
+
+from sonic_platform_base.sonic_xcvr.api.public.cmis import CMIS_STAGED_CTRL0_REGION
+from sonic_platform_base.sonic_xcvr.fields import consts
+from sonic_platform_base.sonic_xcvr.staged_control import StagedControlShadow
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+
+from .virtual_xcvr import addr, make_virtual_xcvr
+
+def make_shadow(write_max=1):
+    vx = make_virtual_xcvr('cmis')
+    vx.eeprom[100:110] = bytes(range(1, 11))
+    writes = []
+    def writer(offset, size, write_buffer):
+        writes.append((offset, bytes(write_buffer)))
+        return vx.writer(offset, size, write_buffer)
+    return vx, writes, StagedControlShadow(vx.reader, writer, 100, 8, write_max)
+
+def si_settings(prefix, value):
+    return {"%s%d" % (prefix, lane): value for lane in range(1, 9)}
+
+class TestStagedControlShadow(object):
+
+    def test_pass_through(self):
+        vx, writes, shadow = make_shadow()
+        assert shadow.reader(100, 2) == bytearray([1, 2])
+        assert shadow.writer(101, 1, bytearray([0x20]))
+        assert writes == [(101, b'\x20')]
+
+    def test_commit(self):
+        vx, writes, shadow = make_shadow(write_max=4)
+        with shadow.transaction():
+            assert shadow.writer(101, 1, bytearray([0x20]))
+            assert shadow.writer(103, 1, bytearray([0x40]))
+            assert shadow.writer(105, 1, bytearray([6]))
+            assert shadow.writer(107, 1, bytearray([0x80]))
+            assert writes == []
+            # Read once, served with the pending writes merged
+            assert shadow.reader(101, 3) == bytearray([0x20, 3, 0x40])
+            assert shadow.reader(106, 2) == bytearray([7, 0x80])
+        # Byte 105 is unchanged, unchanged bytes are rewritten to save a write
+        assert writes == [(101, bytes([0x20, 3, 0x40])), (107, b'\x80')]
+        assert vx.eeprom[100:108] == bytes([1, 0x20, 3, 0x40, 5, 6, 7, 0x80])
+        assert vx.get_stats()['reads'] == 1
+
+    def test_commit_unread(self):
+        vx, writes, shadow = make_shadow(write_max=8)
+        with shadow.transaction():
+            for offset in (100, 101, 103):
+                shadow.writer(offset, 1, bytearray([0]))
+        # Byte 102 was never read, it is not rewritten
+        assert writes == [(100, b'\x00\x00'), (103, b'\x00')]
+
+    def test_write_outside(self):
+        vx, writes, shadow = make_shadow(write_max=8)
+        shadow.begin()
+        shadow.writer(100, 2, bytearray([0, 0]))
+        assert shadow.writer(99, 1, bytearray([1]))
+        assert writes == [(100, b'\x00\x00'), (99, b'\x01')]
+        assert shadow.commit()
+        assert len(writes) == 2
+
+    def test_nested_and_discard(self):
+        vx, writes, shadow = make_shadow()
+        shadow.begin()
+        shadow.begin()
+        shadow.writer(100, 1, bytearray([0]))
+        assert shadow.commit()
+        assert writes == []
+        shadow.discard()
+        assert writes == []
+        assert vx.eeprom[100] == 1
+
+        with pytest.raises(ValueError):
+            with shadow.transaction():
+                shadow.writer(100, 1, bytearray([0]))
+                raise ValueError()
+        assert writes == []
+
+    def test_write_failure(self):
+        shadow = StagedControlShadow(mock.MagicMock(return_value=bytearray(8)),
+                                     mock.MagicMock(return_value=False), 100, 8)
+        shadow.begin()
+        shadow.writer(100, 1, bytearray([1]))
+        assert not shadow.commit()
+
+class TestCmisStagedControl(object):
+
+    def make_api(self):
+        vx = make_virtual_xcvr('cmis')
+        # TX and RX CDR control advertised
+        vx.eeprom[addr(0x1, 161)] = 0x01
+        vx.eeprom[addr(0x1, 162)] = 0x01
+        with mock.patch('time.sleep', vx.sleep):
+            api = XcvrApiFactory(vx.reader, vx.writer).create_xcvr_api()
+        vx.reset_stats()
+        return vx, api
+
+    def stage(self, api):
+        with api.staged_control.transaction():
+            api.set_application(0xff, 1)
+            assert api.stage_custom_si_settings(0xff, {
+                consts.CDR_ENABLE_TX: si_settings(consts.CDR_ENABLE_TX, 1),
+                consts.CDR_ENABLE_RX: si_settings(consts.CDR_ENABLE_RX, 1),
+            })
+
+    def test_set_application(self):
+        vx, api = self.make_api()
+        api.set_application(0x0f, 2)
+        stats = vx.get_stats()
+        assert stats['writes'] == 4
+        # Whole registers are written without reading the staged registers
+        assert stats['reads'] == 0
+        assert CMIS_STAGED_CTRL0_REGION == (addr(0x10, 145), 29)
+        for lane in range(1, 5):
+            assert api.xcvr_eeprom.read("%s_%d_%d" % (consts.STAGED_CTRL_APSEL_FIELD, 0, lane)) == 0x20
+
+    def test_stage_settings(self):
+        vx, api = self.make_api()
+        self.stage(api)
+        # One write per byte changed, the lane bit fields being merged in memory
+        assert vx.get_stats()['writes'] == 10
+        assert vx.eeprom[addr(0x10, 145):addr(0x10, 153)] == bytes([0x10] * 8)
+        assert vx.eeprom[addr(0x10, 160)] == 0xff
+        assert vx.eeprom[addr(0x10, 161)] == 0xff
+
+        vx, api = self.make_api()
+        api.set_staged_control_write_max(32)
+        self.stage(api)
+        assert vx.get_stats()['writes'] == 1
+        assert vx.eeprom[addr(0x10, 160)] == 0xff
+
+        # Unchanged settings are not written again
+        vx.reset_stats()
+        self.stage(api)
+        assert vx.get_stats()['writes'] == 0
+
+    def test_apply_flushes(self):
+        vx, api = self.make_api()
+        with api.staged_control.transaction():
+            api.set_application(0x01, 3)
+            api.scs_apply_datapath_init(0x01)
+            assert vx.eeprom[addr(0x10, 145)] == 0x30
+        assert vx.eeprom[addr(0x10, 143)] == 0x01
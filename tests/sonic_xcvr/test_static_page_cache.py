@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from unittest import mock
+
+from sonic_platform_base.sonic_xcvr.static_page_cache import (
+    SAVE_DELAY,
+    StaticPageCache,
+    StaticPageStore,
+    upper_page,
+)
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+
+from .virtual_xcvr import addr, make_cmis_image, make_virtual_xcvr, VirtualXcvr
+
+def make_api(vx, cache_dir):
+    with mock.patch('time.sleep', vx.sleep):
+        return XcvrApiFactory(vx.reader, vx.writer, static_cache_dir=cache_dir).create_xcvr_api()
+
+def get_cache(api):
+    # The cache is under the staged control shadow of the API
+    reader = api.xcvr_eeprom.reader
+    while not isinstance(reader.__self__, StaticPageCache):
+        reader = reader.__self__._reader
+    return reader.__self__
+
+class TestStaticPageStore(object):
+
+    def test_save_load(self, tmp_path):
+        store = StaticPageStore(str(tmp_path / 'cache'))
+        assert store.load(b'id') == {}
+        regions = {128: bytes(range(128)), 0x20 * 128 + 128: b'\x01' * 128}
+        assert store.save(b'id', regions)
+        assert store.load(b'id') == regions
+        assert store.load(b'other') == {}
+
+    def test_corrupted(self, tmp_path):
+        store = StaticPageStore(str(tmp_path))
+        store.save(b'id', {128: b'\x00' * 128})
+        path = store._path(b'id')
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 1)
+        assert store.load(b'id') == {}
+        with open(path, 'wb') as f:
+            f.write(b'garbage')
+        assert store.load(b'id') == {}
+
+class TestStaticPageCache(object):
+
+    def test_warm_restart(self, tmp_path):
+        cache_dir = str(tmp_path)
+        vx = make_virtual_xcvr('cmis')
+        api = make_api(vx, cache_dir)
+        info = api.get_transceiver_info()
+        thresholds = api.get_transceiver_threshold_info()
+        vdm = api.get_transceiver_vdm_real_value()
+        get_cache(api).flush()
+        assert os.listdir(cache_dir)
+
+        # Same module after a daemon restart
+        vx = make_virtual_xcvr('cmis')
+        api = make_api(vx, cache_dir)
+        vx.reset_stats()
+        assert api.get_transceiver_info() == info
+        assert api.get_transceiver_threshold_info() == thresholds
+        assert api.get_transceiver_vdm_real_value() == vdm
+        cached_reads = vx.bytes_read
+
+        vx = make_virtual_xcvr('cmis')
+        api = make_api(vx, None)
+        vx.reset_stats()
+        api.get_transceiver_info()
+        api.get_transceiver_threshold_info()
+        api.get_transceiver_vdm_real_value()
+        assert cached_reads < vx.bytes_read
+
+    def test_identity_change(self, tmp_path):
+        cache_dir = str(tmp_path)
+        api = make_api(make_virtual_xcvr('cmis'), cache_dir)
+        api.get_transceiver_info()
+        get_cache(api).flush()
+
+        image = make_cmis_image()
+        image[addr(0x0, 166)] = b'VX00000009      '
+        image[addr(0x0, 200)] = b'\xc0'
+        vx = VirtualXcvr(image, fw_versions=((1, 0, 0), (1, 1, 0)))
+        api = make_api(vx, cache_dir)
+        info = api.get_transceiver_info()
+        get_cache(api).flush()
+        assert info['serial'] == 'VX00000009'
+        assert info['ext_identifier'] != 'Power Class 8 (20.0W Max)'
+        assert len(os.listdir(cache_dir)) == 2
+
+    def test_firmware_switch(self, tmp_path):
+        vx = make_virtual_xcvr('cmis')
+        api = make_api(vx, str(tmp_path))
+        info = api.get_transceiver_info()
+        get_cache(api).flush()
+        assert len(os.listdir(str(tmp_path))) == 1
+        with mock.patch('time.sleep', vx.sleep):
+            assert api.module_fw_run()[0]
+        assert api.get_module_active_firmware() == '1.1'
+        # the identity was read again, and the static pages fetched for the new firmware
+        vx.reset_stats()
+        assert api.get_transceiver_info() == info
+        assert vx.bytes_read > 128 * 2
+        get_cache(api).flush()
+        assert len(os.listdir(str(tmp_path))) == 2
+
+    def test_uncached_regions(self, tmp_path):
+        vx = make_virtual_xcvr('cmis')
+        store = StaticPageStore(str(tmp_path))
+        offset, size = upper_page(0x0)
+        cache = StaticPageCache(vx.reader, vx.writer, store, [(offset, size)], [(0, 3)])
+        assert cache.validate()
+        vx.reset_stats()
+        assert cache.reader(offset + 1, 16) == vx.eeprom[offset + 1:offset + 17]
+        assert cache.reader(offset + 20, 16) == vx.eeprom[offset + 20:offset + 36]
+        assert vx.reads == 1
+        # crossing the region end and lower memory go to the module
+        cache.reader(offset + size - 1, 2)
+        cache.reader(14, 2)
+        assert vx.reads == 3
+
+        assert cache.writer(offset + 2, 1, bytearray([0x55]))
+        assert cache.reader(offset + 2, 1) == bytearray([0x55])
+        assert vx.reads == 4
+        assert store.load(cache.identity)[offset][2] == 0x55
+
+    def test_read_failure(self, tmp_path):
+        vx = make_virtual_xcvr('cmis')
+        reader = mock.MagicMock(return_value=None)
+        cache = StaticPageCache(reader, vx.writer, StaticPageStore(str(tmp_path)),
+                                [upper_page(0x0)], [(0, 3)])
+        assert not cache.validate()
+        assert cache.reader(128, 1) is None
+        assert not os.listdir(str(tmp_path))
+
+    def test_batched_saves(self, tmp_path):
+        vx = make_virtual_xcvr('cmis')
+        store = StaticPageStore(str(tmp_path))
+        regions = [upper_page(0x0), upper_page(0x1), upper_page(0x2)]
+        cache = StaticPageCache(vx.reader, vx.writer, store, regions, [(0, 3)])
+        assert cache.validate()
+        with mock.patch.object(store, 'save', wraps=store.save) as mock_save:
+            cache.reader(regions[0][0], 1)
+            cache.reader(regions[1][0], 1)
+            assert mock_save.call_count == 0
+            # saved on an access once the delay elapsed
+            with mock.patch('time.monotonic', return_value=time.monotonic() + SAVE_DELAY):
+                cache.reader(14, 1)
+            assert mock_save.call_count == 1
+            assert len(store.load(cache.identity)) == 2
+            # and as soon as all the static regions are cached
+            cache.reader(regions[2][0], 1)
+            assert mock_save.call_count == 2
+            cache.reader(regions[2][0] + 1, 1)
+            cache.flush()
+            assert mock_save.call_count == 2
+        assert len(store.load(cache.identity)) == 3
+
+    def test_concurrent_access(self, tmp_path):
+        vx = make_virtual_xcvr('cmis')
+        store = StaticPageStore(str(tmp_path))
+        regions = [upper_page(page) for page in range(0x20, 0x30)]
+        cache = StaticPageCache(vx.reader, vx.writer, store, regions, [(0, 3)])
+        assert cache.validate()
+        errors = []
+
+        def run(write):
+            try:
+                for _ in range(50):
+                    for offset, size in regions:
+                        if write:
+                            cache.writer(offset, 1, vx.eeprom[offset:offset + 1])
+                        else:
+                            assert cache.reader(offset, size) == vx.eeprom[offset:offset + size]
+                    cache.flush()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(write,)) for write in (False, False, True)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
@@ -0,0 +1,116 @@
+from unittest import mock
+
+import pytest
+
+from sonic_platform_base.sonic_xcvr.api.public.c_cmis import CCmisApi
+from sonic_platform_base.sonic_xcvr.api.public.cmis import CmisApi
+from sonic_platform_base.sonic_xcvr.api.public.sff8436 import Sff8436Api
+from sonic_platform_base.sonic_xcvr.api.public.sff8472 import Sff8472Api
+from sonic_platform_base.sonic_xcvr.api.public.sff8636 import Sff8636Api
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+
+from .benchmark_xcvr import run_benchmarks
+from .virtual_xcvr import EEPROM_SIZE, VirtualBus, VirtualXcvr, addr, make_virtual_xcvr
+
+def make_api(module_type, **kwargs):
+    vx = make_virtual_xcvr(module_type, **kwargs)
+    with mock.patch('time.sleep', vx.sleep):
+        return vx, XcvrApiFactory(vx.reader, vx.writer).create_xcvr_api()
+
+class TestVirtualXcvr(object):
+
+    def test_bus_cost(self):
+        bus = VirtualBus(txn_latency=1.0, byte_time=0.5, max_txn_size=64)
+        assert bus.cost(0) == (1, 1.0)
+        assert bus.cost(64) == (1, 33.0)
+        assert bus.cost(65) == (2, 34.5)
+
+    def test_reader_writer(self):
+        vx = VirtualXcvr({addr(0x11, 154): b'\x12\x34'}, bus=VirtualBus(txn_latency=1.0, byte_time=0.0,
+                                                                         max_txn_size=8))
+        assert vx.reader(addr(0x11, 154), 2) == bytearray(b'\x12\x34')
+        assert vx.reader(addr(0x11, 128), 128) == vx.eeprom[addr(0x11, 128):addr(0x11, 256)]
+        assert vx.writer(26, 1, bytearray([0x10]))
+        assert vx.eeprom[26] == 0x10
+        assert vx.reader(EEPROM_SIZE - 1, 2) is None
+        assert not vx.writer(-1, 1, bytearray([0]))
+        assert vx.get_stats() == {
+            'transactions': 18,
+            'reads': 2,
+            'writes': 1,
+            'bytes_read': 130,
+            'bytes_written': 1,
+            'bus_time': 18.0,
+        }
+        assert vx.clock == 18.0
+        vx.sleep(2.0)
+        assert vx.clock == 20.0
+        vx.reset_stats()
+        assert vx.get_stats()['transactions'] == 0
+
+    @pytest.mark.parametrize("module_type, api_type", [
+        ('cmis', CmisApi),
+        ('c-cmis', CCmisApi),
+        ('sff8636', Sff8636Api),
+        ('sff8436', Sff8436Api),
+        ('sff8472', Sff8472Api),
+    ])
+    def test_module_images(self, module_type, api_type):
+        _, api = make_api(module_type)
+        assert type(api) is api_type
+        info = api.get_transceiver_info()
+        assert info['manufacturer'].strip() == 'VIRTUAL'
+        assert info['serial'].startswith('VX0000000')
+        dom = api.get_transceiver_dom_real_value()
+        assert dom['temperature'] > 0
+        assert dom['voltage'] == 3.3
+        assert dom['tx1bias'] > 0
+
+    def test_cmis_vdm_and_pm(self):
+        _, api = make_api('c-cmis')
+        vdm = api.get_transceiver_vdm_real_value()
+        assert vdm['laser_temperature_media1'] == 45.0
+        assert vdm['esnr_media_input8'] == 20.0
+        pm = api.get_transceiver_pm()
+        assert pm['prefec_ber_avg'] == pytest.approx(1e-6)
+
+    def test_cdb_busy(self):
+        vx, api = make_api('cmis', cdb_busy_time=0.5)
+        start = vx.clock
+        with mock.patch('time.sleep', vx.sleep):
+            assert api.get_module_fw_info()['result'][0:2] == ('1.0.0', 1)
+        # the API polled the status until the command completed
+        assert vx.cdb_commands[-1] == 0x0100
+        assert vx.clock - start >= 0.5
+
+    def test_cdb_chkcode_error(self):
+        vx, _ = make_api('cmis')
+        cmd = bytearray(8)
+        cmd[0:2] = b'\x01\x00'
+        cmd[5] = 0x00
+        vx.writer(addr(0x9f, 128), len(cmd), cmd)
+        assert vx.reader(37, 1)[0] == 0x45
+
+    def test_fw_upgrade(self, tmp_path):
+        imagepath = tmp_path / 'fw.bin'
+        imagepath.write_bytes(bytes(4000))
+        vx, api = make_api('cmis')
+        with mock.patch('time.sleep', vx.sleep):
+            feature = api.get_module_fw_mgmt_feature()['feature']
+            assert feature == (112, 2048, False, True, 256)
+            assert api.module_fw_download(*feature, str(imagepath))[0]
+            assert api.module_fw_run()[0]
+            assert api.module_fw_commit()[0]
+            result = api.get_module_fw_info()['result']
+        assert result[8:10] == ('1.1.0', '1.0.0')
+        assert api.get_module_active_firmware() == '1.1'
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(1)
+        benchmarks = {(entry['module_type'], entry['benchmark']) for entry in results}
+        assert ('cmis', 'fw_download') in benchmarks
+        assert ('c-cmis', 'pm') in benchmarks
+        assert ('sff8472', 'dom') in benchmarks
+        assert ('sff8636', 'vdm') not in benchmarks
+        for entry in results:
+            assert entry['steady']['transactions'] > 0
@@ -9,7 +9,8 @@ from sonic_platform_base.sonic_xcvr.codes.credo.aec_800g import CmisAec800gCodes
 from sonic_platform_base.sonic_xcvr.api.innolight.fr_800g import CmisFr800gApi
 from sonic_platform_base.sonic_xcvr.api.amphenol.backplane import AmphBackplaneImpl
 from sonic_platform_base.sonic_xcvr.fields import consts
-from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory
+from sonic_platform_base.sonic_xcvr.xcvr_api_factory import XcvrApiFactory, xcvr_api_registry
+from sonic_platform_base.sonic_xcvr.xcvr_api_registry import XcvrApiBundle, XcvrApiRegistry
 from sonic_platform_base.sonic_xcvr.api.public.sff8636 import Sff8636Api
 from sonic_platform_base.sonic_xcvr.api.public.sff8436 import Sff8436Api
 
@@ -84,6 +85,60 @@ class TestXcvrApiFactory(object):
         CmisFr800gApi = MagicMock()
         assert self.api.create_xcvr_api() is None
 
+class TestXcvrApiRegistry(object):
+    def test_match_vendor(self):
+        assert xcvr_api_registry.match_vendor('Credo', 'CAC81X321M2MC1MS').get_api_class() is CmisAec800gApi
+        assert xcvr_api_registry.match_vendor('CISCO-INNOLIGHT', 'T-DH8CNT-NCI').get_api_class() is CmisFr800gApi
+        assert xcvr_api_registry.match_vendor('Credo', 'T-DH8CNT-NCI') is None
+        assert xcvr_api_registry.match_vendor(None, 'T-DH8CNT-NCI') is None
+
+        registry = XcvrApiRegistry(load_entry_points=False)
+        generic = XcvrApiBundle(None, None, 'generic')
+        specific = XcvrApiBundle(None, None, 'specific')
+        registry.register_vendor('ACME*', ['ACME-8*'], generic)
+        registry.register_vendor('ACME', ['ACME-800'], generic)
+        assert registry.match_vendor('ACME Corp', 'ACME-801') is generic
+        assert registry.match_vendor('ACME', 'ACME-800') is generic
+        # Later registrations take precedence
+        registry.register_vendor('ACME', ['ACME-800'], specific)
+        assert registry.match_vendor('ACME', 'ACME-800') is specific
+
+    def test_lazy_bundle(self):
+        bundle = XcvrApiBundle('.codes.public.sff8636:Sff8636Codes', '.mem_maps.public.sff8636:Sff8636MemMap',
+                               'sonic_platform_base.sonic_xcvr.api.public.sff8636:Sff8636Api')
+        assert bundle._classes is None
+        assert bundle.get_api_class() is Sff8636Api
+        assert bundle.get_mem_map() is bundle.get_mem_map()
+
+    def test_entry_points(self):
+        registered = XcvrApiBundle(None, None, None)
+        def register(registry):
+            registry.register_id(0x99, registered)
+        good = MagicMock()
+        good.load.return_value = register
+        bad = MagicMock()
+        bad.load.side_effect = ImportError('not installed')
+        eps = MagicMock()
+        eps.select.return_value = [bad, good]
+        with patch('importlib.metadata.entry_points', return_value=eps):
+            registry = XcvrApiRegistry()
+            assert registry.get_id_handler(0x99) is registered
+            registry.get_id_handler(0x99)
+        eps.select.assert_called_once_with(group='sonic_platform_base.xcvr_api')
+
+    def test_factory_registry(self):
+        registry = XcvrApiRegistry(load_entry_points=False)
+        registry.register_id(0x0d, XcvrApiBundle('.codes.public.sff8436:Sff8436Codes',
+                                                 '.mem_maps.public.sff8436:Sff8436MemMap',
+                                                 '.api.public.sff8436:Sff8436Api'))
+        factory = XcvrApiFactory(mock_reader_sff8636, None, registry=registry)
+        api = factory.create_xcvr_api()
+        assert isinstance(api, Sff8436Api)
+        # Ports share the memory map
+        assert XcvrApiFactory(mock_reader_sff8636, None, registry=registry).create_xcvr_api().xcvr_eeprom.mem_map \
+            is api.xcvr_eeprom.mem_map
+        assert XcvrApiFactory(lambda start, length: bytes([0x18]), None, registry=registry).create_xcvr_api() is None
+
 class TestAmphBackplaneImpl:
     @pytest.fixture
     def amph_backplane(self, monkeypatch):
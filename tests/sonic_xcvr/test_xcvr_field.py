@@ -357,6 +357,21 @@ class TestRegGroupField(object):
             "Field4": 0x01040302,
         }
 
+    def test_decode_member_views(self):
+        field = mem_map.get_field("RegGroup")
+        data = bytearray([0, 1, 2, 0, 0])
+        seen = []
+        member = field.fields[2]
+        member_decode = member.decode
+        member.decode = lambda raw_data, **deps: seen.append(raw_data) or member_decode(raw_data, **deps)
+        try:
+            assert field.decode(data)["Field2"] == 0x01020000
+        finally:
+            del member.decode
+        # Member fields are handed views on the group data, not copies
+        assert isinstance(seen[0], memoryview)
+        assert seen[0].obj is data
+
 class TestDateField(object):
     def test_decode(self):
         field = mem_map.get_field("Date")
@@ -0,0 +1,388 @@
+"""
+   virtual_xcvr.py
+
+   In-memory virtual transceiver for exercising the sonic_xcvr APIs without hardware.
+
+   A VirtualXcvr holds the linear EEPROM address space the optoe driver exposes (lower memory
+   at 0-127, upper page N at N * 128 + 128, SFF-8472 A2h from 256 onwards) and hands out the
+   reader/writer pair consumed by XcvrApiFactory and XcvrEeprom. Every access is accounted
+   against a VirtualBus cost model, so callers can tell how many transactions, how many bytes
+   and how much bus time an API costs. The CDB engine of CMIS modules is simulated, including
+   the busy period of each command and firmware download/run/commit.
+
+   Page images for CMIS (optionally C-CMIS), SFF-8636, SFF-8436 and SFF-8472 modules are built
+   by the make_*_image() helpers.
+"""
+
+import struct
+
+PAGE_SIZE = 128
+# Lower memory, 256 upper pages and the A2h window of SFF-8472 modules
+EEPROM_SIZE = 258 * PAGE_SIZE
+
+CDB_LPL_PAGE = 0x9f
+CDB_CMD_OFFSET = CDB_LPL_PAGE * PAGE_SIZE + 128
+CDB_RPL_OFFSET = CDB_LPL_PAGE * PAGE_SIZE + 136
+CDB_STATUS_OFFSET = 37
+CDB_FLAGS_OFFSET = 8
+CDB_COMPLETE_FLAG = 0x40
+
+CDB_STATUS_SUCCESS = 0x01
+CDB_STATUS_BUSY = 0x81
+CDB_STATUS_UNKNOWN_CMD = 0x41
+CDB_STATUS_CHKCODE_ERROR = 0x45
+
+VDM_CONTROL_OFFSET = 0x2f * PAGE_SIZE + 144
+VDM_STATUS_OFFSET = 0x2f * PAGE_SIZE + 145
+
+def addr(page, offset):
+    """
+    Return: linear address of byte offset (0-255) of the given page
+    """
+    if offset < PAGE_SIZE:
+        return offset
+    return page * PAGE_SIZE + offset
+
+class VirtualBus(object):
+    """
+    Cost model of the management interface between the host and the module.
+
+    Args:
+        txn_latency: seconds spent per transaction (start, device and offset addressing, stop)
+        byte_time: seconds spent per data byte
+        max_txn_size: largest number of data bytes moved by one transaction; longer accesses
+                      are split, as the optoe driver does for its I2C block transfers
+
+    The defaults approximate a 400 kHz I2C bus behind a driver that moves 64 bytes at a time.
+    """
+    def __init__(self, txn_latency=100e-6, byte_time=22.5e-6, max_txn_size=64):
+        assert max_txn_size > 0
+        self.txn_latency = txn_latency
+        self.byte_time = byte_time
+        self.max_txn_size = max_txn_size
+
+    def cost(self, size):
+        """
+        Return: (transactions, seconds) needed to move size bytes
+        """
+        transactions = max(1, -(-size // self.max_txn_size))
+        return transactions, transactions * self.txn_latency + size * self.byte_time
+
+class VirtualXcvr(object):
+    """
+    Virtual module backed by a bytearray.
+
+    Args:
+        image: dict mapping linear addresses to the bytes stored there, e.g. from make_cmis_image()
+        bus: VirtualBus cost model, a default one if None
+        cdb_busy_time: simulated seconds a CDB command stays busy after being triggered
+        fw_versions: ((major, minor, build) of image A, (major, minor, build) of image B) of a
+                     CMIS module, None for modules without CDB firmware management
+
+    The simulated clock advances with the bus time of every access and with sleep(), which
+    benchmarks substitute for time.sleep so that API polling loops cost no wall time.
+    """
+    def __init__(self, image=None, bus=None, cdb_busy_time=0.0, fw_versions=None):
+        self.eeprom = bytearray(EEPROM_SIZE)
+        for offset, data in (image or {}).items():
+            self.eeprom[offset:offset + len(data)] = data
+        self.bus = bus if bus is not None else VirtualBus()
+        self.cdb_busy_time = cdb_busy_time
+        self.fw_versions = [tuple(version) for version in fw_versions] if fw_versions else None
+        self.running_image = 0
+        self.committed_image = 0
+        self.clock = 0.0
+        self.cdb_commands = []
+        self.fw_download = None
+        self._cdb_pending = None
+        self._update_active_fw()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.transactions = 0
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.bus_time = 0.0
+
+    def get_stats(self):
+        """
+        Return: dict of the accesses accounted since the last reset_stats()
+        """
+        return {
+            'transactions': self.transactions,
+            'reads': self.reads,
+            'writes': self.writes,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'bus_time': self.bus_time,
+        }
+
+    def sleep(self, seconds):
+        """
+        Stand-in for time.sleep advancing the simulated clock only
+        """
+        self.clock += seconds
+
+    def _account(self, size):
+        transactions, seconds = self.bus.cost(size)
+        self.transactions += transactions
+        self.bus_time += seconds
+        self.clock += seconds
+
+    def reader(self, offset, size):
+        if offset < 0 or size < 0 or offset + size > EEPROM_SIZE:
+            return None
+        self._account(size)
+        self.reads += 1
+        self.bytes_read += size
+        self._update_cdb()
+        return bytearray(self.eeprom[offset:offset + size])
+
+    def writer(self, offset, size, write_buffer):
+        if offset < 0 or size < 0 or offset + size > EEPROM_SIZE:
+            return False
+        self._account(size)
+        self.writes += 1
+        self.bytes_written += size
+        self.eeprom[offset:offset + size] = bytes(write_buffer[0:size])
+        if offset <= CDB_CMD_OFFSET < offset + size:
+            self._start_cdb()
+        if offset <= VDM_CONTROL_OFFSET < offset + size:
+            # Freeze (128) or unfreeze (0) completes immediately
+            frozen = self.eeprom[VDM_CONTROL_OFFSET] & 0x80
+            self.eeprom[VDM_STATUS_OFFSET] = 0x80 if frozen else 0x40
+        return True
+
+    # CDB engine
+    def _start_cdb(self):
+        cmd_id = struct.unpack_from('>H', self.eeprom, CDB_CMD_OFFSET)[0]
+        lpl_len = self.eeprom[CDB_CMD_OFFSET + 4]
+        cmd = bytearray(self.eeprom[CDB_CMD_OFFSET:CDB_RPL_OFFSET + lpl_len])
+        self.cdb_commands.append(cmd_id)
+        self.eeprom[CDB_STATUS_OFFSET] = CDB_STATUS_BUSY
+        self.eeprom[CDB_FLAGS_OFFSET] &= ~CDB_COMPLETE_FLAG & 0xff
+        # CdbCheckCode covers the header and LPL with the check code byte itself read as 0
+        chkcode = cmd[5]
+        cmd[5] = 0
+        if 0xff - (sum(cmd) & 0xff) != chkcode:
+            status, rpl = CDB_STATUS_CHKCODE_ERROR, b''
+        else:
+            status, rpl = self._run_cdb(cmd_id, cmd[8:])
+        self._cdb_pending = (self.clock + self.cdb_busy_time, status, rpl)
+        self._update_cdb()
+
+    def _update_cdb(self):
+        if self._cdb_pending is None or self.clock < self._cdb_pending[0]:
+            return
+        _, status, rpl = self._cdb_pending
+        self._cdb_pending = None
+        rpl_base = CDB_RPL_OFFSET - 2
+        self.eeprom[rpl_base] = len(rpl)
+        self.eeprom[rpl_base + 1] = 0xff - (sum(rpl) & 0xff)
+        self.eeprom[CDB_RPL_OFFSET:CDB_RPL_OFFSET + len(rpl)] = rpl
+        self.eeprom[CDB_STATUS_OFFSET] = status
+        self.eeprom[CDB_FLAGS_OFFSET] |= CDB_COMPLETE_FLAG
+
+    def _run_cdb(self, cmd_id, lpl):
+        """
+        Return: (CDB status, reply payload) of the command
+        """
+        if cmd_id in (0x0000, 0x0001, 0x0102):
+            # Query status, enter password, abort download
+            return CDB_STATUS_SUCCESS, b''
+        if cmd_id == 0x0040:
+            # Module features: CMD 0000h-0001h, 0040h-0041h and 0100h-010Ah supported
+            return CDB_STATUS_SUCCESS, bytes([0, 0, 0x03, 0, 0, 0, 0, 0, 0x03, 0, 0, 0, 0, 0, 0, 0]) + \
+                bytes([0, 0, 0, 0, 0, 0, 0, 0, 0xff, 0x07])
+        if cmd_id == 0x0041:
+            # 112-byte start header, 2048-byte blocks, LPL and EPL writes, abort supported
+            return CDB_STATUS_SUCCESS, bytes([0, 0x01, 112, 0xff, 255, 0x11, 0x11, 0, 0, 0, 0, 0])
+        if self.fw_versions is None:
+            return CDB_STATUS_UNKNOWN_CMD, b''
+        if cmd_id == 0x0100:
+            return CDB_STATUS_SUCCESS, self._fw_info_reply()
+        if cmd_id == 0x0101:
+            image_size = struct.unpack_from('>L', lpl, 0)[0]
+            self.fw_download = {'size': image_size, 'received': len(lpl) - 8}
+            return CDB_STATUS_SUCCESS, b''
+        if cmd_id in (0x0103, 0x0104):
+            if self.fw_download is None:
+                return 0x47, b''
+            if cmd_id == 0x0103:
+                self.fw_download['received'] += len(lpl) - 4
+            else:
+                self.fw_download['received'] += struct.unpack_from('>H', self.eeprom, CDB_CMD_OFFSET + 2)[0]
+            return CDB_STATUS_SUCCESS, b''
+        if cmd_id == 0x0107:
+            if self.fw_download is None or self.fw_download['received'] < self.fw_download['size']:
+                return 0x47, b''
+            inactive = 1 - self.running_image
+            major, minor, build = self.fw_versions[self.running_image]
+            self.fw_versions[inactive] = (major, minor + 1, build)
+            self.fw_download = None
+            return CDB_STATUS_SUCCESS, b''
+        if cmd_id == 0x0109:
+            mode = lpl[1]
+            if mode in (0x00, 0x01):
+                self.running_image = 1 - self.running_image
+                self._update_active_fw()
+            return CDB_STATUS_SUCCESS, b''
+        if cmd_id == 0x010a:
+            self.committed_image = self.running_image
+            return CDB_STATUS_SUCCESS, b''
+        return CDB_STATUS_UNKNOWN_CMD, b''
+
+    def _fw_info_reply(self):
+        rpl = bytearray(78)
+        status = 0
+        for image, shift in ((0, 0), (1, 4)):
+            if self.running_image == image:
+                status |= 0x1 << shift
+            if self.committed_image == image:
+                status |= 0x2 << shift
+        rpl[0] = status
+        for image, base in ((0, 2), (1, 38)):
+            major, minor, build = self.fw_versions[image]
+            rpl[base:base + 4] = struct.pack('>BBH', major, minor, build)
+        return bytes(rpl)
+
+    def _update_active_fw(self):
+        if self.fw_versions is None:
+            return
+        major, minor, _ = self.fw_versions[self.running_image]
+        self.eeprom[39:41] = bytes([major, minor])
+        major, minor, _ = self.fw_versions[1 - self.running_image]
+        self.eeprom[addr(0x1, 128):addr(0x1, 130)] = bytes([major, minor])
+
+def _ascii(text, size):
+    return text.ljust(size).encode('ascii')
+
+def make_cmis_image(coherent=False):
+    """
+    Return: image of a paged CMIS 5.0 module with VDM and CDB support. A 400G-FR4 module by
+    default, a 400ZR module (C-CMIS) if coherent is True.
+    """
+    image = {}
+    image[0] = bytes([0x18, 0x50, 0x00, 0x07])                # QSFP-DD, CMIS 5.0, paged, ModuleReady
+    image[14] = struct.pack('>hH', 40 * 256, 33000)           # 40C, 3.3V
+    image[85] = bytes([0x02])                                 # single mode fiber
+    # Application 1: 400GAUI-8 C2M to 400G-FR4 or 400ZR, 8 host lanes, 4 or 1 media lanes
+    if coherent:
+        image[86] = bytes([0x11, 0x3e, 0x81, 0x01])
+    else:
+        image[86] = bytes([0x11, 0x1d, 0x84, 0x01])
+    image[90] = bytes([0xff])
+
+    image[addr(0x0, 128)] = bytes([0x18]) + _ascii('VIRTUAL', 16) + bytes([0x00, 0x11, 0x22]) + \
+        _ascii('VX-400G-ZR' if coherent else 'VX-400G-FR4', 16) + _ascii('A1', 2) + \
+        _ascii('VX00000001', 16) + _ascii('24010100', 8)
+    image[addr(0x0, 200)] = bytes([0xe0, 80, 0x00, 0x07])     # power class 8, 20W, LC
+    image[addr(0x0, 212)] = bytes([0x00])
+
+    image[addr(0x1, 130)] = bytes([1, 0])                     # hardware revision 1.0
+    image[addr(0x1, 142)] = bytes([0x40 | 0x04])              # VDM pages and page 03h supported
+    image[addr(0x1, 144)] = bytes([0x22])
+    image[addr(0x1, 155)] = bytes([0x3f, 0xff, 0xff, 0xff, 0x00, 0x07])  # supported monitors and flags
+    image[addr(0x1, 163)] = bytes([0x40 | 0x10, 0x1f])        # one CDB instance, auto paging, 256-byte writes
+    image[addr(0x1, 167)] = bytes([0x22, 0x22])
+
+    # Module thresholds: temperature, voltage, Tx power, Tx bias, Rx power
+    image[addr(0x2, 128)] = struct.pack('>hhhhHHHH', 80 * 256, -5 * 256, 75 * 256, 0,
+                                        36300, 29700, 34650, 31350)
+    image[addr(0x2, 176)] = struct.pack('>HHHHHHHHHHHH', 31622, 501, 25118, 631, 40000, 1000,
+                                        37500, 1250, 31622, 251, 25118, 316)
+
+    # Lane monitors: Tx power, Tx bias, Rx power of 8 lanes, data path activated
+    image[addr(0x11, 128)] = bytes([0x44] * 4)
+    image[addr(0x11, 154)] = struct.pack('>8H', *[10000] * 8) + struct.pack('>8H', *[12500] * 8) + \
+        struct.pack('>8H', *[10000] * 8)
+    image[addr(0x11, 206)] = bytes([0x10] * 8)
+
+    # VDM group 1: laser temperature, eSNR and pre-FEC BER of 8 lanes
+    descriptor = bytearray()
+    for lane in range(8):
+        descriptor += bytes([lane, 4])
+    for lane in range(8):
+        descriptor += bytes([0x10 | lane, 5])
+    for lane in range(8):
+        descriptor += bytes([0x20 | lane, 11])
+    image[addr(0x20, 128)] = bytes(descriptor)
+    image[addr(0x24, 128)] = struct.pack('>8h', *[45 * 256] * 8) + struct.pack('>8H', *[20 * 256] * 8) + \
+        struct.pack('>8H', *[0x9200] * 8)
+    image[addr(0x28, 128)] = struct.pack('>hhhh', 80 * 256, -5 * 256, 75 * 256, 0) + \
+        struct.pack('>HHHH', 30 * 256, 10 * 256, 28 * 256, 12 * 256) + \
+        struct.pack('>HHHH', 0xa200, 0x0100, 0x9a00, 0x0100)
+    image[addr(0x2f, 128)] = bytes([0x00])                    # one VDM group
+
+    if coherent:
+        # Page 34h/35h PM counters: 1e12 bits with 1e6 corrected, 1e8 frames without errors
+        image[addr(0x34, 128)] = struct.pack('>QQQQQQ', 10 ** 12, 10 ** 9, 10 ** 6, 10 ** 3, 10 ** 3, 10 ** 3)
+        image[addr(0x34, 176)] = struct.pack('>LLLLL', 10 ** 8, 10 ** 5, 0, 0, 0)
+    return image
+
+def make_sff8636_image(revision=0x08):
+    """
+    Return: image of a QSFP28 SFF-8636 module. A revision below 3 makes it an SFF-8436 QSFP+.
+    """
+    image = {}
+    identifier = 0x11 if revision >= 3 else 0x0d
+    image[0] = bytes([identifier, revision, 0x00])
+    image[22] = struct.pack('>hxxH', 35 * 256, 33000)        # 35C, 3.3V
+    image[34] = struct.pack('>4H', *[8000] * 4) + struct.pack('>4H', *[4000] * 4) + \
+        struct.pack('>4H', *[7000] * 4)
+    # 100GBASE-SR4, 64B/66B, 850nm, MPO 1x12, 3.5W
+    image[addr(0x0, 128)] = bytes([identifier, 0xcc, 0x0c, 0x80]) + bytes(7) + \
+        bytes([0x06, 0xff, 0x00, 0x00, 0x32, 0x00, 0x00, 0x00, 0x00]) + _ascii('VIRTUAL', 16) + \
+        bytes([0x00, 0x00, 0x11, 0x22]) + _ascii('VX-100G-SR4', 16) + _ascii('A1', 2) + \
+        struct.pack('>HH', 850 * 20, 10 * 200) + bytes([70, 0x00])
+    image[addr(0x0, 192)] = bytes([0x02, 0x00, 0x00, 0x00]) + _ascii('VX00000002', 16) + \
+        _ascii('24010100', 8) + bytes([0x3c, 0x00])
+    # Module and lane thresholds
+    image[addr(0x3, 128)] = struct.pack('>hhhh', 75 * 256, -5 * 256, 70 * 256, 0)
+    image[addr(0x3, 144)] = struct.pack('>HHHH', 36300, 29700, 34650, 31350)
+    image[addr(0x3, 176)] = struct.pack('>8H', 31622, 501, 25118, 631, 15000, 1000, 12500, 1250) + \
+        struct.pack('>4H', 31622, 251, 25118, 316)
+    return image
+
+def make_sff8436_image():
+    return make_sff8636_image(revision=0x02)
+
+def make_sff8472_image():
+    """
+    Return: image of an internally calibrated SFP+ SFF-8472 module with DDM
+    """
+    image = {}
+    image[0] = bytes([0x03, 0x04, 0x07]) + bytes([0x10] + [0] * 7) + bytes([0x06, 0x67, 0x00, 0x00, 0x00,
+                                                                           0x00, 0x00, 0x00, 0x00])
+    image[20] = _ascii('VIRTUAL', 16) + bytes([0x00, 0x00, 0x11, 0x22]) + _ascii('VX-10G-SR', 16) + \
+        _ascii('A1', 4) + bytes([0x03, 0x52, 0x00])
+    image[64] = bytes([0x00, 0x1a]) + bytes(2) + _ascii('VX00000003', 16) + _ascii('24010100', 8) + \
+        bytes([0x68, 0xf0, 0x08])
+    # A2h thresholds and measured values
+    image[256] = struct.pack('>hhhhHHHHHHHHHHHHHHHH', 75 * 256, -5 * 256, 70 * 256, 0,
+                             36300, 29700, 34650, 31350, 15000, 1000, 12500, 1250,
+                             31622, 501, 25118, 631, 31622, 251, 25118, 316)
+    image[256 + 96] = struct.pack('>hHHHH', 35 * 256, 33000, 4000, 8000, 7000)
+    return image
+
+MODULE_IMAGES = {
+    'cmis': make_cmis_image,
+    'c-cmis': lambda: make_cmis_image(coherent=True),
+    'sff8636': make_sff8636_image,
+    'sff8436': make_sff8436_image,
+    'sff8472': make_sff8472_image,
+}
+
+CMIS_MODULE_TYPES = ('cmis', 'c-cmis')
+
+def make_virtual_xcvr(module_type, **kwargs):
+    """
+    Return: VirtualXcvr loaded with the image of the given module type (a MODULE_IMAGES key).
+    CMIS modules run firmware 1.0.0 from image A and hold 1.1.0 in image B unless fw_versions
+    is given.
+    """
+    if module_type in CMIS_MODULE_TYPES:
+        kwargs.setdefault('fw_versions', ((1, 0, 0), (1, 1, 0)))
+    return VirtualXcvr(MODULE_IMAGES[module_type](), **kwargs)
@@ -0,0 +1,166 @@
+import threading
+from unittest import mock
+
+import pytest
+
+from sonic_y_cable.broadcom import y_cable_broadcom
+from sonic_y_cable.broadcom.y_cable_broadcom import CableCmdTrace, YCable, enable_debug_log
+
+
+class FakeCableSfp(object):
+    """Cable MCU answering every command request with a success status"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.cmd_req = 0
+
+    def read_eeprom(self, offset, num_bytes):
+        if offset == YCable.QSFP_BRCM_CABLE_CMD:
+            return bytearray([self.cmd_req, 0])
+        if offset == YCable.QSFP_BRCM_CABLE_CTRL_CMD_STS:
+            if self.cmd_req & 0x01:
+                return bytearray([0x31 if self.fail else 0x11])
+            return bytearray([0])
+        return bytearray(num_bytes)
+
+    def write_eeprom(self, offset, num_bytes, write_buffer):
+        if offset == YCable.QSFP_BRCM_CABLE_CMD:
+            self.cmd_req = write_buffer[0]
+        return True
+
+
+@pytest.fixture(autouse=True)
+def restore_debug_log():
+    yield
+    enable_debug_log(True)
+
+
+def make_ycable(sfp, debug=False):
+    logger = mock.MagicMock()
+    ycable = YCable(1, logger)
+    enable_debug_log(debug)
+    ycable.platform_chassis = mock.MagicMock()
+    ycable.platform_chassis.get_sfp.return_value = sfp
+    logger.reset_mock()
+    return ycable, logger
+
+
+class TestCableCmdTrace(object):
+
+    def test_record_and_render(self):
+        trace = CableCmdTrace(size=4)
+        with mock.patch('time.monotonic_ns', side_effect=[1000000, 3500000, 4000000]):
+            assert trace.record("command {} start", 5) == 0
+            trace.record("lock acquired")
+            mark = trace.record("read {} bytes", 2)
+        assert trace.entries() == [(1000000, "command {} start", 5), (3500000, "lock acquired", None),
+                                   (4000000, "read {} bytes", 2)]
+        assert trace.render() == ("0.000ms (+0.000ms) : command 5 start\n"
+                                  "2.500ms (+2.500ms) : lock acquired\n"
+                                  "3.000ms (+0.500ms) : read 2 bytes")
+        assert trace.render(mark) == "0.000ms (+0.000ms) : read 2 bytes"
+
+    def test_ring_wraps(self):
+        trace = CableCmdTrace(size=4)
+        for step in range(10):
+            trace.record("step {}", step)
+        assert [arg for _, _, arg in trace.entries()] == [6, 7, 8, 9]
+        assert [arg for _, _, arg in trace.entries(8)] == [8, 9]
+        assert trace.render(10) == ""
+
+    def test_extend(self):
+        trace = CableCmdTrace(size=4)
+        trace.record("step {}", 0)
+        assert trace.extend([(1, "step {}", 1), (2, "step {}", 2)]) == 1
+        assert [arg for _, _, arg in trace.entries(1)] == [1, 2]
+
+    def test_concurrent_record(self):
+        trace = CableCmdTrace(size=4)
+        def record():
+            for _ in range(1000):
+                trace.record("step")
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert trace.count == 4000
+
+
+class TestYCableCmdTracing(object):
+
+    def test_debug_disabled(self):
+        ycable, logger = make_ycable(FakeCableSfp())
+        assert not ycable.is_debug_log_enabled()
+        with mock.patch('sonic_y_cable.broadcom.y_cable_broadcom.datetime') as mock_datetime:
+            ret_val, _ = ycable._YCable__cable_cmd_execute(1, bytearray(5), bytearray(0))
+            ycable.log(ycable.LOG_DEBUG, "not formatted")
+            mock_datetime.utcnow.assert_not_called()
+        assert ret_val == 0
+        logger.log_debug.assert_not_called()
+        # the step timings are still available on demand
+        steps = ycable.get_cmd_trace().splitlines()
+        assert steps[0].endswith("command 1 start")
+        assert steps[-1].endswith("__cable_cmd_execute() completed")
+        assert any(step.endswith("write command request to 1 done") for step in steps)
+
+    def test_debug_enabled(self):
+        ycable, logger = make_ycable(FakeCableSfp(), debug=True)
+        assert ycable.is_debug_log_enabled()
+        ret_val, _ = ycable._YCable__cable_cmd_execute(1, bytearray(5), bytearray(0))
+        assert ret_val == 0
+        logger.log_debug.assert_called_once()
+        msg = logger.log_debug.call_args[0][0]
+        assert "command 1 steps:" in msg
+        assert "polling for status done" in msg
+
+    def test_failure_renders_steps(self):
+        ycable, logger = make_ycable(FakeCableSfp(fail=True))
+        ret_val, _ = ycable._YCable__cable_cmd_execute(1, bytearray(5), bytearray(0))
+        assert ret_val == -1
+        logger.log_debug.assert_not_called()
+        msg = logger.log_error.call_args[0][0]
+        assert "command 1 failed with -1, steps:" in msg
+        assert "polling for status done" in msg
+
+    def test_concurrent_command_steps(self):
+        sfp = FakeCableSfp(fail=True)
+        ycable, logger = make_ycable(sfp)
+        read_eeprom = sfp.read_eeprom
+        def read_eeprom_with_other_command(offset, num_bytes):
+            # steps recorded meanwhile by a command on another thread
+            ycable.cmd_trace.record("other command step")
+            return read_eeprom(offset, num_bytes)
+        sfp.read_eeprom = read_eeprom_with_other_command
+        ret_val, _ = ycable._YCable__cable_cmd_execute(1, bytearray(5), bytearray(0))
+        assert ret_val == -1
+        msg = logger.log_error.call_args[0][0]
+        assert "polling for status done" in msg
+        assert "other command step" not in msg
+        # the steps of the command follow each other in the port trace
+        steps = [step.split(" : ")[1] for step in ycable.get_cmd_trace().splitlines()]
+        assert steps[-1] == "__cable_cmd_execute() completed"
+        assert "other command step" not in steps[steps.index("command 1 start"):]
+
+    def test_debug_log_switch(self):
+        # debug messages go to the logger unless turned off
+        assert y_cable_broadcom.ENABLE_DEBUG_LOG
+        ycable, logger = make_ycable(FakeCableSfp())
+        assert not ycable.is_debug_log_enabled()
+        # syslog priority 7, debug messages reach the logger again
+        ycable.enable_all_log(False)
+        assert ycable.is_debug_log_enabled()
+        assert not ycable.CONSOLE_PRINT
+
+    def test_mux_calls_not_timed(self):
+        ycable, logger = make_ycable(FakeCableSfp())
+        with mock.patch('sonic_y_cable.broadcom.y_cable_broadcom.datetime') as mock_datetime:
+            ycable.get_mux_direction()
+            mock_datetime.utcnow.assert_not_called()
+        logger.log_debug.assert_not_called()
+
+        enable_debug_log(True)
+        ycable.get_mux_direction()
+        messages = [call[0][0] for call in logger.log_debug.call_args_list]
+        assert any("(0s 0ms) : get_mux_direction() start" in msg for msg in messages)
+        assert any("get_mux_direction() completed" in msg for msg in messages)
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+
+from sonic_y_cable.microsoft.y_cable_simulated import YCable, MuxSimulatorClient
+
+VM_SET = 'vms-kvm-t0'
+NUM_PORTS = 8
+
+
+class MuxSimulatorStandIn(object):
+    """Minimal stand-in for the mux simulator HTTP server"""
+
+    def __init__(self):
+        self.mux = {}
+        for index in range(NUM_PORTS):
+            self.mux['mbr-{}-{}'.format(VM_SET, index)] = {
+                'port_index': index,
+                'active_side': 'upper_tor',
+                'flap_counter': index,
+            }
+        self.requests = []
+        self.connections = 0
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                standin.connections += 1
+                BaseHTTPRequestHandler.setup(self)
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, data):
+                body = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _port(self, index):
+                return standin.mux['mbr-{}-{}'.format(VM_SET, index)]
+
+            def do_GET(self):
+                standin.requests.append(('GET', self.path))
+                parts = self.path.strip('/').split('/')
+                if parts == ['mux', VM_SET]:
+                    self._reply(200, standin.mux)
+                elif len(parts) == 3 and parts[:2] == ['mux', VM_SET]:
+                    self._reply(200, self._port(int(parts[2])))
+                else:
+                    self._reply(404, {'err_msg': 'not found'})
+
+            def do_POST(self):
+                standin.requests.append(('POST', self.path))
+                data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                parts = self.path.strip('/').split('/')
+                if parts == ['mux', VM_SET, 'clear_flap_counter']:
+                    self._port(int(data['port_to_clear']))['flap_counter'] = 0
+                    self._reply(200, {})
+                elif len(parts) == 3:
+                    status = self._port(int(parts[2]))
+                    status['active_side'] = data['active_side']
+                    status['flap_counter'] += 1
+                    self._reply(200, status)
+                else:
+                    self._reply(404, {'err_msg': 'not found'})
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def standin():
+    server = MuxSimulatorStandIn()
+    MuxSimulatorClient._clients = {}
+    yield server
+    for client in MuxSimulatorClient._clients.values():
+        client.close()
+    MuxSimulatorClient._clients = {}
+    server.close()
+
+
+def make_cables(standin, side='upper_tor'):
+    config = os.path.join(tempfile.mkdtemp(), 'mux_simulator.json')
+    with open(config, 'w') as f:
+        json.dump({'server_ip': '127.0.0.1', 'server_port': standin.port,
+                   'vm_set': VM_SET, 'side': side}, f)
+
+    def init_port_index(self):
+        self.port_index = self.port - 1
+
+    cables = []
+    with mock.patch.object(YCable, 'MUX_SIMULATOR_CONFIG_FILE', config), \
+         mock.patch.object(YCable, '_init_port_index', init_port_index):
+        for port in range(1, NUM_PORTS + 1):
+            cables.append(YCable(port, mock.MagicMock()))
+    return cables
+
+
+class TestYCableSimulated(object):
+
+    def test_status_single_request_per_cycle(self, standin):
+        cables = make_cables(standin)
+        for cable in cables:
+            assert cable.get_mux_direction() == YCable.TARGET_TOR_A
+            assert cable.is_link_active(YCable.TARGET_NIC)
+            assert cable.get_read_side() == YCable.TARGET_TOR_A
+        assert standin.requests == [('GET', '/mux/{}'.format(VM_SET))]
+
+        assert cables[3].get_switch_count_total(YCable.SWITCH_COUNT_MANUAL) == 3
+        assert len(standin.requests) == 1
+
+    def test_status_ttl(self, standin):
+        cables = make_cables(standin)
+        with mock.patch.object(YCable, 'STATUS_TTL', 0):
+            cables[0].get_mux_direction()
+            cables[1].get_mux_direction()
+        assert standin.requests == [('GET', '/mux/{}'.format(VM_SET))] * 2
+        # Keep-alive connection is reused
+        assert standin.connections == 1
+
+    def test_toggle_updates_cache(self, standin):
+        cables = make_cables(standin)
+        assert cables[2].get_mux_direction() == YCable.TARGET_TOR_A
+        assert cables[2].toggle_mux_to_tor_b()
+        assert cables[2].get_mux_direction() == YCable.TARGET_TOR_B
+        assert cables[1].get_mux_direction() == YCable.TARGET_TOR_A
+        assert standin.requests == [
+            ('GET', '/mux/{}'.format(VM_SET)),
+            ('POST', '/mux/{}/2'.format(VM_SET)),
+        ]
+
+    def test_clear_counter_invalidates_cache(self, standin):
+        cables = make_cables(standin)
+        assert cables[5].get_switch_count_total(YCable.SWITCH_COUNT_MANUAL, clear_on_read=True) == 5
+        assert cables[5].get_switch_count_total(YCable.SWITCH_COUNT_MANUAL) == 0
+        assert standin.requests == [
+            ('GET', '/mux/{}'.format(VM_SET)),
+            ('POST', '/mux/{}/clear_flap_counter'.format(VM_SET)),
+            ('GET', '/mux/{}'.format(VM_SET)),
+        ]
+
+    def test_fallback_to_port_status(self, standin):
+        cables = make_cables(standin)
+        del standin.mux['mbr-{}-4'.format(VM_SET)]['port_index']
+        assert cables[4].get_mux_direction() == YCable.TARGET_TOR_A
+        assert standin.requests == [
+            ('GET', '/mux/{}'.format(VM_SET)),
+            ('GET', '/mux/{}/4'.format(VM_SET)),
+        ]
+
+    def test_http_error(self, standin):
+        cables = make_cables(standin)
+        with mock.patch.object(YCable, 'POLL_TIMEOUT', 0):
+            assert cables[0]._get('http://127.0.0.1:{}/mux/unknown'.format(standin.port)) is None
+        cables[0]._logger.log_warning.assert_called()